@@ -5,19 +5,60 @@ import json
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
 from functools import wraps
+import logging
 import os
+import time
 from decimal import Decimal
 import re
 import csv
+import hashlib
 from io import StringIO, BytesIO
 
-
-# Import PPT generation functions from separate module (unchanged)
-from ppt_generator import get_db_connection_for_ppt, fetch_data, prepare_data_dictionary, generate_presentation
+import assets
+import bulk_import
+import change_bus
+import change_hooks
+import compression
+import columnar_replica
+import config_store
+import db_pool
+import instrumentation
+import page_cache
+import record_cache
+import request_logging
+import rollover
+import server_sessions
+import snapshot_store
+import window_cache
+from instrumentation import phase
+from request_logging import get_logger
+
+# Import PPT generation functions from separate module
+from ppt_generator import (fetch_data, render_presentation, RenderProfile, cprofiled,
+                           CHART_MODE_FULL, build_preview)
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here_change_in_production'
 
+# Structured JSON logging (level via CSM_LOG_LEVEL), written off the request thread
+request_logging.init_app(app)
+logger = get_logger()
+
+# Bearer token for /internal/* (CSM_INTERNAL_TOKEN); unset, those endpoints answer 404.
+INTERNAL_TOKEN = os.environ.get('CSM_INTERNAL_TOKEN')
+
+# Request/SQL timing, Server-Timing header and the token-protected /internal/metrics endpoint
+instrumentation.init_app(app, token=INTERNAL_TOKEN)
+
+# gzip (brotli when installed) for HTML/JSON/CSV responses and the token-protected /internal/size_report.
+# CSM_COMPRESSION=0 turns it off, e.g. when a proxy in front already compresses.
+if os.environ.get('CSM_COMPRESSION', '1') != '0':
+    compression.init_app(app, token=INTERNAL_TOKEN)
+
+# Page JS/CSS lives in static/ and is referenced with asset_url(), which serves it under a
+# content-hashed /assets/ URL cached for a year (a changed file gets a new URL)
+assets.init_app(app)
+
 # Session configuration - 30 minute timeout
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True if using HTTPS
@@ -25,6 +66,19 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_REFRESH_EACH_REQUEST'] = False  # KEY CHANGE: Don't auto-refresh
 
+# Sessions live server-side (in-process LRU + SQLite file shared by workers); the cookie only
+# carries a signed session id. CSM_SESSION_BACKEND=cookie restores Flask's cookie sessions.
+# Rows include DB credentials: the default file is in the private (0700) instance folder, not the temp dir.
+SESSION_DB = os.environ.get('CSM_SESSION_DB', os.path.join(app.instance_path, 'sessions.sqlite3'))
+if os.environ.get('CSM_SESSION_BACKEND', 'server') != 'cookie':
+    session_interface = server_sessions.init_app(app, SESSION_DB)
+    # GET /check_session is answered from the session LRU before Flask's hooks run, when it safely can
+    app.wsgi_app = server_sessions.CheckSessionFastPath(app.wsgi_app, app, session_interface,
+                                                        timeout=timedelta(minutes=30))
+
+# last_activity is rewritten at most this often, so most requests leave the session untouched
+ACTIVITY_GRANULARITY = timedelta(seconds=60)
+
 @app.template_filter('format_month_display')
 def format_month_display(date_string):
     """Convert date string to 'Month YYYY' format"""
@@ -36,13 +90,38 @@ def format_month_display(date_string):
     except:
         return date_string
 
-# Database configuration (kept as you provided)
+# PPT profiling: CSM_PPT_PROFILE=1 logs per-slide/per-chart render timings,
+# CSM_PPT_CPROFILE_DIR=<dir> additionally writes one cProfile .prof file per deck
+PPT_PROFILE = os.environ.get('CSM_PPT_PROFILE') == '1'
+PPT_CPROFILE_DIR = os.environ.get('CSM_PPT_CPROFILE_DIR')
+# CSM_PPT_CHART_MODE=fast writes chart XML caches only and skips the embedded workbooks
+PPT_CHART_MODE = os.environ.get('CSM_PPT_CHART_MODE', CHART_MODE_FULL)
+
+# Prepared slide-data snapshots read by /generate_ppt and /preview_ppt, discarded on write and rebuilt on read.
+# CSM_SNAPSHOTS=0 disables them; CSM_SNAPSHOT_TTL bounds staleness after out-of-app writes.
+SNAPSHOT_DIR = (os.environ.get('CSM_SNAPSHOT_DIR', os.path.join(app.instance_path, 'snapshots'))
+                if os.environ.get('CSM_SNAPSHOTS', '1') != '0' else None)
+snapshots = snapshot_store.SnapshotStore(
+    SNAPSHOT_DIR, ttl=int(os.environ.get('CSM_SNAPSHOT_TTL', snapshot_store.DEFAULT_TTL_SECONDS)))
+
+# Database configuration (kept as you provided; CSM_DB_* env vars override for local/bench runs)
 DB_CONFIG = {
-    'dbname': 'AutomationDB',
-    'host': '10.193.131.151',
-    'port': '5432'
+    'dbname': os.environ.get('CSM_DB_NAME', 'AutomationDB'),
+    'host': os.environ.get('CSM_DB_HOST', '10.193.131.151'),
+    'port': os.environ.get('CSM_DB_PORT', '5432')
 }
 
+# Per-user pool of idle connections; conn.close() hands a connection back for the user's next request.
+# CSM_DB_POOL_IDLE_TIMEOUT / CSM_DB_VERIFIED_TTL / CSM_DB_PING_AFTER (parked longer: SELECT 1 before reuse)
+# are in seconds.
+connection_pool = db_pool.UserConnectionPool(
+    DB_CONFIG,
+    idle_timeout=int(os.environ.get('CSM_DB_POOL_IDLE_TIMEOUT', db_pool.DEFAULT_IDLE_TIMEOUT)),
+    verified_ttl=int(os.environ.get('CSM_DB_VERIFIED_TTL', db_pool.DEFAULT_VERIFIED_TTL)),
+    ping_after=int(os.environ.get('CSM_DB_PING_AFTER', db_pool.DEFAULT_PING_AFTER)),
+    application_name=change_bus.worker_name,
+)
+
 def get_db_connection():
     """Establishes a connection to the PostgreSQL database using session credentials."""
     try:
@@ -51,17 +130,104 @@ def get_db_connection():
         if not username or not password:
             raise psycopg2.Error("Missing user credentials in session.")
 
-        conn = psycopg2.connect(
-            dbname=DB_CONFIG['dbname'],
-            user=username,
-            password=password,
-            host=DB_CONFIG['host'],
-            port=DB_CONFIG['port']
-        )
+        started = time.perf_counter()
+        conn = connection_pool.acquire(username, password)
+        instrumentation.record_connect(time.perf_counter() - started)
         return conn
     except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
+        logger.error('Error connecting to PostgreSQL: %s', e)
+        return None
+
+# Effective-dated customer configuration (config_store.py); CSM_CONFIG_CACHE_TTL is in seconds.
+configs = config_store.configs
+
+# final_computed_table rows by customer and month (record_cache.py); CSM_RECORD_CACHE_SIZE rows,
+# CSM_RECORD_CACHE_TTL seconds.
+records = record_cache.records
+
+# Each customer's monthly series for multi-month windows (window_cache.py); CSM_WINDOW_CACHE_CUSTOMERS
+# series, CSM_WINDOW_CACHE_TTL seconds.
+windows = window_cache.windows
+
+# In-memory columnar copy of final_computed_table for list/CSM reads (columnar_replica.py).
+# CSM_COLUMNAR_REPLICA=1 enables it; CSM_REPLICA_TTL (seconds) sets the full-reload interval.
+replica = columnar_replica.ColumnarReplica(
+    enabled=os.environ.get('CSM_COLUMNAR_REPLICA') == '1',
+    ttl=int(os.environ.get('CSM_REPLICA_TTL', columnar_replica.DEFAULT_TTL_SECONDS)))
+
+# Caches are updated first so a snapshot built after its invalidation reads what was just written.
+change_hooks.register(config_store.invalidation_hook(configs))
+change_hooks.register(record_cache.invalidation_hook(records))
+change_hooks.register(window_cache.update_hook(windows, get_db_connection))
+change_hooks.register(columnar_replica.update_hook(replica, get_db_connection))
+change_hooks.register(snapshot_store.invalidation_hook(snapshots))
+
+# Customer, CSM and month lists shared by every render (page_cache.py); CSM_PAGE_CACHE_TTL is in seconds.
+pages = page_cache.pages
+change_hooks.register(page_cache.invalidation_hook(pages))
+
+def apply_remote_change(change, connect):
+    """Bring this worker's caches up to date with a change committed by another worker or outside the app."""
+    for hook in (config_store.invalidation_hook(configs),
+                 record_cache.invalidation_hook(records),
+                 window_cache.update_hook(windows, connect),
+                 columnar_replica.update_hook(replica, connect),
+                 page_cache.invalidation_hook(pages),
+                 snapshot_store.invalidation_hook(snapshots)):
+        hook(change)
+
+def resync_caches():
+    """Drop every in-memory cache (changes may have been missed); snapshots expire by CSM_SNAPSHOT_TTL."""
+    configs.invalidate()
+    records.invalidate()
+    windows.invalidate()
+    replica.invalidate()
+    pages.invalidate()
+
+# Cross-worker invalidation over LISTEN/NOTIFY (change_bus.py), and per-customer data versions for ETags.
+# Database triggers publish every write, from the app or not; CSM_CHANGE_BUS=1 enables the listener
+# (install the triggers first: python change_bus.py --dsn ... --install).
+# The listener connects with CSM_CHANGE_BUS_DSN, or else with the first logged-in user's credentials.
+bus = change_bus.ChangeBus(apply_remote_change, resync_caches, enabled=os.environ.get('CSM_CHANGE_BUS') == '1')
+CHANGE_BUS_DSN = os.environ.get('CSM_CHANGE_BUS_DSN')
+
+def start_change_bus(username, password):
+    """Start this worker's change bus listener if it isn't running."""
+    if CHANGE_BUS_DSN:
+        bus.start(lambda: psycopg2.connect(CHANGE_BUS_DSN))
+    else:
+        bus.start(lambda: psycopg2.connect(**DB_CONFIG, user=username, password=password))
+
+def replica_snapshot():
+    """The columnar replica's current snapshot, or None (disabled or failed to load): then use SQL."""
+    try:
+        return replica.current(get_db_connection)
+    except Exception:
+        logger.exception('columnar replica load failed')
+        return None
+
+def load_slide_data(customer, month):
+    """Prepared slide data for a deck: the stored snapshot, else fetched, prepared and stored.
+
+    Returns None when the customer/month has no data.
+    """
+    with phase('snapshot'):
+        data_dict = snapshots.get(customer, month)
+    if data_dict is not None:
+        return data_dict
+    token = snapshots.generation(customer)
+    conn = get_db_connection()
+    if not conn:
+        raise psycopg2.Error('Database connection failed')
+    try:
+        with phase('fetch'):
+            customer_mapping_df, final_computed_df = fetch_data(conn, customer, month)
+    finally:
+        conn.close()
+    if customer_mapping_df.empty or final_computed_df.empty:
         return None
+    with phase('prepare'):
+        return snapshots.store(customer, month, customer_mapping_df, final_computed_df, token)
 
 def login_required(f):
     @wraps(f)
@@ -74,10 +240,10 @@ def login_required(f):
 
 @app.before_request
 def before_request_handler():
-    """Handle session timeout and logging - with proper inactivity detection"""
+    """Handle session timeout - with proper inactivity detection (access logging lives in request_logging)"""
     
     # Skip session checks for static files and login page
-    if request.endpoint in ['static', 'login', 'check_session']:
+    if request.endpoint in ['static', 'asset', 'login', 'check_session']:
         return
     
     # Check if user is logged in
@@ -99,16 +265,17 @@ def before_request_handler():
                 flash('Your session has expired due to inactivity. Please log in again.', 'warning')
                 return redirect(url_for('login'))
         
-        # Update last activity time for non-check_session requests
-        session['last_activity'] = datetime.now().isoformat()
-        session.modified = True
+        # Update last activity time for non-check_session requests (coarse: see ACTIVITY_GRANULARITY)
+        now = datetime.now()
+        if not last_activity or now - last_activity >= ACTIVITY_GRANULARITY:
+            session['last_activity'] = now.isoformat()
         
         # Make session permanent
-        session.permanent = True
-    
-    # Log request with username
-    username = session.get("username", "ANONYMOUS")
-    print(f"[USER={username}] {request.remote_addr} requested {request.method} {request.path}")
+        if not session.permanent:
+            session.permanent = True
+
+        if bus.enabled and not bus.listening:
+            start_change_bus(session['username'], session.get('password'))
 
 
 @app.route('/check_session')
@@ -147,7 +314,11 @@ def check_session():
 
 @app.route('/logout')
 def logout():
+    if session.get('username'):
+        connection_pool.discard_user(session['username'])
     session.clear()   # clears all stored filters also
+    if hasattr(session, 'regenerate'):
+        session.regenerate()
     flash("Logged out successfully!", "success")
     return redirect(url_for('login'))
 
@@ -205,21 +376,17 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
         
-        print(f"[LOGIN ATTEMPT] username={username}")
+        logger.info('login attempt', extra={'fields': {'username': username}})
         try:
-            test_conn = psycopg2.connect(
-                dbname=DB_CONFIG['dbname'],
-                user=username,
-                password=password,
-                host=DB_CONFIG['host'],
-                port=DB_CONFIG['port']
-            )
-            test_conn.close()
+            # The verifying connection stays in the pool and serves the redirect to /metrics
+            connection_pool.verify(username, password)
             
-            print(f"[LOGIN SUCCESS] username={username}")
+            logger.info('login success', extra={'fields': {'username': username}})
             
-            # Clear any existing session data
+            # Clear any existing session data (and move to a fresh session id)
             session.clear()
+            if hasattr(session, 'regenerate'):
+                session.regenerate()
             
             # Set new session data
             session['username'] = username
@@ -230,7 +397,7 @@ def login():
             flash('Login successful!', 'success')
             return redirect(url_for('metrics'))
         except psycopg2.Error as e:
-            print(f"[LOGIN FAILED] username={username}")
+            logger.warning('login failed', extra={'fields': {'username': username}})
             flash('Invalid database credentials. Access denied.', 'danger')
         except Exception as e:
             flash(f'Error during login: {str(e)}', 'danger')
@@ -238,6 +405,33 @@ def login():
     return render_template('login.html')
 
 
+# The final_computed_table columns the metrics page shows and updates in place
+METRICS_RECORD_COLUMNS = """
+    customer_name, month_year,
+    updated_availability, updated_target,
+    updated_prod_limit, updated_prod_used, updated_test_limit, updated_test_used,
+    updated_dev_limit, updated_dev_used,
+    updated_prod_target_storage_gb, updated_prod_storage_gb,
+    updated_test_target_storage_gb, updated_test_storage_gb,
+    updated_dev_target_storage_gb, updated_dev_storage_gb,
+    updated_current_opened_tickets, updated_current_closed_tickets,
+    updated_current_backlog_tickets, updated_tickets_backlog
+"""
+METRICS_RECORD_FIELDS = [name.strip() for name in METRICS_RECORD_COLUMNS.split(',')]
+
+
+def json_record(row):
+    """A DB row as a JSON-ready dict: Decimals as floats, dates as YYYY-MM-DD."""
+    record = {}
+    for key, value in row.items():
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, (datetime, date)):
+            value = value.strftime('%Y-%m-%d')
+        record[key] = value
+    return record
+
+
 @app.route('/metrics', methods=['GET', 'POST'])
 @login_required
 def metrics():
@@ -252,7 +446,7 @@ def metrics():
     conn = get_db_connection()
     if not conn:
         flash('Database connection failed.', 'danger')
-        return render_template('metrics.html', customers=[], no_of_envs=2)
+        return render_template('metrics.html', customers=[], data=None, no_of_envs=2)
 
     try:
         cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -317,24 +511,14 @@ def metrics():
                 sel_month_date = None
 
             # Load main metrics
-            cur.execute("""
-                SELECT *
-                FROM final_computed_table
-                WHERE customer_name = %s AND month_year = %s
-            """, (selected_customer, selected_month))
-            data = cur.fetchone()
-
-            # Load config fields
-            cur.execute("""
-                SELECT *
-                FROM customer_mapping_table
-                WHERE customer_name = %s AND month_year = %s
-                LIMIT 1
-            """, (selected_customer, sel_month_date))
-            row = cur.fetchone()
+            if sel_month_date:
+                data = records.get(conn, selected_customer, sel_month_date)
 
-            if row:
-                config = row  # dictionary of fields
+            # Load config fields: the month's own configuration (the row save_config edits)
+            if sel_month_date:
+                resolved = configs.resolve(conn, selected_customer, sel_month_date, exact=True)
+                if resolved:
+                    config = resolved
 
         cur.close()
         conn.close()
@@ -370,12 +554,67 @@ def metrics():
 
     except Exception as e:
         flash(f'Error: {str(e)}', 'danger')
-        return render_template('metrics.html', customers=[], no_of_envs=2)
+        return render_template('metrics.html', customers=[], data=None, no_of_envs=2)
+
+
+def metrics_etag(customer, month):
+    """Validator for a customer month's metrics data: its customer's data version, or None without the bus."""
+    version = bus.version(customer)
+    if version is None:
+        return None
+    return hashlib.sha1(f'{customer}\0{month:%Y-%m-%d}\0{version}'.encode()).hexdigest()[:20]
+
+def etag_matches(etag):
+    """Whether If-None-Match names etag, or a compressed variant of it (see compression.py)."""
+    return any(tag == etag or tag.startswith(etag + '-') for tag in request.if_none_match.as_set(include_weak=True))
+
+@app.route('/metrics_data')
+@login_required
+def metrics_data():
+    """Metrics record and configuration in force for ?customer=&month=, for in-place page updates."""
+    customer = request.args.get('customer') or ''
+    try:
+        month_date = datetime.strptime(request.args.get('month') or '', '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid month format'}), 400
+
+    etag = metrics_etag(customer, month_date)
+    if etag and etag_matches(etag):
+        session['metrics_selected_customer'] = customer
+        session['metrics_selected_month'] = month_date.strftime('%Y-%m-%d')
+        return '', 304, {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'success': False, 'message': 'Database connection failed.'}), 500
+    try:
+        record = records.get(conn, customer, month_date)
+        config = configs.resolve(conn, customer, month_date, exact=True)
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        conn.close()
+
+    if record is None:
+        return jsonify({'success': False, 'message': f'No data for {customer} in {month_date:%B %Y}.'}), 404
+    # the selection survives a reload, as with the form POST
+    session['metrics_selected_customer'] = customer
+    session['metrics_selected_month'] = month_date.strftime('%Y-%m-%d')
+    record = {name: record[name] for name in METRICS_RECORD_FIELDS}
+    response = jsonify({'success': True, 'record': json_record(record), 'config': json_record(config or {})})
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @app.route('/get_months/<customer>')
 @login_required
 def get_months(customer):
+    snapshot = replica_snapshot()
+    if snapshot is not None:
+        return jsonify([m.strftime('%Y-%m-%d') for m in snapshot.customer_months(customer)])
+
     conn = get_db_connection()
     if not conn:
         return jsonify([])
@@ -414,12 +653,19 @@ def save_availability():
         availability_decimal = availability / 100
         target_decimal = target / 100
         conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(f"""
             UPDATE final_computed_table 
             SET updated_availability = %s, updated_target = %s
             WHERE customer_name = %s AND month_year = %s
+            RETURNING {METRICS_RECORD_COLUMNS}
         """, (availability_decimal, target_decimal, customer, month))
+        record = cur.fetchone()
+        if record is None:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return jsonify({'success': False, 'message': f'No data for {customer} in {month}.'})
         cur.execute("""
             UPDATE availability_table 
             SET updated_availability = %s, updated_target = %s
@@ -428,7 +674,9 @@ def save_availability():
         conn.commit()
         cur.close()
         conn.close()
-        return jsonify({'success': True, 'message': f'Availability updated to {availability}% and Target to {target}%'})
+        change_hooks.record_changed(customer, month, 'save_availability')
+        return jsonify({'success': True, 'message': f'Availability updated to {availability}% and Target to {target}%',
+                        'record': json_record(record)})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
@@ -452,16 +700,23 @@ def save_users():
         if dev_used > dev_limit and dev_limit > 0:
             warnings.append('Dev Used > Dev Limit')
         conn = get_db_connection()
-        cur = conn.cursor()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
 
         # Update the single record for the specified month
-        cur.execute("""
+        cur.execute(f"""
             UPDATE final_computed_table 
             SET updated_prod_limit = %s, updated_prod_used = %s,
                 updated_test_limit = %s, updated_test_used = %s,
                 updated_dev_limit = %s, updated_dev_used = %s
             WHERE customer_name = %s AND month_year = %s
+            RETURNING {METRICS_RECORD_COLUMNS}
         """, (prod_limit, prod_used, test_limit, test_used, dev_limit, dev_used, customer, month))
+        record = cur.fetchone()
+        if record is None:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return jsonify({'success': False, 'message': f'No data for {customer} in {month}.'})
 
         # Propagate the new limits to all future months for that customer
         cur.execute("""
@@ -489,10 +744,12 @@ def save_users():
         conn.commit()
         cur.close()
         conn.close()
+        # limits are propagated to later months
+        change_hooks.record_changed(customer, month, 'save_users', propagates=True)
         message = 'Users data updated successfully'
         if warnings:
             message += ' (Warning: ' + ', '.join(warnings) + ')'
-        return jsonify({'success': True, 'message': message, 'warnings': warnings})
+        return jsonify({'success': True, 'message': message, 'warnings': warnings, 'record': json_record(record)})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
@@ -520,16 +777,23 @@ def save_storage():
         dev_target = to_decimal(request.form.get('dev_target', 0))
         dev_actual = to_decimal(request.form.get('dev_actual', 0))
         conn = get_db_connection()
-        cur = conn.cursor()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
 
         # Update the single record for the specified month (including actual usage)
-        cur.execute("""
+        cur.execute(f"""
             UPDATE final_computed_table 
             SET updated_prod_target_storage_gb = %s, updated_prod_storage_gb = %s,
                 updated_test_target_storage_gb = %s, updated_test_storage_gb = %s,
                 updated_dev_target_storage_gb = %s, updated_dev_storage_gb = %s
             WHERE customer_name = %s AND month_year = %s
+            RETURNING {METRICS_RECORD_COLUMNS}
         """, (prod_target, prod_actual, test_target, test_actual, dev_target, dev_actual, customer, month))
+        record = cur.fetchone()
+        if record is None:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return jsonify({'success': False, 'message': f'No data for {customer} in {month}.'})
 
         # Propagate the new storage targets to all future months for that customer
         cur.execute("""
@@ -557,7 +821,9 @@ def save_storage():
         conn.commit()
         cur.close()
         conn.close()
-        return jsonify({'success': True, 'message': 'Storage data updated successfully'})
+        # targets are propagated to later months
+        change_hooks.record_changed(customer, month, 'save_storage', propagates=True)
+        return jsonify({'success': True, 'message': 'Storage data updated successfully', 'record': json_record(record)})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
@@ -576,10 +842,10 @@ def save_tickets():
         overall_backlog = int(data.get('overall_backlog'))
 
         conn = get_db_connection()
-        cur = conn.cursor()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
 
         # 1️⃣ UPDATE final_computed_table  (your system depends on this)
-        cur.execute("""
+        cur.execute(f"""
             UPDATE final_computed_table
             SET 
                 updated_current_opened_tickets = %s,
@@ -588,6 +854,7 @@ def save_tickets():
                 updated_tickets_backlog = %s
             WHERE customer_name = %s
               AND month_year = %s::date
+            RETURNING {METRICS_RECORD_COLUMNS}
         """, (
             opened,
             closed,
@@ -596,6 +863,12 @@ def save_tickets():
             customer,
             month
         ))
+        record = cur.fetchone()
+        if record is None:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return jsonify({'success': False, 'message': f'No data for {customer} in {month}.'})
 
         # 2️⃣ UPDATE tickets_computed_table  (THIS is what UI loads)
         cur.execute("""
@@ -619,8 +892,9 @@ def save_tickets():
         conn.commit()
         cur.close()
         conn.close()
+        change_hooks.record_changed(customer, month, 'save_tickets')
 
-        return jsonify({'success': True, 'message': 'Tickets updated successfully'})
+        return jsonify({'success': True, 'message': 'Tickets updated successfully', 'record': json_record(record)})
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -631,19 +905,24 @@ def generate_ppt():
     try:
         customer = request.form.get('customer')
         month = request.form.get('month')
-        conn = get_db_connection_for_ppt(session['username'], session['password'])
-        if not conn:
-            return jsonify({'success': False, 'message': 'Database connection failed'})
-        customer_mapping_df, final_computed_df = fetch_data(conn, customer, month)
-        conn.close()
-        if not customer_mapping_df.empty and not final_computed_df.empty:
-            data_dict = prepare_data_dictionary(customer_mapping_df, final_computed_df, month)
+        data_dict = load_slide_data(customer, month)
+        if data_dict is not None:
             #output_filename = f"{customer}_{month.replace('-', '_')}.pptx"
             dt = datetime.strptime(month, "%Y-%m-%d")   # month = "2025-08-01"
             year = dt.strftime("%Y")                    # "2025"
             mon  = dt.strftime("%b")                    # "Aug"
             output_filename = f"{customer}_{year}_{mon}.pptx"
-            generate_presentation(data_dict, output_filename)
+            profile = RenderProfile() if PPT_PROFILE else None
+            cprofile_path = (os.path.join(PPT_CPROFILE_DIR, f"{customer}_{year}_{mon}.prof")
+                             if PPT_CPROFILE_DIR else None)
+            with cprofiled(cprofile_path):
+                with phase('render'):
+                    prs = render_presentation(data_dict, profile, PPT_CHART_MODE)
+                with phase('save'):
+                    prs.save(output_filename)
+            if profile:
+                logger.info('ppt render profile', extra={'fields': {'customer': customer, 'month': month,
+                                                                    'timings_ms': profile.as_dict()}})
             response = send_file(output_filename, as_attachment=True)
             @response.call_on_close
             def cleanup():
@@ -651,46 +930,105 @@ def generate_ppt():
                     if os.path.exists(output_filename):
                         os.remove(output_filename)
                 except Exception as e:
-                    print(f"Error deleting file: {e}")
+                    logger.warning('Error deleting file %s: %s', output_filename, e)
             return response
         else:
             return jsonify({'success': False, 'message': 'No data found for PPT generation'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
-def fetch_reporting_data(cur, selected_customer, selected_month, prev_months):
+@app.route('/preview_ppt', methods=['POST'])
+@login_required
+def preview_ppt():
+    """Slide data of the deck /generate_ppt would build, as JSON, without rendering a PPTX."""
+    try:
+        customer = request.form.get('customer')
+        month = request.form.get('month')
+        data_dict = load_slide_data(customer, month)
+        if data_dict is None:
+            return jsonify({'success': False, 'message': 'No data found for PPT generation'})
+        preview = build_preview(data_dict)
+        return jsonify({'success': True, 'customer': customer, 'month': month, 'preview': preview})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# Lists every reporting render shows, each as one json_agg subquery of the page query
+REPORTING_LISTS = {
+    'customers': """
+        SELECT COALESCE(json_agg(customer_name ORDER BY customer_name), '[]')
+        FROM (SELECT DISTINCT customer_name FROM final_computed_table) c
+    """,
+    'csm_list': """
+        SELECT COALESCE(json_agg(csm ORDER BY csm), '[]')
+        FROM (SELECT csm_primary AS csm FROM final_computed_table
+              UNION
+              SELECT csm_secondary AS csm FROM final_computed_table) all_csms
+        WHERE csm IS NOT NULL
+    """,
+    'available_months': """
+        SELECT COALESCE(json_agg(month ORDER BY month DESC), '[]')
+        FROM (SELECT DISTINCT TO_CHAR(month_year, 'YYYY-MM') AS month FROM final_computed_table) m
+    """,
+}
+
+
+def fetch_reporting_page(cur, selected_customer, selected_month, prev_months):
     """
-    Helper to fetch reporting rows from final_computed_table
-    for a customer + month range.
+    Fetch everything the reporting page reads from the database in one query:
+    the customer's monthly series when it is not in the window cache (the month
+    range is sliced from it), and whichever of the REPORTING_LISTS are not in the
+    page cache (or the columnar replica, when enabled). Nothing is queried when
+    both are cached.
 
     cur  : a RealDictCursor
     selected_customer : customer_name string
     selected_month    : 'YYYY-MM-DD' string (represents the end month)
     prev_months       : int number of months to go back (inclusive)
-    """
-    if not selected_customer or not selected_month:
-        return []
 
-    try:
-        # selected_month is the END month in the range
-        end_date = datetime.strptime(selected_month, '%Y-%m-%d').date()
-    except ValueError:
-        # invalid month format – return no data
-        return []
-
-    # Start date = end_date minus (prev_months - 1) months
-    start_date = end_date - relativedelta(months=prev_months - 1)
-
-    cur.execute("""
-        SELECT *
-        FROM final_computed_table 
-        WHERE customer_name = %s 
-          AND month_year BETWEEN %s AND %s
-        ORDER BY month_year
-    """, (selected_customer, start_date, end_date))
-
-    return cur.fetchall()
+    Returns (rows, lists) with lists a dict of REPORTING_LISTS names to lists.
+    """
+    snapshot = replica_snapshot()
+    if snapshot is not None:
+        lists = {'customers': snapshot.customer_names(),
+                 'csm_list': snapshot.csm_names(),
+                 'available_months': list(dict.fromkeys(m.strftime('%Y-%m') for m in snapshot.months()))}
+    else:
+        lists = {name: pages.get(name) for name in REPORTING_LISTS}
+    columns = [f"({sql}) AS {name}" for name, sql in REPORTING_LISTS.items() if lists[name] is None]
+    params = {}
 
+    end_date = None
+    if selected_customer and selected_month:
+        try:
+            # selected_month is the END month in the range
+            end_date = datetime.strptime(selected_month, '%Y-%m-%d').date()
+        except ValueError:
+            # invalid month format – return no data
+            end_date = None
+    window_parts, token = {}, None
+    if end_date:
+        params = {'customer': selected_customer}
+        window_parts, token = windows.load_parts(selected_customer)
+        columns += [f"({sql}) AS {name}" for name, sql in window_parts.items()]
+
+    fetched = {}
+    if columns:
+        cur.execute("SELECT " + ", ".join(columns), params)
+        fetched = cur.fetchone()
+    for name in REPORTING_LISTS:
+        if lists[name] is None:
+            lists[name] = fetched[name]
+            pages.put(name, lists[name])
+
+    if not end_date:
+        return [], lists
+    if window_parts:
+        series = windows.store(selected_customer, fetched, token)
+    else:
+        # cached when the query was built; read again only if it expired since
+        series = windows.series(cur.connection, selected_customer)
+    # The range is end_date and the (prev_months - 1) months before it
+    return series.rows(end_date, prev_months), lists
 
 
 @app.route('/reporting', methods=['GET', 'POST'])
@@ -698,10 +1036,10 @@ def fetch_reporting_data(cur, selected_customer, selected_month, prev_months):
 def reporting():
     """
     Reporting page:
-     - loads customers list
      - reads prev_months, selected customer/month
-     - queries final_computed_table for the date range
-     - determines no_of_envs from customer_mapping_table (fallback to latest)
+     - fetches the date range rows of final_computed_table, plus the customer, CSM
+       and month lists when not cached, in one query (fetch_reporting_page)
+     - determines no_of_envs from the configuration in force (fallback to latest)
      - converts rows into JSON-serializable dicts before rendering
     """
     # If page load is fresh (F5) – clear stored filters
@@ -719,10 +1057,6 @@ def reporting():
 
     try:
         cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT DISTINCT customer_name FROM final_computed_table ORDER BY customer_name")
-        customers = [row['customer_name'] for row in cur.fetchall()]
-
-        data = []
         if request.method == 'POST':
             selected_customer = request.form.get('customer') or None
             selected_month = request.form.get('month') or None 
@@ -740,12 +1074,9 @@ def reporting():
             selected_month = session.get('reporting_selected_month')
             prev_months = session.get('reporting_prev_months', 6)
 
-        if selected_customer and selected_month:
-            data = fetch_reporting_data(cur, selected_customer, selected_month, prev_months)
-        else:
-            data = []
+        data, lists = fetch_reporting_page(cur, selected_customer, selected_month, prev_months)
 
-        # determine no_of_envs (default 2)
+        # determine no_of_envs (default 2): configuration in force for the month, else the latest
         no_of_envs = 2
         try:
             if selected_customer:
@@ -756,38 +1087,10 @@ def reporting():
                     except Exception:
                         sel_month_date = None
 
-                if sel_month_date:
-                    cur.execute("""
-                        SELECT no_of_environments
-                        FROM customer_mapping_table
-                        WHERE customer_name = %s AND month_year = %s
-                        LIMIT 1
-                    """, (selected_customer, sel_month_date))
-                    row = cur.fetchone()
-                    if row and row.get('no_of_environments') is not None:
-                        no_of_envs = int(row.get('no_of_environments') or 2)
-                    else:
-                        cur.execute("""
-                            SELECT no_of_environments
-                            FROM customer_mapping_table
-                            WHERE customer_name = %s
-                            ORDER BY month_year DESC
-                            LIMIT 1
-                        """, (selected_customer,))
-                        row2 = cur.fetchone()
-                        if row2 and row2.get('no_of_environments') is not None:
-                            no_of_envs = int(row2.get('no_of_environments') or 2)
-                else:
-                    cur.execute("""
-                        SELECT no_of_environments
-                        FROM customer_mapping_table
-                        WHERE customer_name = %s
-                        ORDER BY month_year DESC
-                        LIMIT 1
-                    """, (selected_customer,))
-                    row_latest = cur.fetchone()
-                    if row_latest and row_latest.get('no_of_environments') is not None:
-                        no_of_envs = int(row_latest.get('no_of_environments') or 2)
+                config = ((sel_month_date and configs.resolve(conn, selected_customer, sel_month_date))
+                          or configs.resolve(conn, selected_customer))
+                if config and config.get('no_of_environments') is not None:
+                    no_of_envs = int(config.get('no_of_environments') or 2)
         except Exception:
             no_of_envs = 2
 
@@ -834,37 +1137,19 @@ def reporting():
                     d[k] = None
             data_serializable.append(d)
 
-        cur.execute("""
-            SELECT DISTINCT csm FROM (
-                SELECT csm_primary AS csm FROM final_computed_table
-                UNION
-                SELECT csm_secondary AS csm FROM final_computed_table
-            ) AS all_csms
-            WHERE csm IS NOT NULL
-            ORDER BY csm;
-        """)
-        csm_list = [row['csm'] for row in cur.fetchall()]
-
-        cur.execute("""
-            SELECT DISTINCT TO_CHAR(month_year, 'YYYY-MM') AS month
-                FROM final_computed_table
-                ORDER BY month DESC
-            """)
-        available_months = [row['month'] for row in cur.fetchall()]
-
         cur.close()
         conn.close()
 
         # pass JSON-serializable data to template
         return render_template('reporting.html',
-                               customers=customers,
+                               customers=lists['customers'],
                                data=data_serializable,
                                selected_customer=selected_customer or '',
                                selected_month=selected_month or '',
                                prev_months=prev_months,
                                no_of_envs=no_of_envs,
-                               csm_list=csm_list,
-                               available_months=available_months)
+                               csm_list=lists['csm_list'],
+                               available_months=lists['available_months'])
     except Exception as e:
         flash(f'Error: {str(e)}', 'danger')
         return render_template('reporting.html', customers=[])
@@ -873,7 +1158,7 @@ def reporting():
 @login_required
 def save_config():
     data = request.get_json()
-    print("RAW UI DATA:", data)
+    logger.debug('save_config payload', extra={'fields': {'keys': sorted(data or {})}})
 
     customer = data.get("customer")
     month = data.get("month")
@@ -930,87 +1215,79 @@ def save_config():
     new_uid = data.get("new_customer_uid", "").strip()
 
     conn = get_db_connection()
+    if not conn:
+        return {"success": False, "message": "Database connection failed."}
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    cur.execute("""
-        SELECT customer_uid
-        FROM customer_mapping_table
-        WHERE customer_name = %s AND month_year = %s
-    """, (customer, month_date))
-
-    row_uid = cur.fetchone()
-
-    if row_uid and row_uid.get("customer_uid"):
-        existing_uid_list = list(row_uid["customer_uid"])
-    else:
-        existing_uid_list = []
-
-    if new_uid:
-        existing_uid_list.append(new_uid)
-
-    uid_array = existing_uid_list  # final saved list
-
+    # One statement: the new uid is appended server-side (no read-modify-write race
+    # between concurrent saves) and final_computed_table's CSMs follow the mapping row.
     sql = """
-        UPDATE customer_mapping_table
-        SET
-            customer_full_name = %s,
-            csm_primary = %s,
-            csm_secondary = %s,
-            customer_uid = %s,
-            no_of_environments = %s,
-            no_of_months = %s,
-            color_map_thresholds_availability = %s::jsonb,
-            color_map_thresholds_users = %s::jsonb,
-            color_map_thresholds_storage = %s::jsonb,
-            indicator_color_code_rules = %s::jsonb,
-            circle_color_code_rules = %s::jsonb,
-            notes_availability = %s::jsonb,
-            notes_users = %s::jsonb,
-            notes_storage = %s::jsonb,
-            customer_note = %s
-        WHERE customer_name = %s AND month_year = %s
+        WITH saved AS (
+            UPDATE customer_mapping_table
+            SET
+                customer_full_name = %(customer_full_name)s,
+                csm_primary = %(csm_primary)s,
+                csm_secondary = %(csm_secondary)s,
+                customer_uid = CASE WHEN %(new_uid)s = '' THEN COALESCE(customer_uid, '{}')
+                                    ELSE array_append(COALESCE(customer_uid, '{}'), %(new_uid)s) END,
+                no_of_environments = %(no_of_envs)s,
+                no_of_months = %(no_of_months)s,
+                color_map_thresholds_availability = %(thr_availability)s::jsonb,
+                color_map_thresholds_users = %(thr_users)s::jsonb,
+                color_map_thresholds_storage = %(thr_storage)s::jsonb,
+                indicator_color_code_rules = %(indicator_colors)s::jsonb,
+                circle_color_code_rules = %(circle_colors)s::jsonb,
+                notes_availability = %(notes_availability)s::jsonb,
+                notes_users = %(notes_users)s::jsonb,
+                notes_storage = %(notes_storage)s::jsonb,
+                customer_note = %(customer_note)s
+            WHERE customer_name = %(customer)s AND month_year = %(month)s
+            RETURNING *
+        ), final AS (
+            UPDATE final_computed_table f
+            SET csm_primary = saved.csm_primary, csm_secondary = saved.csm_secondary
+            FROM saved
+            WHERE f.customer_name = saved.customer_name AND f.month_year = saved.month_year
+        )
+        SELECT * FROM saved
     """
 
-    values = (
-        customer_full_name,
-        data.get("csm_primary"),
-        data.get("csm_secondary"),
-        uid_array,
-        data.get("no_of_envs"),
-        data.get("no_of_months"),
-        thr_availability,
-        thr_users,
-        thr_storage,
-        indicator_colors,
-        circle_colors,
-        notes_availability,
-        notes_users,
-        notes_storage,
-        data.get("customer_note"),
-        customer,
-        month_date
-    )
-
-    sql2 = """UPDATE final_computed_table
-              SET csm_primary = %s, csm_secondary = %s
-              WHERE customer_name = %s AND month_year = %s"""
-    
-    cur.execute(sql2, (
-        data.get("csm_primary"),data.get("csm_secondary"),
-        customer, month_date))
+    values = {
+        "customer_full_name": customer_full_name,
+        "csm_primary": data.get("csm_primary"),
+        "csm_secondary": data.get("csm_secondary"),
+        "new_uid": new_uid,
+        "no_of_envs": data.get("no_of_envs"),
+        "no_of_months": data.get("no_of_months"),
+        "thr_availability": thr_availability,
+        "thr_users": thr_users,
+        "thr_storage": thr_storage,
+        "indicator_colors": indicator_colors,
+        "circle_colors": circle_colors,
+        "notes_availability": notes_availability,
+        "notes_users": notes_users,
+        "notes_storage": notes_storage,
+        "customer_note": data.get("customer_note"),
+        "customer": customer,
+        "month": month_date,
+    }
 
     try:
         cur.execute(sql, values)
+        saved = cur.fetchone()
+        if saved is None:
+            conn.rollback()
+            return {"success": False, "message": f"No configuration found for {customer} in {month_date:%Y-%m}."}
         conn.commit()
-        cur.close()
-        conn.close()
-        return {"success": True}
-
     except Exception as e:
         conn.rollback()
+        return {"success": False, "message": str(e)}
+    finally:
         cur.close()
         conn.close()
-        return {"success": False, "message": str(e)}
+
+    change_hooks.record_changed(customer, month_date, 'save_config')
+    return {"success": True, "config": json_record(saved)}
 
 
 from datetime import datetime
@@ -1056,6 +1333,7 @@ def insert_record():
             conn = get_db_connection()
             cur = conn.cursor()
 
+            # Checked in the database, not the config cache: another worker may have just created it
             cur.execute("""
                 SELECT 1 FROM customer_mapping_table WHERE customer_name = %s
             """, (customer,))
@@ -1233,6 +1511,7 @@ def insert_record():
             conn.commit()
             cur.close()
             conn.close()
+            change_hooks.record_changed(customer, month_date, 'insert_record')
 
             return jsonify({"success": True,
                             "message": "Configuration saved successfully."})
@@ -1428,6 +1707,7 @@ def insert_record():
             conn.commit()
             cur.close()
             conn.close()
+            change_hooks.record_changed(customer, month_date, 'insert_record')
 
             return jsonify({"success": True,
                             "message": "Table data inserted successfully!"})
@@ -1440,6 +1720,99 @@ def insert_record():
         return jsonify({"success": False, "message": str(e)})
 
 
+@app.route('/bulk_import', methods=['POST'])
+@login_required
+def bulk_import_records():
+    """Insert table data for many customers/months from an uploaded CSV/XLSX (see bulk_import.py).
+
+    Form fields: file, dry_run=1 (check only), partial=1 (import the valid rows even if others fail).
+    """
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'success': False, 'message': 'Choose a .csv or .xlsx file to import.'})
+    dry_run = request.form.get('dry_run') in ('1', 'true', 'on')
+    partial = request.form.get('partial') in ('1', 'true', 'on')
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'success': False, 'message': 'Database connection failed'})
+    try:
+        result = bulk_import.import_file(conn, upload.stream, upload.filename, dry_run=dry_run, partial=partial)
+    except bulk_import.ImportFileError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    except Exception as e:
+        logger.exception('bulk import failed')
+        return jsonify({'success': False, 'message': str(e)})
+    finally:
+        conn.close()
+
+    if not dry_run:
+        # One change per customer, from its first imported month on
+        first_months = {}
+        for customer, month in result.imported:
+            first_months[customer] = min(month, first_months.get(customer, month))
+        for customer, month in first_months.items():
+            change_hooks.record_changed(customer, month, 'bulk_import', propagates=True)
+
+    if result.errors and not partial:
+        message = f"{len(result.errors)} of {result.rows} rows have errors; nothing was imported."
+    elif dry_run:
+        message = f"{len(result.imported)} of {result.rows} rows can be imported."
+    else:
+        message = f"Imported {len(result.imported)} of {result.rows} rows."
+    return jsonify({
+        'success': bool(result.imported) or not result.errors,
+        'message': message,
+        'dry_run': dry_run,
+        'rows': result.rows,
+        'imported': [{'customer': c, 'month': m.strftime('%Y-%m-%d')} for c, m in result.imported],
+        'errors': result.errors,
+        'ignored_columns': result.ignored_columns,
+    })
+
+
+@app.route('/rollover', methods=['POST'])
+@login_required
+def rollover_month():
+    """Create a month for every customer, carrying forward configuration, limits and targets (see rollover.py).
+
+    Form fields: month (YYYY-MM, default: the month after the latest), config_only=1, dry_run=1.
+    """
+    try:
+        month = rollover.parse_month(request.form['month']) if request.form.get('month') else None
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    config_only = request.form.get('config_only') in ('1', 'true', 'on')
+    dry_run = request.form.get('dry_run') in ('1', 'true', 'on')
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'success': False, 'message': 'Database connection failed'})
+    try:
+        result = rollover.roll_over(conn, month, config_only=config_only, dry_run=dry_run)
+    except Exception as e:
+        logger.exception('rollover failed')
+        return jsonify({'success': False, 'message': str(e)})
+    finally:
+        conn.close()
+
+    changed = result.created['customer_mapping_table' if config_only else 'final_computed_table']
+    if not dry_run:
+        for customer in changed:
+            change_hooks.record_changed(customer, result.month, 'rollover')
+
+    verb = 'would create' if dry_run else 'created'
+    return jsonify({
+        'success': True,
+        'message': f"{result.month:%Y-%m}: {verb} rows for {len(changed)} of {len(result.customers)} customers.",
+        'month': result.month.strftime('%Y-%m-%d'),
+        'dry_run': dry_run,
+        'customers': len(result.customers),
+        'created': {table: len(names) for table, names in result.created.items()},
+        'created_customers': changed,
+    })
+
+
 @app.route('/audit_logs/latest', methods=['GET'])
 @login_required
 def audit_logs_latest():
@@ -1539,6 +1912,10 @@ def audit_logs_download():
 @app.route('/get_customers_pending_tables')
 @login_required
 def get_customers_pending_tables():
+    snapshot = replica_snapshot()
+    if snapshot is not None:
+        return jsonify({"customers": snapshot.pending_customers()})
+
     conn = get_db_connection()
     cur = conn.cursor()
 
@@ -1559,6 +1936,10 @@ def get_customers_pending_tables():
 @app.route('/get_months_pending_tables/<customer>')
 @login_required
 def get_months_pending_tables(customer):
+    snapshot = replica_snapshot()
+    if snapshot is not None:
+        return jsonify({"months": [m.strftime("%Y-%m") for m in snapshot.pending_months(customer)]})
+
     conn = get_db_connection()
     cur = conn.cursor()
 
@@ -1584,29 +1965,16 @@ def delete_record():
     """
     Delete a record from the database with proper validation and error handling
     """
-    import logging
-    
-    # Configure logger
-    if not app.logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setLevel(logging.INFO)
-        app.logger.addHandler(handler)
-        app.logger.setLevel(logging.INFO)
-    
     try:
         customer = request.form.get('customer') or ''
         month_raw = request.form.get('month') or ''
         customer = customer.strip()
 
-        print(f"\n{'='*60}")
-        print(f"[DELETE] Request received")
-        print(f"[DELETE] Customer: {customer}")
-        print(f"[DELETE] Month (raw): {month_raw}")
-        print(f"{'='*60}\n")
+        logger.info('delete requested', extra={'fields': {'customer': customer, 'month_raw': month_raw}})
 
         if not customer or not month_raw:
             msg = 'Customer and month are required.'
-            print(f"[DELETE] ERROR: {msg}")
+            logger.warning('delete rejected: %s', msg)
             return jsonify({'success': False, 'message': msg}), 400
 
         # --- Normalize month value robustly to a date (first day of month) ---
@@ -1648,73 +2016,46 @@ def delete_record():
 
         except Exception as e:
             msg = f'Invalid month format: {str(e)}'
-            print(f"[DELETE] ERROR: {msg}")
+            logger.warning('delete rejected: %s', msg)
             return jsonify({'success': False, 'message': msg}), 400
         # --- end normalization ---
 
 
-        print(f"[DELETE] Normalized month: {month_date}")
-
         # Get DB connection with detailed error handling
         conn = get_db_connection()
         if not conn:
-            print("[DELETE] CRITICAL: Database connection failed!")
-            print(f"[DELETE] Session username: {session.get('username', 'NOT SET')}")
-            print(f"[DELETE] DB Config: {DB_CONFIG}")
+            logger.error('delete failed: database connection failed')
             return jsonify({'success': False, 'message': 'Database connection failed. Please check your session or re-login.'}), 500
 
-        print("[DELETE] Database connection successful")
-
         try:
             cur = conn.cursor()
 
-            # First, let's check what data exists for this customer
-            print(f"\n[DELETE] Checking all records for customer '{customer}':")
+            # Check if the specific record exists (in the database: the record cache only serves reads)
             cur.execute("""
-                SELECT customer_name, month_year::text 
-                FROM final_computed_table 
-                WHERE customer_name = %s
-                ORDER BY month_year
-            """, (customer,))
-            all_records = cur.fetchall()
-            print(f"[DELETE] Found {len(all_records)} total records for this customer:")
-            for rec in all_records:
-                print(f"  - {rec[0]}: {rec[1]}")
-
-            # Check if the specific record exists
-            check_query = """
-                SELECT customer_name, month_year::text 
-                FROM final_computed_table
-                WHERE customer_name = %s AND month_year = %s
-            """
-            print(f"\n[DELETE] Checking existence with query:")
-            print(f"  SQL: {check_query}")
-            print(f"  Params: customer='{customer}', month='{month_date}'")
-            
-            cur.execute(check_query, (customer, month_date))
-            found_record = cur.fetchone()
-            
-            if found_record:
-                print(f"[DELETE] ✓ Record EXISTS: {found_record[0]} - {found_record[1]}")
-            else:
-                print(f"[DELETE] ✗ Record NOT FOUND")
-                print(f"[DELETE] Looking for exact match: customer='{customer}', month='{month_date}'")
-                
-                # Try alternative formats
-                print(f"\n[DELETE] Trying alternative date formats...")
-                
-                # Try YYYY-MM-DD
+                SELECT 1 FROM final_computed_table WHERE customer_name = %s AND month_year = %s
+            """, (customer, month_date))
+            if cur.fetchone() is None:
+                logger.info('delete: record not found', extra={'fields': {'customer': customer, 'month': str(month_date)}})
+
+                # List what data exists for this customer
                 cur.execute("""
-                    SELECT customer_name, month_year::text 
+                    SELECT customer_name, month_year::text
                     FROM final_computed_table
-                    WHERE customer_name = %s AND month_year::text = %s
-                """, (customer, month_date))
-                alt_result = cur.fetchone()
-                
-                if alt_result:
-                    print(f"[DELETE] Found with string comparison: {alt_result}")
-                else:
-                    print(f"[DELETE] Still not found with string comparison")
+                    WHERE customer_name = %s
+                    ORDER BY month_year
+                """, (customer,))
+                all_records = cur.fetchall()
+                logger.debug('delete: %d existing record(s) for customer', len(all_records),
+                             extra={'fields': {'customer': customer, 'months': [r[1] for r in all_records]}})
+
+                # Diagnostic only: try a string comparison on the date column
+                if logger.isEnabledFor(logging.DEBUG):
+                    cur.execute("""
+                        SELECT customer_name, month_year::text 
+                        FROM final_computed_table
+                        WHERE customer_name = %s AND month_year::text = %s
+                    """, (customer, month_date))
+                    logger.debug('delete: string comparison match: %s', cur.fetchone())
                 
                 cur.close()
                 conn.close()
@@ -1723,9 +2064,7 @@ def delete_record():
                     'message': f'Record for {customer} - {month_date} not found. Available dates: {[r[1] for r in all_records]}'
                 }), 404
 
-                        # If we reach here, record exists - proceed with deletion
-            print(f"\n[DELETE] Proceeding with deletion.")
-            
+            # If we reach here, record exists - proceed with deletion
             deleted_counts = {}
             delete_statements = [
                 ("final_computed_table", "DELETE FROM final_computed_table WHERE customer_name = %s AND month_year = %s"),
@@ -1739,24 +2078,21 @@ def delete_record():
 
             for table_name, stmt in delete_statements:
                 try:
-                    print(f"[DELETE] Deleting from {table_name}.")
                     cur.execute(stmt, (customer, month_date))
                     rows_deleted = cur.rowcount if cur.rowcount is not None else 0
                     deleted_counts[table_name] = rows_deleted
-                    print(f"[DELETE]   ✓ Deleted {rows_deleted} row(s) from {table_name}")
                 except Exception as table_err:
-                    print(f"[DELETE]   ✗ Error deleting from {table_name}: {table_err}")
+                    logger.error('delete: error deleting from %s: %s', table_name, table_err)
                     deleted_counts[table_name] = f"Error: {str(table_err)}"
 
             # Commit the transaction
             conn.commit()
-            print(f"\n[DELETE] ✓ Transaction committed successfully")
-            
             cur.close()
             conn.close()
+            change_hooks.record_changed(customer, month_date, 'delete_record')
 
-            print(f"[DELETE] Deletion summary: {deleted_counts}")
-            print(f"{'='*60}\n")
+            logger.info('delete committed', extra={'fields': {'customer': customer, 'month': str(month_date),
+                                                              'deleted_counts': deleted_counts}})
 
             # --- NEW: ensure something was actually deleted ---
             total_deleted = 0
@@ -1785,10 +2121,7 @@ def delete_record():
 
 
         except psycopg2.Error as db_err:
-            print(f"\n[DELETE] ✗ Database error: {db_err}")
-            print(f"[DELETE] Error type: {type(db_err).__name__}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('delete: database error')
             
             try:
                 conn.rollback()
@@ -1800,10 +2133,7 @@ def delete_record():
             return jsonify({'success': False, 'message': f'Database error: {str(db_err)}'}), 500
 
     except Exception as e:
-        print(f"\n[DELETE] ✗ Unexpected error: {e}")
-        print(f"[DELETE] Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('delete: unexpected error')
         return jsonify({'success': False, 'message': f'Server error: {str(e)}'}), 500
 
 
@@ -1824,30 +2154,21 @@ def check_record_exists():
         except ValueError:
             return jsonify({'success': False, 'exists': False, 'message': 'Invalid date format'})
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'success': False, 'exists': False, 'message': 'Database connection failed'})
-        
-        cur = conn.cursor()
-        
-        # Check if record exists in final_computed_table
-        cur.execute("""
-            SELECT COUNT(*) FROM final_computed_table 
-            WHERE customer_name = %s AND month_year = %s
-        """, (customer, month_date))
-        
-        count = cur.fetchone()[0]
-        exists = count > 0
-        
-        cur.close()
-        conn.close()
-        
-        return jsonify({'success': True, 'exists': exists})
+        # Check if record exists in final_computed_table (cached rows need no connection)
+        hit, record = records.cached(customer, month_date)
+        if not hit:
+            conn = get_db_connection()
+            if not conn:
+                return jsonify({'success': False, 'exists': False, 'message': 'Database connection failed'})
+            try:
+                record = records.get(conn, customer, month_date)
+            finally:
+                conn.close()
+
+        return jsonify({'success': True, 'exists': record is not None})
         
     except Exception as e:
-        print(f"Error in check_record_exists: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Error in check_record_exists')
         return jsonify({'success': False, 'exists': False, 'message': str(e)})
 
 @app.route('/attach_comment', methods=['POST'])
@@ -1969,6 +2290,11 @@ def get_months_for_csm():
     data = request.get_json()
     csm = data.get("csm")
 
+    snapshot = replica_snapshot()
+    if snapshot is not None:
+        months = list(dict.fromkeys(m.strftime('%Y-%m') for m in snapshot.csm_months(csm)))
+        return jsonify({"success": True, "months": months})
+
     conn = get_db_connection()
     cur = conn.cursor()
 
@@ -1986,6 +2312,20 @@ def get_months_for_csm():
 
     return jsonify({"success": True, "months": months})
 
+# Only the columns the CSM table on reporting.html renders. Its P-detail keys (p1_opened etc.) are not
+# final_computed_table columns, so those cells stay empty, as they were with SELECT *.
+CSM_MULTI_MONTH_COLUMNS = """
+    customer_name, month_year, csm_primary, csm_secondary,
+    updated_availability, updated_target,
+    updated_prod_limit, updated_prod_used, updated_test_limit, updated_test_used,
+    updated_prod_target_storage_gb, updated_prod_storage_gb,
+    updated_test_target_storage_gb, updated_test_storage_gb,
+    updated_current_opened_tickets, updated_current_closed_tickets,
+    updated_current_backlog_tickets, updated_tickets_backlog
+"""
+# The same as (column, key) pairs for the columnar replica
+CSM_MULTI_MONTH_FIELDS = [(name.strip(), name.strip()) for name in CSM_MULTI_MONTH_COLUMNS.split(',')]
+
 @app.route("/load_multi_month_csm_data", methods=["POST"])
 @login_required
 def load_multi_month_csm_data():
@@ -2001,11 +2341,16 @@ def load_multi_month_csm_data():
     range_start = start_date - relativedelta(months=num_months - 1)
     range_end = start_date
 
+    snapshot = replica_snapshot()
+    if snapshot is not None:
+        json_rows = snapshot.csm_rows(csm, range_start, range_end, CSM_MULTI_MONTH_FIELDS)
+        return jsonify({"success": True, "data": json_rows})
+
     conn = get_db_connection()
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT *
+    cur.execute(f"""
+        SELECT {CSM_MULTI_MONTH_COLUMNS}
         FROM final_computed_table
         WHERE (csm_primary = %s OR csm_secondary = %s)
           AND month_year BETWEEN %s AND %s
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import re
+import threading
+
+from flask import abort, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+ONE_YEAR = 365 * 24 * 3600
+HASH_LENGTH = 12
+_FINGERPRINTED = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<ext>\.[A-Za-z0-9]+)$' % HASH_LENGTH)
+
+
+class AssetManifest:
+    """Content-hash fingerprints for files under a static folder.
+
+    fingerprint('js/metrics.js') -> 'js/metrics.<sha256 prefix>.js'. Digests are cached
+    per file and recomputed when its mtime or size changes, so an edited file gets a new
+    URL without a restart.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._digests = {}  # filename -> (mtime_ns, size, digest)
+
+    def digest(self, filename):
+        st = os.stat(os.path.join(self.root, filename))
+        with self._lock:
+            cached = self._digests.get(filename)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        with open(os.path.join(self.root, filename), 'rb') as fh:
+            digest = hashlib.sha256(fh.read()).hexdigest()[:HASH_LENGTH]
+        with self._lock:
+            self._digests[filename] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def fingerprint(self, filename):
+        stem, ext = os.path.splitext(filename)
+        return f'{stem}.{self.digest(filename)}{ext}'
+
+    def resolve(self, fingerprinted):
+        """(real filename, whether the digest is current) for a fingerprinted name; (None, False) if not one."""
+        match = _FINGERPRINTED.match(fingerprinted)
+        if not match:
+            return None, False
+        filename = match.group('stem') + match.group('ext')
+        if safe_join(self.root, filename) is None:
+            return None, False
+        try:
+            return filename, self.digest(filename) == match.group('digest')
+        except OSError:
+            return None, False
+
+
+def init_app(app):
+    """Serve static/ files under content-hashed /assets/ URLs and add the asset_url() template helper.
+
+    A current fingerprint is cached for a year as immutable. A stale one (a page rendered
+    before a deploy) still gets the current file, but without long-term caching.
+    """
+    manifest = AssetManifest(app.static_folder)
+
+    @app.template_global()
+    def asset_url(filename):
+        return url_for('asset', filename=manifest.fingerprint(filename))
+
+    @app.route('/assets/<path:filename>')
+    def asset(filename):
+        real, current = manifest.resolve(filename)
+        if real is None:
+            abort(404)
+        response = send_from_directory(app.static_folder, real, max_age=ONE_YEAR if current else 0)
+        if current:
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
+
+    return manifest
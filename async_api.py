@@ -0,0 +1,358 @@
+"""
+Async (ASGI) variant of the read-only dropdown and poll endpoints, served next to the Flask app.
+
+    uvicorn async_api:app --host 0.0.0.0 --port 5001
+
+Route the paths in ROUTES to it from the reverse proxy and leave everything else on Flask.
+Requests are awaited on asyncpg pools instead of holding a WSGI worker, so a burst of
+dropdown/poll requests can't starve the page and save endpoints.
+
+Responses are identical to the Flask views: the same SQL, the same session (read from the
+server-side session store, so CSM_SESSION_BACKEND=cookie is not supported) and the same
+JSON encoding (Flask's own provider). Needs starlette, asyncpg and an ASGI server such as uvicorn.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import asyncpg
+from dateutil.relativedelta import relativedelta
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import RedirectResponse, Response
+from starlette.routing import Route
+from werkzeug.formparser import FormDataParser
+from werkzeug.http import parse_options_header
+
+import compression
+import server_sessions
+from app import app as flask_app, DB_CONFIG, ACTIVITY_GRANULARITY, CSM_MULTI_MONTH_COLUMNS
+from request_logging import get_logger
+
+logger = get_logger('async_api')
+
+SESSION_TIMEOUT = timedelta(minutes=30)
+POOL_MAX_SIZE = int(os.environ.get('CSM_ASYNC_POOL_MAX', 10))
+POOL_IDLE_TIMEOUT = float(os.environ.get('CSM_DB_POOL_IDLE_TIMEOUT', 300))
+
+session_interface = flask_app.session_interface
+if not isinstance(session_interface, server_sessions.ServerSessionInterface):
+    raise RuntimeError('async_api needs the server-side session backend (CSM_SESSION_BACKEND=server)')
+
+
+class UserPools:
+    """One asyncpg pool per user, opened with that user's credentials (see db_pool.UserConnectionPool).
+
+    Keyed by username plus an HMAC of the password. Pools start empty and close
+    connections idle for longer than `idle_timeout` seconds.
+    """
+
+    def __init__(self, connect_kwargs, max_size=POOL_MAX_SIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.connect_kwargs = connect_kwargs
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._secret = os.urandom(32)
+        self._pools = {}
+        self._lock = asyncio.Lock()
+
+    def _key(self, username, password):
+        digest = hmac.new(self._secret, (password or '').encode('utf-8'), hashlib.sha256).hexdigest()
+        return username, digest
+
+    async def get(self, username, password):
+        key = self._key(username, password)
+        pool = self._pools.get(key)
+        if pool is None:
+            async with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = await asyncpg.create_pool(
+                        user=username, password=password, database=self.connect_kwargs['dbname'],
+                        host=self.connect_kwargs['host'], port=int(self.connect_kwargs['port']),
+                        min_size=0, max_size=self.max_size,
+                        max_inactive_connection_lifetime=self.idle_timeout, init=_init_connection)
+                    self._pools[key] = pool
+        return pool
+
+    async def close(self):
+        pools, self._pools = list(self._pools.values()), {}
+        await asyncio.gather(*(pool.close() for pool in pools), return_exceptions=True)
+
+
+async def _init_connection(conn):
+    # psycopg2 decodes json/jsonb columns; asyncpg returns them as text unless told otherwise
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+
+pools = UserPools(DB_CONFIG)
+
+
+@asynccontextmanager
+async def db_connection(user):
+    """Yield a pooled connection for the session user, or None if connecting fails (like get_db_connection)."""
+    try:
+        pool = await pools.get(*user)
+        conn = await pool.acquire()
+    except (asyncpg.PostgresError, OSError) as e:
+        logger.error('Error connecting to PostgreSQL: %s', e)
+        conn = None
+    if conn is None:
+        yield None
+        return
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+
+def jsonify(obj, status_code=200):
+    """JSON response encoded exactly like flask.jsonify."""
+    body = flask_app.json.dumps(obj, indent=None, separators=(',', ':')) + '\n'
+    return Response(body, status_code=status_code, media_type='application/json')
+
+
+def _resolve_session(cookie_value):
+    """Check the session behind a cookie the way before_request_handler/login_required do.
+
+    Returns (sid, credentials or None, bump last_activity?). Runs in a worker thread (SQLite I/O).
+    """
+    sid = session_interface.unsign_sid(flask_app, cookie_value) if cookie_value else None
+    loaded = session_interface.store.load(sid) if sid else None
+    if loaded is None:
+        return None, None, False
+    data = session_interface.serializer.loads(loaded[0])
+    if 'username' not in data:
+        _flash(sid, data, 'Session Time out. Please log in to access this page.')
+        return sid, None, False
+
+    now = datetime.now()
+    last_activity = data.get('last_activity')
+    if isinstance(last_activity, str):
+        last_activity = datetime.fromisoformat(last_activity)
+    if last_activity and now - last_activity > SESSION_TIMEOUT:
+        _flash(sid, {}, 'Your session has expired due to inactivity. Please log in again.')
+        return sid, None, False
+
+    bumped = not last_activity or now - last_activity >= ACTIVITY_GRANULARITY
+    if bumped:
+        data['last_activity'] = now.isoformat()
+        _save(sid, data)
+    return sid, (data['username'], data.get('password')), bumped
+
+
+def _flash(sid, data, message):
+    data.setdefault('_flashes', []).append(('warning', message))
+    _save(sid, data)
+
+
+def _save(sid, data):
+    lifetime = flask_app.permanent_session_lifetime.total_seconds()
+    session_interface.store.save(sid, session_interface.serializer.dumps(data), time.time() + lifetime)
+
+
+def _refresh_cookie(response, sid):
+    """Re-send the session cookie with a new expiry, as Flask does whenever it saves the session."""
+    response.set_cookie(
+        session_interface.get_cookie_name(flask_app),
+        session_interface._signer(flask_app).sign(sid).decode('ascii'),
+        expires=session_interface.get_expiration_time(flask_app, _PermanentSession()),
+        path=session_interface.get_cookie_path(flask_app),
+        domain=session_interface.get_cookie_domain(flask_app),
+        secure=session_interface.get_cookie_secure(flask_app),
+        httponly=session_interface.get_cookie_httponly(flask_app),
+        samesite=session_interface.get_cookie_samesite(flask_app))
+    response.headers.append('Vary', 'Cookie')
+
+
+class _PermanentSession:
+    permanent = True
+
+
+def login_required(view):
+    """Async counterpart of app.login_required; passes (username, password) to the view."""
+
+    async def endpoint(request):
+        cookie_value = request.cookies.get(session_interface.get_cookie_name(flask_app))
+        sid, user, bumped = await run_in_threadpool(_resolve_session, cookie_value)
+        if user is None:
+            return RedirectResponse('/login', status_code=302)
+        response = await view(request, user)
+        if bumped:
+            _refresh_cookie(response, sid)
+        return response
+
+    return endpoint
+
+
+@login_required
+async def get_months(request, user):
+    customer = request.path_params['customer']
+    async with db_connection(user) as conn:
+        if conn is None:
+            return jsonify([])
+        try:
+            rows = await conn.fetch("""
+                SELECT DISTINCT month_year
+                FROM final_computed_table
+                WHERE customer_name = $1
+                ORDER BY month_year DESC
+            """, customer)
+        except Exception:
+            return jsonify([])
+    return jsonify([row['month_year'].strftime('%Y-%m-%d') for row in rows])
+
+
+@login_required
+async def get_months_for_csm(request, user):
+    data = await request.json()
+    csm = data.get('csm')
+    async with db_connection(user) as conn:
+        rows = await conn.fetch("""
+            SELECT DISTINCT TO_CHAR(date_trunc('month', month_year), 'YYYY-MM')
+            FROM final_computed_table
+            WHERE csm_primary = $1 OR csm_secondary = $1
+            ORDER BY 1;
+        """, csm)
+    return jsonify({'success': True, 'months': [row[0] for row in rows]})
+
+
+@login_required
+async def load_multi_month_csm_data(request, user):
+    data = await request.json()
+    csm = data.get('csm')
+    start_date = datetime.strptime(data.get('start_month'), '%Y-%m-%d').date()
+    num_months = int(data.get('num_months'))
+
+    # BACKWARD RANGE
+    range_start = start_date - relativedelta(months=num_months - 1)
+    async with db_connection(user) as conn:
+        rows = await conn.fetch(f"""
+            SELECT {CSM_MULTI_MONTH_COLUMNS}
+            FROM final_computed_table
+            WHERE (csm_primary = $1 OR csm_secondary = $1)
+              AND month_year BETWEEN $2 AND $3
+            ORDER BY customer_name, month_year DESC;
+        """, csm, range_start, start_date)
+    return jsonify({'success': True, 'data': [dict(row) for row in rows]})
+
+
+@login_required
+async def audit_logs_latest(request, user):
+    async with db_connection(user) as conn:
+        if conn is None:
+            return jsonify({'success': False, 'message': 'Database connection failed'}, 500)
+        try:
+            rows = await conn.fetch("""
+                SELECT
+                    audit_id,
+                    table_name,
+                    operation_type,
+                    changed_at,
+                    username,
+                    old_data,
+                    new_data,
+                    section_name,
+                    comment
+                FROM audit_logs
+                ORDER BY changed_at DESC
+                LIMIT 10;
+            """)
+        except Exception as e:
+            return jsonify({'success': False, 'message': str(e)}, 500)
+    return jsonify({'success': True, 'rows': [dict(row) for row in rows]})
+
+
+@login_required
+async def get_customers_pending_tables(request, user):
+    async with db_connection(user) as conn:
+        rows = await conn.fetch("""
+            SELECT DISTINCT cm.customer_name
+            FROM customer_mapping_table cm
+            WHERE (cm.customer_name, cm.month_year)
+                  NOT IN (SELECT customer_name, month_year FROM final_computed_table)
+            ORDER BY cm.customer_name
+        """)
+    return jsonify({'customers': [row[0] for row in rows]})
+
+
+@login_required
+async def get_months_pending_tables(request, user):
+    customer = request.path_params['customer']
+    async with db_connection(user) as conn:
+        rows = await conn.fetch("""
+            SELECT cm.month_year
+            FROM customer_mapping_table cm
+            WHERE cm.customer_name = $1
+              AND (cm.customer_name, cm.month_year)
+                  NOT IN (SELECT customer_name, month_year FROM final_computed_table)
+            ORDER BY cm.month_year
+        """, customer)
+    return jsonify({'months': [row[0].strftime('%Y-%m') for row in rows]})
+
+
+async def _form(request):
+    """Parse a urlencoded or multipart body with werkzeug, as Flask's request.form does."""
+    body = await request.body()
+    mimetype, options = parse_options_header(request.headers.get('content-type', ''))
+    _, form, _ = FormDataParser().parse(BytesIO(body), mimetype, len(body), options)
+    return form
+
+
+@login_required
+async def check_record_exists(request, user):
+    """Check if a record already exists for a given customer and month."""
+    try:
+        form = await _form(request)
+        customer = form.get('customer', '').strip()
+        month_str = form.get('month', '').strip()
+
+        if not customer or not month_str:
+            return jsonify({'success': False, 'exists': False, 'message': 'Customer and month are required'})
+
+        try:
+            month_date = datetime.strptime(month_str, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'success': False, 'exists': False, 'message': 'Invalid date format'})
+
+        async with db_connection(user) as conn:
+            if conn is None:
+                return jsonify({'success': False, 'exists': False, 'message': 'Database connection failed'})
+            count = await conn.fetchval("""
+                SELECT COUNT(*) FROM final_computed_table
+                WHERE customer_name = $1 AND month_year = $2
+            """, customer, month_date)
+        return jsonify({'success': True, 'exists': count > 0})
+
+    except Exception as e:
+        logger.exception('Error in check_record_exists')
+        return jsonify({'success': False, 'exists': False, 'message': str(e)})
+
+
+ROUTES = [
+    Route('/get_months/{customer}', get_months),
+    Route('/get_months_for_csm', get_months_for_csm, methods=['POST']),
+    Route('/load_multi_month_csm_data', load_multi_month_csm_data, methods=['POST']),
+    Route('/audit_logs/latest', audit_logs_latest),
+    Route('/get_customers_pending_tables', get_customers_pending_tables),
+    Route('/get_months_pending_tables/{customer}', get_months_pending_tables),
+    Route('/check_record_exists', check_record_exists, methods=['POST']),
+]
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await pools.close()
+
+
+app = Starlette(routes=ROUTES, lifespan=lifespan,
+                middleware=[Middleware(GZipMiddleware, minimum_size=compression.MIN_SIZE)])
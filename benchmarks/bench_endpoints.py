@@ -0,0 +1,179 @@
+"""
+Drive the real Flask endpoints against a seeded local PostgreSQL and report
+p50/p95 latency, SQL statements per request and memory.
+
+    python benchmarks/bench_endpoints.py --db-name csm_bench --db-host localhost \
+        --db-user postgres --db-password postgres --seed --customers 200 --iterations 50
+
+Connection settings are passed to app.py through the CSM_DB_* environment
+variables; the login credentials are placed in the test client's session the
+same way /login would.
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SQL_COUNT_RE = re.compile(r'sql;dur=[0-9.]+;desc="(\d+) queries"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-name', default='csm_bench')
+    parser.add_argument('--db-host', default='localhost')
+    parser.add_argument('--db-port', default='5432')
+    parser.add_argument('--db-user', default=os.environ.get('PGUSER', 'postgres'))
+    parser.add_argument('--db-password', default=os.environ.get('PGPASSWORD', ''))
+    parser.add_argument('--seed', action='store_true', help='(re)seed the database before running')
+    parser.add_argument('--customers', type=int, default=50)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--audit-rows', type=int, default=5000)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--only', nargs='*', help='run only these case names')
+    parser.add_argument('--accept-encoding', help="send this Accept-Encoding header (e.g. 'gzip, br')")
+    parser.add_argument('--json', dest='json_path', help='also write results to this JSON file')
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[idx]
+
+
+def _reports_failure(resp):
+    """JSON endpoints signal errors with {'success': False} and a 200 status."""
+    if not resp.is_json:
+        return False
+    payload = resp.get_json(silent=True)
+    return isinstance(payload, dict) and payload.get('success') is False
+
+
+def build_cases(customers, csms, end_month):
+    """Return (name, callable(client, i)) pairs; `i` rotates through customers."""
+    def pick(i):
+        return customers[i % len(customers)]
+
+    def csm(i):
+        return csms[i % len(csms)]
+
+    return [
+        ('POST /metrics', lambda c, i: c.post('/metrics', data={'customer': pick(i), 'month': end_month})),
+        ('POST /reporting', lambda c, i: c.post('/reporting', data={'customer': pick(i), 'month': end_month,
+                                                                  'prev_months': 12})),
+        ('GET /get_months', lambda c, i: c.get(f'/get_months/{pick(i)}')),
+        ('POST /load_multi_month_csm_data', lambda c, i: c.post('/load_multi_month_csm_data', json={
+            'csm': csm(i), 'start_month': end_month, 'num_months': 6})),
+        ('GET /audit_logs/download', lambda c, i: c.get('/audit_logs/download')),
+        ('POST /preview_ppt', lambda c, i: c.post('/preview_ppt', data={'customer': pick(i), 'month': end_month})),
+        ('POST /generate_ppt', lambda c, i: c.post('/generate_ppt', data={'customer': pick(i), 'month': end_month})),
+    ]
+
+
+def run_case(client, func, iterations):
+    latencies, sql_counts, sizes, errors = [], [], [], 0
+    for i in range(iterations):
+        started = time.perf_counter()
+        resp = func(client, i)
+        sizes.append(len(resp.get_data()))
+        elapsed = (time.perf_counter() - started) * 1000
+        resp.close()
+        latencies.append(elapsed)
+        match = SQL_COUNT_RE.search(resp.headers.get('Server-Timing', ''))
+        sql_counts.append(int(match.group(1)) if match else 0)
+        if resp.status_code >= 400 or _reports_failure(resp):
+            errors += 1
+
+    # One extra traced call for allocation peak (kept out of the latency samples)
+    tracemalloc.start()
+    func(client, 0).close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'queries_per_request': round(statistics.fmean(sql_counts), 2),
+        'body_kb': round(statistics.fmean(sizes) / 1024, 1),
+        'peak_alloc_kb': round(peak / 1024, 1),
+        'errors': errors,
+    }
+
+
+def main():
+    args = parse_args()
+    os.environ['CSM_DB_NAME'] = args.db_name
+    os.environ['CSM_DB_HOST'] = args.db_host
+    os.environ['CSM_DB_PORT'] = str(args.db_port)
+    os.environ.setdefault('CSM_LOG_LEVEL', 'WARNING')
+    # fetch_data hands a raw psycopg2 connection to pandas; the warning would drown the report
+    warnings.filterwarnings('ignore', message='pandas only supports SQLAlchemy')
+
+    dsn = f"dbname={args.db_name} host={args.db_host} port={args.db_port} user={args.db_user}"
+    if args.db_password:
+        dsn += f" password={args.db_password}"
+
+    if args.seed:
+        from benchmarks.seed import seed
+        counts = seed(dsn, args.customers, args.months, args.audit_rows)
+        print('seeded: ' + ', '.join(f'{t}={n}' for t, n in counts.items()))
+
+    import psycopg2
+    conn = psycopg2.connect(dsn)
+    cur = conn.cursor()
+    cur.execute("SELECT MAX(month_year) FROM final_computed_table")
+    end_month = cur.fetchone()[0]
+    cur.execute("SELECT DISTINCT customer_name FROM final_computed_table ORDER BY 1")
+    customers = [r[0] for r in cur.fetchall()]
+    cur.execute("SELECT DISTINCT csm_primary FROM final_computed_table WHERE csm_primary IS NOT NULL ORDER BY 1")
+    csms = [r[0] for r in cur.fetchall()]
+    cur.close()
+    conn.close()
+    if not customers:
+        sys.exit('No data in final_computed_table; run with --seed first.')
+
+    import app as app_module
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = args.db_user
+        sess['password'] = args.db_password
+        sess['last_activity'] = app_module.datetime.now().isoformat()
+    if args.accept_encoding:
+        client.environ_base['HTTP_ACCEPT_ENCODING'] = args.accept_encoding
+
+    results = {}
+    for name, func in build_cases(customers, csms, end_month.strftime('%Y-%m-%d')):
+        if args.only and name not in args.only and name.split()[-1] not in args.only:
+            continue
+        func(client, 0).close()  # warm-up (template compile, imports)
+        results[name] = run_case(client, func, args.iterations)
+
+    header = f"{'endpoint':<36}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}{'body KB':>10}{'peak KB':>10}{'errors':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        print(f"{name:<36}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['queries_per_request']:>10}"
+              f"{r['body_kb']:>10}{r['peak_alloc_kb']:>10}{r['errors']:>8}")
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"max RSS: {max_rss_mb:.1f} MB  ({len(customers)} customers, end month {end_month})")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as fh:
+            json.dump({'max_rss_mb': round(max_rss_mb, 1), 'endpoints': results}, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
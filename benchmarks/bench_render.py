@@ -0,0 +1,104 @@
+"""
+Render N decks from a recorded prepare_data_dictionary output, with no database.
+
+    python benchmarks/bench_render.py -n 20                      # both bundled fixtures
+    python benchmarks/bench_render.py -n 20 --data my_deck.json --profile
+    python benchmarks/bench_render.py -n 5 --cprofile /tmp/prof  # one .prof per deck
+    python benchmarks/bench_render.py -n 20 --chart-mode fast     # chart XML caches only, no workbooks
+
+Record a fixture from a live database (e.g. one seeded by seed.py):
+
+    python benchmarks/bench_render.py --record benchmarks/fixtures/deck_6m.json \
+        --dsn "dbname=csm_bench host=localhost" --customer cust0001 --month 2025-08-01
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ppt_generator import (CHART_MODES, RenderProfile, fetch_data, generate_presentation,  # noqa: E402
+                           prepare_data_dictionary, serialize_data_dictionary)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def record(path, dsn, customer, month):
+    import psycopg2
+    warnings.filterwarnings('ignore', message='pandas only supports SQLAlchemy')
+    conn = psycopg2.connect(dsn)
+    try:
+        customer_mapping_df, final_computed_df = fetch_data(conn, customer, month)
+    finally:
+        conn.close()
+    data = prepare_data_dictionary(customer_mapping_df, final_computed_df, month)
+    with open(path, 'w') as fh:
+        json.dump(serialize_data_dictionary(data), fh, indent=2)
+    print(f"recorded {customer} {month} -> {path}")
+
+
+def bench(data_path, decks, profile, cprofile_dir, out_dir, chart_mode='full'):
+    with open(data_path) as fh:
+        data = json.load(fh)
+    name = os.path.splitext(os.path.basename(data_path))[0]
+    totals, per_label = [], {}
+
+    for i in range(decks):
+        prof = RenderProfile() if profile else None
+        cprofile_path = (os.path.join(cprofile_dir, f"{name}_{chart_mode}_{i:03d}.prof")
+                         if cprofile_dir else None)
+        started = time.perf_counter()
+        generate_presentation(data, os.path.join(out_dir, f"{name}_{i:03d}.pptx"), profile=prof,
+                              cprofile_path=cprofile_path, chart_mode=chart_mode)
+        totals.append((time.perf_counter() - started) * 1000)
+        if prof:
+            for label, ms in prof.as_dict().items():
+                per_label.setdefault(label, []).append(ms)
+
+    months = len(data['slide2']['Production_Availability_Chart']['Months'])
+    print(f"{name} [{chart_mode}]: {decks} decks, {months} months  "
+          f"mean {statistics.fmean(totals):.1f} ms  median {statistics.median(totals):.1f} ms  "
+          f"min {min(totals):.1f} ms")
+    for label, values in per_label.items():
+        print(f"    {label:<44}{statistics.fmean(values):>9.2f} ms")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--decks', type=int, default=10)
+    parser.add_argument('--data', nargs='*', help='recorded data dictionaries (default: fixtures/*.json)')
+    parser.add_argument('--profile', action='store_true', help='print per-slide and per-chart/table timings')
+    parser.add_argument('--cprofile', metavar='DIR', help='write one cProfile .prof file per deck into DIR')
+    parser.add_argument('--chart-mode', nargs='+', choices=CHART_MODES, default=list(CHART_MODES),
+                        help='chart fill mode(s) to benchmark (default: all)')
+    parser.add_argument('--record', metavar='PATH', help='record a fixture from --dsn instead of benchmarking')
+    parser.add_argument('--dsn')
+    parser.add_argument('--customer')
+    parser.add_argument('--month')
+    args = parser.parse_args()
+
+    if args.record:
+        if not (args.dsn and args.customer and args.month):
+            parser.error('--record needs --dsn, --customer and --month')
+        record(args.record, args.dsn, args.customer, args.month)
+        return
+
+    if args.cprofile:
+        os.makedirs(args.cprofile, exist_ok=True)
+    paths = args.data or sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.json')))
+    with tempfile.TemporaryDirectory() as out_dir:
+        for path in paths:
+            for chart_mode in args.chart_mode:
+                bench(path, args.decks, args.profile, args.cprofile, out_dir, chart_mode)
+
+
+if __name__ == '__main__':
+    main()
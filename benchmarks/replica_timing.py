@@ -0,0 +1,119 @@
+"""
+Time the endpoints the columnar replica (columnar_replica.py) serves, through SQL and
+through the replica.
+
+    python benchmarks/replica_timing.py --db-name csm_bench --db-host localhost \
+        --db-user postgres --db-password postgres
+
+Prints the replica's load time, then the median latency of one request per endpoint with
+the replica disabled (the SQL path) and enabled. Reads only. That both paths return the
+same responses is checked by tests/test_columnar_replica.py.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-name', default='csm_bench')
+    parser.add_argument('--db-host', default='localhost')
+    parser.add_argument('--db-port', default='5432')
+    parser.add_argument('--db-user', default=os.environ.get('PGUSER', 'postgres'))
+    parser.add_argument('--db-password', default=os.environ.get('PGPASSWORD', ''))
+    parser.add_argument('--iterations', type=int, default=20, help='timed requests per endpoint')
+    return parser.parse_args()
+
+
+def build_requests(customers, csms, end_month):
+    """(name, (method, path, json body)) for the replica-served requests; the first of each name is timed."""
+    requests = [('pending customers', ('GET', '/get_customers_pending_tables', None)),
+                ('reporting lists', ('GET', '/reporting?reload=1', None))]
+    for customer in customers + ['no-such-customer']:
+        requests.append(('months', ('GET', f'/get_months/{customer}', None)))
+        requests.append(('pending months', ('GET', f'/get_months_pending_tables/{customer}', None)))
+    for csm in csms + ['no-such-csm']:
+        requests.append(('csm months', ('POST', '/get_months_for_csm', {'csm': csm})))
+        for back in (0, 6, 13):
+            start = (end_month - relativedelta(months=back)).strftime('%Y-%m-%d')
+            for num_months in (1, 6, 12):
+                body = {'csm': csm, 'start_month': start, 'num_months': num_months}
+                requests.append(('csm data', ('POST', '/load_multi_month_csm_data', body)))
+    return requests
+
+
+def fetch(client, request):
+    method, path, body = request
+    if method == 'GET':
+        return client.get(path).get_data()
+    return client.post(path, json=body).get_data()
+
+
+def timed(app_module, client, request, enabled, iterations):
+    app_module.replica.enabled = enabled
+    fetch(client, request)
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fetch(client, request)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    args = parse_args()
+    os.environ['CSM_DB_NAME'] = args.db_name
+    os.environ['CSM_DB_HOST'] = args.db_host
+    os.environ['CSM_DB_PORT'] = str(args.db_port)
+    os.environ.setdefault('CSM_LOG_LEVEL', 'WARNING')
+    os.environ['CSM_COLUMNAR_REPLICA'] = '1'
+    warnings.filterwarnings('ignore', message='pandas only supports SQLAlchemy')
+
+    import app as app_module
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = args.db_user
+        sess['password'] = args.db_password
+        sess['last_activity'] = datetime.now().isoformat()
+
+    with app_module.app.test_request_context():
+        app_module.session['username'] = args.db_user
+        app_module.session['password'] = args.db_password
+        conn = app_module.get_db_connection()
+    if conn is None:
+        sys.exit('Could not connect to the database.')
+    try:
+        started = time.perf_counter()
+        snapshot = app_module.replica.load(conn)
+        load_ms = (time.perf_counter() - started) * 1000
+        print(f"loaded {len(snapshot.customer)} rows, {len(snapshot.mapping_keys)} mapping keys, "
+              f"{len(snapshot.customers)} customers, {len(snapshot.csms)} CSMs in {load_ms:.0f} ms; "
+              f"{len(snapshot.pending_keys)} pending months")
+        if not len(snapshot.customer):
+            sys.exit('No data in final_computed_table; seed it first (benchmarks/seed.py).')
+        requests = build_requests(snapshot.customers, snapshot.csms, max(snapshot.months()))
+    finally:
+        conn.close()
+
+    print(f"\n{'endpoint':<24}{'SQL ms':>10}{'replica ms':>12}")
+    seen = set()
+    for name, request in requests:
+        if name in seen:
+            continue
+        seen.add(name)
+        sql_ms = timed(app_module, client, request, False, args.iterations)
+        replica_ms = timed(app_module, client, request, True, args.iterations)
+        print(f"{name:<24}{sql_ms:>10.2f}{replica_ms:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+-- Table shapes used by app.py / ppt_generator.py, recreated for local benchmarking.
+-- Column names and types mirror what the application reads and writes.
+
+CREATE TABLE IF NOT EXISTS customer_mapping_table (
+    customer_name                       TEXT NOT NULL,
+    month_year                          DATE NOT NULL,
+    customer_full_name                  TEXT,
+    csm_primary                         TEXT,
+    csm_secondary                       TEXT,
+    customer_uid                        TEXT[] DEFAULT ARRAY[]::TEXT[],
+    no_of_environments                  INTEGER DEFAULT 2,
+    no_of_months                        INTEGER DEFAULT 6,
+    color_map_thresholds_availability   JSONB,
+    color_map_thresholds_users          JSONB,
+    color_map_thresholds_storage        JSONB,
+    indicator_color_code_rules          JSONB,
+    circle_color_code_rules             JSONB,
+    notes_availability                  JSONB,
+    notes_users                         JSONB,
+    notes_storage                       JSONB,
+    customer_note                       TEXT,
+    PRIMARY KEY (customer_name, month_year)
+);
+
+-- One row per configuration change; config_store.py resolves the version in force for a month
+CREATE TABLE IF NOT EXISTS customer_config_versions (
+    customer_name                       TEXT NOT NULL,
+    effective_from                      DATE NOT NULL,
+    customer_full_name                  TEXT,
+    csm_primary                         TEXT,
+    csm_secondary                       TEXT,
+    customer_uid                        TEXT[] DEFAULT ARRAY[]::TEXT[],
+    no_of_environments                  INTEGER DEFAULT 2,
+    no_of_months                        INTEGER DEFAULT 6,
+    color_map_thresholds_availability   JSONB,
+    color_map_thresholds_users          JSONB,
+    color_map_thresholds_storage        JSONB,
+    indicator_color_code_rules          JSONB,
+    circle_color_code_rules             JSONB,
+    notes_availability                  JSONB,
+    notes_users                         JSONB,
+    notes_storage                       JSONB,
+    customer_note                       TEXT,
+    recorded_at                         TIMESTAMP DEFAULT now(),
+    PRIMARY KEY (customer_name, effective_from)
+);
+
+CREATE TABLE IF NOT EXISTS availability_table (
+    customer_name           TEXT NOT NULL,
+    month_year              DATE NOT NULL,
+    total_availability      NUMERIC,
+    updated_availability    NUMERIC,
+    target                  NUMERIC,
+    updated_target          NUMERIC,
+    PRIMARY KEY (customer_name, month_year)
+);
+
+CREATE TABLE IF NOT EXISTS users_table (
+    customer_name       TEXT NOT NULL,
+    month_year          DATE NOT NULL,
+    prod_limit          INTEGER, test_limit          INTEGER, dev_limit          INTEGER,
+    prod_used           INTEGER, test_used           INTEGER, dev_used           INTEGER,
+    updated_prod_limit  INTEGER, updated_test_limit  INTEGER, updated_dev_limit  INTEGER,
+    updated_prod_used   INTEGER, updated_test_used   INTEGER, updated_dev_used   INTEGER,
+    PRIMARY KEY (customer_name, month_year)
+);
+
+CREATE TABLE IF NOT EXISTS storage_table (
+    customer_name                   TEXT NOT NULL,
+    month_year                      DATE NOT NULL,
+    prod_target_storage_gb          NUMERIC, test_target_storage_gb          NUMERIC, dev_target_storage_gb          NUMERIC,
+    prod_storage_gb                 NUMERIC, test_storage_gb                 NUMERIC, dev_storage_gb                 NUMERIC,
+    updated_prod_target_storage_gb  NUMERIC, updated_test_target_storage_gb  NUMERIC, updated_dev_target_storage_gb  NUMERIC,
+    updated_prod_storage_gb         NUMERIC, updated_test_storage_gb         NUMERIC, updated_dev_storage_gb         NUMERIC,
+    PRIMARY KEY (customer_name, month_year)
+);
+
+CREATE TABLE IF NOT EXISTS tickets_computed_table (
+    customer_name                   TEXT NOT NULL,
+    month_year                      DATE NOT NULL,
+    tickets_opened INTEGER, tickets_closed INTEGER, tickets_backlog INTEGER,
+    updated_tickets_opened INTEGER, updated_tickets_closed INTEGER, updated_tickets_backlog INTEGER,
+    current_opened_tickets INTEGER, current_closed_tickets INTEGER, current_backlog_tickets INTEGER,
+    updated_current_opened_tickets INTEGER, updated_current_closed_tickets INTEGER, updated_current_backlog_tickets INTEGER,
+    p1_opened INTEGER, p1_closed INTEGER, p1_backlog INTEGER,
+    p2_opened INTEGER, p2_closed INTEGER, p2_backlog INTEGER,
+    p3_opened INTEGER, p3_closed INTEGER, p3_backlog INTEGER,
+    p4_opened INTEGER, p4_closed INTEGER, p4_backlog INTEGER,
+    updated_p1_opened INTEGER, updated_p1_closed INTEGER, updated_p1_backlog INTEGER,
+    updated_p2_opened INTEGER, updated_p2_closed INTEGER, updated_p2_backlog INTEGER,
+    updated_p3_opened INTEGER, updated_p3_closed INTEGER, updated_p3_backlog INTEGER,
+    updated_p4_opened INTEGER, updated_p4_closed INTEGER, updated_p4_backlog INTEGER,
+    PRIMARY KEY (customer_name, month_year)
+);
+
+CREATE TABLE IF NOT EXISTS final_computed_table (
+    customer_name                   TEXT NOT NULL,
+    month_year                      DATE NOT NULL,
+    csm_primary                     TEXT,
+    csm_secondary                   TEXT,
+    customer_full_name              TEXT,
+    customer_uid                    TEXT[] DEFAULT ARRAY[]::TEXT[],
+    updated_availability            NUMERIC,
+    updated_target                  NUMERIC,
+    updated_prod_limit INTEGER, updated_test_limit INTEGER, updated_dev_limit INTEGER,
+    updated_prod_used  INTEGER, updated_test_used  INTEGER, updated_dev_used  INTEGER,
+    updated_prod_target_storage_gb NUMERIC, updated_test_target_storage_gb NUMERIC, updated_dev_target_storage_gb NUMERIC,
+    updated_prod_storage_gb        NUMERIC, updated_test_storage_gb        NUMERIC, updated_dev_storage_gb        NUMERIC,
+    updated_tickets_opened INTEGER, updated_tickets_closed INTEGER, updated_tickets_backlog INTEGER,
+    updated_current_opened_tickets INTEGER, updated_current_closed_tickets INTEGER, updated_current_backlog_tickets INTEGER,
+    updated_p1_opened INTEGER, updated_p1_closed INTEGER, updated_p1_backlog INTEGER,
+    updated_p2_opened INTEGER, updated_p2_closed INTEGER, updated_p2_backlog INTEGER,
+    updated_p3_opened INTEGER, updated_p3_closed INTEGER, updated_p3_backlog INTEGER,
+    updated_p4_opened INTEGER, updated_p4_closed INTEGER, updated_p4_backlog INTEGER,
+    PRIMARY KEY (customer_name, month_year)
+);
+
+CREATE TABLE IF NOT EXISTS audit_logs (
+    audit_id            BIGSERIAL PRIMARY KEY,
+    table_name          TEXT,
+    operation_type      TEXT,
+    changed_at          TIMESTAMP DEFAULT now(),
+    username            TEXT,
+    primary_key_value   JSONB,
+    old_data            JSONB,
+    new_data            JSONB,
+    section_name        TEXT,
+    comment             TEXT
+);
+
+-- Per-customer data versions, bumped by the triggers change_bus.py --install creates
+CREATE TABLE IF NOT EXISTS customer_data_versions (
+    customer_name       TEXT PRIMARY KEY,
+    version             BIGINT NOT NULL,
+    changed_at          TIMESTAMP DEFAULT now()
+);
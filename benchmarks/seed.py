@@ -0,0 +1,210 @@
+"""
+Seed a local PostgreSQL database with synthetic customers, months and audit rows.
+
+Creates the application tables (benchmarks/schema.sql) if needed and fills
+customer_mapping_table (and its customer_config_versions), the four source tables,
+final_computed_table and audit_logs in the shapes the app reads.
+
+    python benchmarks/seed.py --dsn "dbname=csm_bench host=localhost" \
+        --customers 200 --months 24 --audit-rows 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import date
+
+import psycopg2
+from psycopg2.extras import execute_values
+from dateutil.relativedelta import relativedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config_store  # noqa: E402
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+APP_TABLES = [
+    'final_computed_table', 'customer_mapping_table', 'customer_config_versions', 'availability_table',
+    'users_table', 'storage_table', 'tickets_computed_table', 'audit_logs',
+]
+
+AVAILABILITY_THRESHOLDS = {"Color1": 99.5, "Color2": 99.0, "Color3": 98.0}
+USAGE_THRESHOLDS = {"Color1": 50, "Color2": 80, "Color3": 90}
+INDICATOR_COLORS = {"Color1": [0, 176, 80], "Color2": [255, 192, 0], "Color3": [255, 0, 0], "Invalid": [127, 127, 127]}
+CIRCLE_COLORS = {"Color1": [0, 128, 0], "Color2": [230, 160, 0], "Color3": [192, 0, 0], "Invalid": [89, 89, 89]}
+
+
+def month_range(end_month, count):
+    """Return `count` first-of-month dates ending at end_month (oldest first)."""
+    return [end_month - relativedelta(months=count - 1 - i) for i in range(count)]
+
+
+def notes(prefix):
+    return {
+        "color1": f"{prefix} within target",
+        "color2": f"{prefix} approaching limit\\nReview with customer",
+        "color3": f"{prefix} above limit\\nAction plan agreed\\nFollow up next month",
+        "invalid": "",
+    }
+
+
+def build_rows(customers, months, end_month, audit_rows, seed):
+    rnd = random.Random(seed)
+    csms = [f"CSM {i:02d}" for i in range(max(2, customers // 10))]
+    month_list = month_range(end_month, months)
+    rows = {name: [] for name in APP_TABLES}
+
+    for c in range(customers):
+        name = f"cust{c:04d}"
+        full_name = f"Customer {c:04d} Ltd"
+        csm_primary, csm_secondary = rnd.sample(csms, 2)
+        envs = 3 if rnd.random() < 0.3 else 2
+        prod_limit, test_limit, dev_limit = rnd.choice([100, 250, 500, 1000]), 50, 25 if envs == 3 else 0
+        prod_target, test_target, dev_target = rnd.choice([500, 1000, 2000]), 200, 100 if envs == 3 else 0
+        backlog = rnd.randint(0, 20)
+
+        for m in month_list:
+            availability = round(rnd.uniform(0.975, 1.0), 4)
+            target = 0.995
+            prod_used = rnd.randint(prod_limit // 3, prod_limit)
+            test_used = rnd.randint(0, test_limit)
+            dev_used = rnd.randint(0, dev_limit) if dev_limit else 0
+            prod_gb = round(rnd.uniform(0.2, 1.05) * prod_target, 2)
+            test_gb = round(rnd.uniform(0.1, 0.9) * test_target, 2)
+            dev_gb = round(rnd.uniform(0.1, 0.9) * dev_target, 2) if dev_target else 0
+            opened, closed = rnd.randint(0, 30), rnd.randint(0, 30)
+            backlog = max(0, backlog + opened - closed)
+            p = [rnd.randint(0, 5) for _ in range(12)]
+
+            rows['customer_mapping_table'].append((
+                name, m, full_name, csm_primary, csm_secondary, [f"UID-{c:04d}"], envs, 6,
+                json.dumps(AVAILABILITY_THRESHOLDS), json.dumps(USAGE_THRESHOLDS), json.dumps(USAGE_THRESHOLDS),
+                json.dumps(INDICATOR_COLORS), json.dumps(CIRCLE_COLORS),
+                json.dumps(notes("Availability")), json.dumps(notes("Users")), json.dumps(notes("Storage")),
+                "",
+            ))
+            rows['availability_table'].append((name, m, availability, availability, target, target))
+            rows['users_table'].append((name, m, prod_limit, test_limit, dev_limit, prod_used, test_used, dev_used)
+                                       + (prod_limit, test_limit, dev_limit, prod_used, test_used, dev_used))
+            rows['storage_table'].append((name, m, prod_target, test_target, dev_target, prod_gb, test_gb, dev_gb)
+                                         + (prod_target, test_target, dev_target, prod_gb, test_gb, dev_gb))
+            rows['tickets_computed_table'].append((name, m) + (opened, closed, backlog) * 4 + tuple(p) * 2)
+            rows['final_computed_table'].append((
+                name, m, csm_primary, csm_secondary, full_name, [f"UID-{c:04d}"],
+                availability, target,
+                prod_limit, test_limit, dev_limit, prod_used, test_used, dev_used,
+                prod_target, test_target, dev_target, prod_gb, test_gb, dev_gb,
+                opened, closed, backlog, opened, closed, backlog,
+            ) + tuple(p))
+
+    sections = [("availability", "availability_table"), ("users", "users_table"),
+                ("storage", "storage_table"), ("tickets", "tickets_computed_table")]
+    for i in range(audit_rows):
+        section, table = rnd.choice(sections)
+        name = f"cust{rnd.randrange(customers):04d}"
+        m = rnd.choice(month_list)
+        rows['audit_logs'].append((
+            table, 'UPDATE', f"user{rnd.randrange(20):02d}",
+            json.dumps({"customer_name": name, "month_year": str(m)}),
+            json.dumps({"value": rnd.random()}), json.dumps({"value": rnd.random()}),
+            section, f"synthetic change {i}" if rnd.random() < 0.5 else None,
+        ))
+    return rows
+
+
+INSERTS = {
+    'customer_mapping_table': """
+        INSERT INTO customer_mapping_table (customer_name, month_year, customer_full_name, csm_primary, csm_secondary,
+            customer_uid, no_of_environments, no_of_months,
+            color_map_thresholds_availability, color_map_thresholds_users, color_map_thresholds_storage,
+            indicator_color_code_rules, circle_color_code_rules,
+            notes_availability, notes_users, notes_storage, customer_note)
+        VALUES %s""",
+    'availability_table': """
+        INSERT INTO availability_table (customer_name, month_year, total_availability, updated_availability,
+            target, updated_target)
+        VALUES %s""",
+    'users_table': """
+        INSERT INTO users_table (customer_name, month_year,
+            prod_limit, test_limit, dev_limit, prod_used, test_used, dev_used,
+            updated_prod_limit, updated_test_limit, updated_dev_limit,
+            updated_prod_used, updated_test_used, updated_dev_used)
+        VALUES %s""",
+    'storage_table': """
+        INSERT INTO storage_table (customer_name, month_year,
+            prod_target_storage_gb, test_target_storage_gb, dev_target_storage_gb,
+            prod_storage_gb, test_storage_gb, dev_storage_gb,
+            updated_prod_target_storage_gb, updated_test_target_storage_gb, updated_dev_target_storage_gb,
+            updated_prod_storage_gb, updated_test_storage_gb, updated_dev_storage_gb)
+        VALUES %s""",
+    'tickets_computed_table': """
+        INSERT INTO tickets_computed_table (customer_name, month_year,
+            tickets_opened, tickets_closed, tickets_backlog,
+            updated_tickets_opened, updated_tickets_closed, updated_tickets_backlog,
+            current_opened_tickets, current_closed_tickets, current_backlog_tickets,
+            updated_current_opened_tickets, updated_current_closed_tickets, updated_current_backlog_tickets,
+            p1_opened, p1_closed, p1_backlog, p2_opened, p2_closed, p2_backlog,
+            p3_opened, p3_closed, p3_backlog, p4_opened, p4_closed, p4_backlog,
+            updated_p1_opened, updated_p1_closed, updated_p1_backlog, updated_p2_opened, updated_p2_closed, updated_p2_backlog,
+            updated_p3_opened, updated_p3_closed, updated_p3_backlog, updated_p4_opened, updated_p4_closed, updated_p4_backlog)
+        VALUES %s""",
+    'final_computed_table': """
+        INSERT INTO final_computed_table (customer_name, month_year, csm_primary, csm_secondary,
+            customer_full_name, customer_uid, updated_availability, updated_target,
+            updated_prod_limit, updated_test_limit, updated_dev_limit,
+            updated_prod_used, updated_test_used, updated_dev_used,
+            updated_prod_target_storage_gb, updated_test_target_storage_gb, updated_dev_target_storage_gb,
+            updated_prod_storage_gb, updated_test_storage_gb, updated_dev_storage_gb,
+            updated_tickets_opened, updated_tickets_closed, updated_tickets_backlog,
+            updated_current_opened_tickets, updated_current_closed_tickets, updated_current_backlog_tickets,
+            updated_p1_opened, updated_p1_closed, updated_p1_backlog, updated_p2_opened, updated_p2_closed, updated_p2_backlog,
+            updated_p3_opened, updated_p3_closed, updated_p3_backlog, updated_p4_opened, updated_p4_closed, updated_p4_backlog)
+        VALUES %s""",
+    'audit_logs': """
+        INSERT INTO audit_logs (table_name, operation_type, username, primary_key_value,
+            old_data, new_data, section_name, comment)
+        VALUES %s""",
+}
+
+
+def seed(dsn, customers=50, months=24, audit_rows=5000, end_month=None, seed_value=42):
+    """Drop existing data, (re)create tables and load the synthetic dataset. Returns row counts."""
+    end_month = end_month or date.today().replace(day=1)
+    rows = build_rows(customers, months, end_month, audit_rows, seed_value)
+
+    conn = psycopg2.connect(dsn)
+    try:
+        cur = conn.cursor()
+        with open(SCHEMA_PATH) as fh:
+            cur.execute(fh.read())
+        cur.execute("TRUNCATE " + ", ".join(APP_TABLES) + " RESTART IDENTITY")
+        for table, sql in INSERTS.items():
+            if rows[table]:
+                execute_values(cur, sql, rows[table], page_size=1000)
+        versions = config_store.migrate(conn)  # commits the rows above with the backfilled versions
+        cur.execute("ANALYZE")
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    return dict({table: len(values) for table, values in rows.items()}, customer_config_versions=versions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=os.environ.get('CSM_BENCH_DSN', 'dbname=csm_bench'))
+    parser.add_argument('--customers', type=int, default=50)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--audit-rows', type=int, default=5000)
+    parser.add_argument('--end-month', help='YYYY-MM-01 (default: current month)')
+    args = parser.parse_args()
+
+    end_month = date.fromisoformat(args.end_month) if args.end_month else None
+    counts = seed(args.dsn, args.customers, args.months, args.audit_rows, end_month)
+    for table, count in counts.items():
+        print(f"{table:<26} {count:>8} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+"""
+Bulk import of monthly table data (what /insert_record "table" mode enters one month at a time).
+
+One spreadsheet row per customer and month: customer_name, month_year (YYYY-MM or YYYY-MM-DD)
+and any of the IMPORT_COLUMNS (blank or missing = 0, availability/target in percent).
+Rows are validated in one pass, COPYed into a temporary staging table and fanned out
+to final_computed_table and the four source tables with one INSERT ... SELECT each.
+
+    python bulk_import.py september.csv --dsn "dbname=AutomationDB host=localhost user=me"
+    python bulk_import.py september.xlsx --dsn "..." --dry-run   # validate only
+"""
+import argparse
+import io
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# column -> kind: 'percent' (entered as %, stored as a fraction), 'int' or 'float'
+IMPORT_COLUMNS = {
+    'updated_availability': 'percent',
+    'updated_target': 'percent',
+    'updated_prod_limit': 'int',
+    'updated_test_limit': 'int',
+    'updated_dev_limit': 'int',
+    'updated_prod_used': 'int',
+    'updated_test_used': 'int',
+    'updated_dev_used': 'int',
+    'updated_prod_target_storage_gb': 'float',
+    'updated_test_target_storage_gb': 'float',
+    'updated_dev_target_storage_gb': 'float',
+    'updated_prod_storage_gb': 'float',
+    'updated_test_storage_gb': 'float',
+    'updated_dev_storage_gb': 'float',
+    'updated_tickets_opened': 'int',
+    'updated_tickets_closed': 'int',
+    'updated_tickets_backlog': 'int',
+    'updated_current_opened_tickets': 'int',
+    'updated_current_closed_tickets': 'int',
+    'updated_current_backlog_tickets': 'int',
+}
+KEY_ALIASES = {'customer': 'customer_name', 'month': 'month_year'}
+MAX_ROWS = 20000
+FIRST_DATA_ROW = 2  # spreadsheet row number of the first data row (row 1 is the header)
+
+# rows    : data rows in the file
+# imported: [(customer_name, month date), ...] written (or, for a dry run, that would be written)
+# errors  : [{'row', 'customer', 'month', 'errors': [...]}, ...] in file order
+# ignored_columns : header names that are not import columns
+ImportResult = namedtuple('ImportResult', ['rows', 'imported', 'errors', 'ignored_columns'])
+
+
+class ImportFileError(ValueError):
+    """The file as a whole can't be imported (unreadable, wrong columns, too many rows)."""
+
+
+def read_table(fileobj, filename):
+    """Read a CSV or XLSX upload into a DataFrame of strings with normalized column names."""
+    ext = os.path.splitext(filename or '')[1].lower()
+    try:
+        if ext in ('.xlsx', '.xlsm'):
+            df = pd.read_excel(fileobj, dtype=str)  # needs openpyxl
+        elif ext in ('.csv', '.txt', ''):
+            df = pd.read_csv(fileobj, dtype=str, keep_default_na=False, skipinitialspace=True)
+        else:
+            raise ImportFileError(f"Unsupported file type '{ext}'. Upload a .csv or .xlsx file.")
+    except ImportError as e:
+        raise ImportFileError(f'Reading {ext} files needs an extra package: {e}')
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise ImportFileError(f'Could not read the file: {e}')
+
+    df.columns = [KEY_ALIASES.get(c, c) for c in (str(c).strip().lower().replace(' ', '_') for c in df.columns)]
+    if df.columns.duplicated().any():
+        raise ImportFileError('Duplicate column names: ' + ', '.join(sorted(set(df.columns[df.columns.duplicated()]))))
+    missing = [c for c in ('customer_name', 'month_year') if c not in df.columns]
+    if missing:
+        raise ImportFileError('Missing required column(s): ' + ', '.join(missing))
+    if len(df) > MAX_ROWS:
+        raise ImportFileError(f'Too many rows ({len(df)}); the limit is {MAX_ROWS}.')
+    return df.fillna('')
+
+
+def _parse_months(values):
+    """First try YYYY-MM-DD (also what Excel dates read as), then YYYY-MM; NaT where neither fits."""
+    text = values.str.strip().str.slice(0, 10)
+    parsed = pd.to_datetime(text, format='%Y-%m-%d', errors='coerce')
+    return parsed.fillna(pd.to_datetime(text, format='%Y-%m', errors='coerce'))
+
+
+def validate(df):
+    """Check every row at once. Returns (clean DataFrame of valid rows, {row number: [messages]}).
+
+    The clean frame has row_no, customer_name, month_year (date) and every IMPORT_COLUMNS
+    column with the values /insert_record would store.
+    """
+    row_no = pd.Series(np.arange(len(df)) + FIRST_DATA_ROW, index=df.index)
+    problems = []  # (boolean mask of failing rows, message)
+
+    customer = df['customer_name'].astype(str).str.strip()
+    problems.append((customer == '', 'customer_name is required'))
+
+    month = _parse_months(df['month_year'].astype(str))
+    problems.append((month.isna(), 'month_year must be YYYY-MM or YYYY-MM-DD'))
+
+    clean = pd.DataFrame({'row_no': row_no, 'customer_name': customer, 'month_year': month.dt.date})
+    for column, kind in IMPORT_COLUMNS.items():
+        raw = df[column].astype(str).str.strip() if column in df.columns else pd.Series('', index=df.index)
+        values = pd.to_numeric(raw.str.rstrip('%') if kind == 'percent' else raw, errors='coerce')
+        blank = raw == ''
+        problems.append((values.isna() & ~blank, f'{column} is not a number'))
+        values = values.where(~blank, 0.0)
+        if kind == 'int':
+            problems.append((values.notna() & (values % 1 != 0), f'{column} must be a whole number'))
+        if kind == 'percent':
+            problems.append(((values < 0) | (values > 100), f'{column} must be between 0 and 100'))
+            values = values / 100
+        else:
+            problems.append((values < 0, f'{column} must not be negative'))
+        clean[column] = values
+
+    duplicated = clean.duplicated(['customer_name', 'month_year'], keep=False) & month.notna() & (customer != '')
+    problems.append((duplicated, 'customer and month appear more than once in the file'))
+
+    errors = {}
+    for mask, message in problems:
+        for row in row_no[mask.fillna(False)]:
+            errors.setdefault(int(row), []).append(message)
+    clean = clean[~clean['row_no'].isin(list(errors))].copy()
+    for column, kind in IMPORT_COLUMNS.items():
+        if kind == 'int':
+            clean[column] = clean[column].astype('int64')
+    return clean, errors
+
+
+_STAGING_COLUMNS = ['row_no', 'customer_name', 'month_year'] + list(IMPORT_COLUMNS)
+_SQL_TYPES = {'percent': 'NUMERIC', 'float': 'NUMERIC', 'int': 'INTEGER'}
+
+
+def _copy_to_staging(cur, clean):
+    cur.execute('CREATE TEMP TABLE import_staging (row_no INTEGER PRIMARY KEY, customer_name TEXT NOT NULL, '
+                'month_year DATE NOT NULL, '
+                + ', '.join(f'{c} {_SQL_TYPES[k]} NOT NULL' for c, k in IMPORT_COLUMNS.items())
+                + ') ON COMMIT DROP')
+    buf = io.StringIO()
+    clean.to_csv(buf, columns=_STAGING_COLUMNS, header=False, index=False)
+    buf.seek(0)
+    cur.copy_expert(f"COPY import_staging ({', '.join(_STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+# Rows the database rejects, with the same wording /insert_record uses
+_DB_CHECKS = """
+    SELECT row_no, no_config, exists_already
+    FROM (
+        SELECT s.row_no,
+               NOT EXISTS (SELECT 1 FROM customer_mapping_table x
+                           WHERE x.customer_name = s.customer_name AND x.month_year = s.month_year) AS no_config,
+               EXISTS (SELECT 1 FROM final_computed_table x
+                       WHERE x.customer_name = s.customer_name AND x.month_year = s.month_year)
+               OR EXISTS (SELECT 1 FROM availability_table x
+                          WHERE x.customer_name = s.customer_name AND x.month_year = s.month_year)
+               OR EXISTS (SELECT 1 FROM users_table x
+                          WHERE x.customer_name = s.customer_name AND x.month_year = s.month_year)
+               OR EXISTS (SELECT 1 FROM storage_table x
+                          WHERE x.customer_name = s.customer_name AND x.month_year = s.month_year)
+               OR EXISTS (SELECT 1 FROM tickets_computed_table x
+                          WHERE x.customer_name = s.customer_name AND x.month_year = s.month_year) AS exists_already
+        FROM import_staging s
+    ) checks
+    WHERE no_config OR exists_already
+"""
+
+# Same columns and values as /insert_record table mode, for every staged row at once
+_FAN_OUT = [
+    """
+    WITH inserted AS (
+        INSERT INTO final_computed_table
+            (customer_name, month_year, csm_primary, csm_secondary,
+             updated_availability, updated_target,
+             updated_prod_limit, updated_test_limit, updated_dev_limit,
+             updated_prod_used, updated_test_used, updated_dev_used,
+             updated_prod_target_storage_gb, updated_test_target_storage_gb, updated_dev_target_storage_gb,
+             updated_prod_storage_gb, updated_test_storage_gb, updated_dev_storage_gb,
+             updated_tickets_opened, updated_tickets_closed, updated_tickets_backlog,
+             updated_current_opened_tickets, updated_current_closed_tickets, updated_current_backlog_tickets)
+        SELECT s.customer_name, s.month_year, m.csm_primary, m.csm_secondary,
+               s.updated_availability, s.updated_target,
+               s.updated_prod_limit, s.updated_test_limit, s.updated_dev_limit,
+               s.updated_prod_used, s.updated_test_used, s.updated_dev_used,
+               s.updated_prod_target_storage_gb, s.updated_test_target_storage_gb, s.updated_dev_target_storage_gb,
+               s.updated_prod_storage_gb, s.updated_test_storage_gb, s.updated_dev_storage_gb,
+               s.updated_tickets_opened, s.updated_tickets_closed, s.updated_tickets_backlog,
+               s.updated_current_opened_tickets, s.updated_current_closed_tickets, s.updated_current_backlog_tickets
+        FROM import_staging s
+        JOIN customer_mapping_table m ON m.customer_name = s.customer_name AND m.month_year = s.month_year
+        ON CONFLICT (customer_name, month_year) DO NOTHING
+        RETURNING customer_name, month_year
+    )
+    DELETE FROM import_staging s
+    WHERE NOT EXISTS (SELECT 1 FROM inserted i WHERE i.customer_name = s.customer_name AND i.month_year = s.month_year)
+    RETURNING s.row_no
+    """,
+    """
+    INSERT INTO availability_table
+        (customer_name, month_year, total_availability, updated_availability, target, updated_target)
+    SELECT customer_name, month_year, updated_availability, updated_availability, updated_target, updated_target
+    FROM import_staging
+    """,
+    """
+    INSERT INTO users_table
+        (customer_name, month_year,
+         prod_limit, prod_used, test_limit, test_used, dev_limit, dev_used,
+         updated_prod_limit, updated_prod_used, updated_test_limit, updated_test_used,
+         updated_dev_limit, updated_dev_used)
+    SELECT customer_name, month_year,
+           updated_prod_limit, updated_prod_used, updated_test_limit, updated_test_used,
+           updated_dev_limit, updated_dev_used,
+           updated_prod_limit, updated_prod_used, updated_test_limit, updated_test_used,
+           updated_dev_limit, updated_dev_used
+    FROM import_staging
+    """,
+    """
+    INSERT INTO storage_table
+        (customer_name, month_year,
+         prod_target_storage_gb, prod_storage_gb, test_target_storage_gb, test_storage_gb,
+         dev_target_storage_gb, dev_storage_gb,
+         updated_prod_target_storage_gb, updated_prod_storage_gb,
+         updated_test_target_storage_gb, updated_test_storage_gb,
+         updated_dev_target_storage_gb, updated_dev_storage_gb)
+    SELECT customer_name, month_year,
+           updated_prod_target_storage_gb, updated_prod_storage_gb,
+           updated_test_target_storage_gb, updated_test_storage_gb,
+           updated_dev_target_storage_gb, updated_dev_storage_gb,
+           updated_prod_target_storage_gb, updated_prod_storage_gb,
+           updated_test_target_storage_gb, updated_test_storage_gb,
+           updated_dev_target_storage_gb, updated_dev_storage_gb
+    FROM import_staging
+    """,
+    """
+    INSERT INTO tickets_computed_table
+        (customer_name, month_year,
+         tickets_opened, tickets_closed, tickets_backlog,
+         updated_tickets_opened, updated_tickets_closed, updated_tickets_backlog,
+         current_opened_tickets, current_closed_tickets, current_backlog_tickets,
+         updated_current_opened_tickets, updated_current_closed_tickets, updated_current_backlog_tickets)
+    SELECT customer_name, month_year,
+           updated_tickets_opened, updated_tickets_closed, updated_tickets_backlog,
+           updated_tickets_opened, updated_tickets_closed, updated_tickets_backlog,
+           updated_current_opened_tickets, updated_current_closed_tickets, updated_current_backlog_tickets,
+           updated_current_opened_tickets, updated_current_closed_tickets, updated_current_backlog_tickets
+    FROM import_staging
+    """,
+]
+
+
+def _add_error(errors, row, message):
+    errors.setdefault(row, []).append(message)
+
+
+def import_frame(conn, df, dry_run=False, partial=False):
+    """Validate and load an already-read frame (see read_table) in one transaction.
+
+    Unless `partial` is set, any row error imports nothing. `dry_run` runs every check,
+    database ones included, and rolls back. The caller owns the connection.
+    """
+    ignored = [c for c in df.columns if c not in IMPORT_COLUMNS and c not in ('customer_name', 'month_year')]
+    clean, errors = validate(df)
+    cur = conn.cursor()
+    try:
+        _copy_to_staging(cur, clean)
+        cur.execute(_DB_CHECKS)
+        rejected = cur.fetchall()
+        for row, no_config, exists_already in rejected:
+            if no_config:
+                _add_error(errors, row, 'Configuration missing! Please enter configuration first.')
+            if exists_already:
+                _add_error(errors, row, 'Table data already exists for this customer & month.')
+        if rejected:
+            cur.execute('DELETE FROM import_staging WHERE row_no = ANY(%s)', ([r[0] for r in rejected],))
+
+        if errors and not partial:
+            conn.rollback()
+            return _result(df, clean, [], errors, ignored)
+
+        cur.execute(_FAN_OUT[0])
+        for (row,) in cur.fetchall():  # lost a race with a concurrent insert
+            _add_error(errors, row, 'Table data already exists for this customer & month.')
+        if errors and not partial:
+            conn.rollback()
+            return _result(df, clean, [], errors, ignored)
+        for statement in _FAN_OUT[1:]:
+            cur.execute(statement)
+        cur.execute('SELECT customer_name, month_year FROM import_staging ORDER BY row_no')
+        imported = [tuple(r) for r in cur.fetchall()]
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+        return _result(df, clean, imported, errors, ignored)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _result(df, clean, imported, errors, ignored):
+    by_row = {FIRST_DATA_ROW + i: (c, m) for i, (c, m) in enumerate(zip(df['customer_name'], df['month_year']))}
+    report = [{'row': row, 'customer': str(by_row[row][0]).strip(), 'month': str(by_row[row][1]).strip(),
+               'errors': messages} for row, messages in sorted(errors.items())]
+    return ImportResult(len(df), imported, report, ignored)
+
+
+def import_file(conn, fileobj, filename, dry_run=False, partial=False):
+    """Read, validate and load a CSV/XLSX file. Raises ImportFileError for file-level problems."""
+    return import_frame(conn, read_table(fileobj, filename), dry_run=dry_run, partial=partial)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='.csv or .xlsx file')
+    parser.add_argument('--dsn', required=True, help='libpq connection string')
+    parser.add_argument('--dry-run', action='store_true', help='validate against the database, write nothing')
+    parser.add_argument('--partial', action='store_true', help='import the valid rows even if some rows fail')
+    args = parser.parse_args()
+
+    import psycopg2
+    conn = psycopg2.connect(args.dsn)
+    try:
+        with open(args.path, 'rb') as fh:
+            result = import_file(conn, fh, args.path, dry_run=args.dry_run, partial=args.partial)
+    except ImportFileError as e:
+        sys.exit(str(e))
+    finally:
+        conn.close()
+
+    for error in result.errors:
+        print(f"row {error['row']} ({error['customer']} {error['month']}): {'; '.join(error['errors'])}")
+    if result.ignored_columns:
+        print('ignored columns: ' + ', '.join(result.ignored_columns))
+    verb = 'would import' if args.dry_run else 'imported'
+    print(f'{verb} {len(result.imported)} of {result.rows} rows, {len(result.errors)} with errors')
+    sys.exit(1 if result.errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""
+Cross-worker change notifications over PostgreSQL LISTEN/NOTIFY, with per-customer data versions.
+
+Each worker's caches (config_store, record_cache, page_cache, window_cache,
+columnar_replica) are kept current by change_hooks, which see only that worker's writes.
+ChangeBus carries every write to final_computed_table and customer_mapping_table, from
+any worker or from outside the app, to every worker:
+
+- Statement-level AFTER triggers on both tables (installed by `--install`) bump the
+  changed customers' rows in customer_data_versions in one statement and send one event
+  per statement on the csm_changes channel: the table, each customer with the first month
+  changed and its new version, and the writer's application_name. A statement touching
+  too many customers to fit a notification (bulk import, rollover) sends a resync event.
+- A listener thread in each worker LISTENs on its own connection. Every change from
+  another writer is handed to `apply(change, connect)` as Change(customer, month, table,
+  propagates=True), where connect() lends the listener's own connection (its close()
+  leaves it open), so applying an event opens no connection. The worker's own writes,
+  recognised by the application_name its pool connects with (worker_name()), were
+  already applied by its change hooks and only move the versions.
+- When the listener (re)connects, or on a resync event, it reloads the versions and
+  calls `resync()` to drop everything cached.
+
+version(customer) is the customer's current data version, the same in every worker once
+it has applied the change (a worker moves to a new version only after applying it). It is
+for ETags and cache keys, and is None while the listener is not connected.
+
+The listener refuses to start until the triggers exist:
+`python change_bus.py --dsn ... --install`.
+"""
+import argparse
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+from change_hooks import Change
+from request_logging import get_logger
+
+logger = get_logger('change_bus')
+
+CHANNEL = 'csm_changes'
+POLL_SECONDS = 5
+RETRY_SECONDS = 30
+
+# Tables whose writes are published; each event's Change.source is the table name
+TABLES = ('final_computed_table', 'customer_mapping_table')
+# Larger events are replaced by a resync event (NOTIFY payloads must stay under 8000 bytes)
+MAX_PAYLOAD = 7000
+
+_INSTANCE = uuid.uuid4().hex[:12]
+
+SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS customer_data_versions (
+        customer_name   TEXT PRIMARY KEY,
+        version         BIGINT NOT NULL,
+        changed_at      TIMESTAMP DEFAULT now()
+    );
+
+    CREATE OR REPLACE FUNCTION csm_publish_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        changed JSONB;
+        payload TEXT;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT jsonb_object_agg(customer_name, first_month) INTO changed
+            FROM (SELECT customer_name, MIN(month_year) AS first_month FROM new_rows GROUP BY customer_name) c;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT jsonb_object_agg(customer_name, first_month) INTO changed
+            FROM (SELECT customer_name, MIN(month_year) AS first_month FROM old_rows GROUP BY customer_name) c;
+        ELSE
+            SELECT jsonb_object_agg(customer_name, first_month) INTO changed
+            FROM (SELECT customer_name, MIN(month_year) AS first_month
+                  FROM (SELECT customer_name, month_year FROM new_rows
+                        UNION ALL SELECT customer_name, month_year FROM old_rows) r
+                  GROUP BY customer_name) c;
+        END IF;
+        IF changed IS NULL THEN
+            RETURN NULL;
+        END IF;
+
+        WITH bumped AS (
+            INSERT INTO customer_data_versions (customer_name, version)
+            SELECT customer_name, 1 FROM jsonb_object_keys(changed) AS customer_name ORDER BY customer_name
+            ON CONFLICT (customer_name) DO UPDATE
+                SET version = customer_data_versions.version + 1, changed_at = now()
+            RETURNING customer_name, version
+        )
+        SELECT json_build_object(
+            'table', TG_TABLE_NAME, 'origin', current_setting('application_name'),
+            'changes', json_object_agg(customer_name, json_build_array(changed ->> customer_name, version)))::text
+        INTO payload FROM bumped;
+        IF octet_length(payload) > {MAX_PAYLOAD} THEN
+            payload := json_build_object('table', TG_TABLE_NAME, 'origin', current_setting('application_name'),
+                                         'resync', true)::text;
+        END IF;
+        PERFORM pg_notify('{CHANNEL}', payload);
+        RETURN NULL;
+    END
+    $$;
+""" + ''.join(f"""
+    DROP TRIGGER IF EXISTS csm_publish_insert ON {table};
+    CREATE TRIGGER csm_publish_insert AFTER INSERT ON {table}
+        REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE PROCEDURE csm_publish_changes();
+    DROP TRIGGER IF EXISTS csm_publish_update ON {table};
+    CREATE TRIGGER csm_publish_update AFTER UPDATE ON {table}
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE PROCEDURE csm_publish_changes();
+    DROP TRIGGER IF EXISTS csm_publish_delete ON {table};
+    CREATE TRIGGER csm_publish_delete AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE PROCEDURE csm_publish_changes();
+""" for table in TABLES)
+
+_TRIGGER_COUNT_SQL = """
+    SELECT COUNT(*) FROM pg_trigger
+    WHERE tgname IN ('csm_publish_insert', 'csm_publish_update', 'csm_publish_delete')
+      AND tgrelid IN ('final_computed_table'::regclass, 'customer_mapping_table'::regclass)
+"""
+
+# resync: the event stands for changes too many to list; changes is then empty
+Event = namedtuple('Event', ['table', 'changes', 'origin', 'resync'])  # changes: [(Change, version)]
+
+
+def worker_name():
+    """This process's application_name. Events carry the writer's as their origin."""
+    return f'csm_report:{_INSTANCE}:{os.getpid()}'
+
+
+def parse_event(payload):
+    data = json.loads(payload)
+    if data.get('resync'):
+        return Event(data['table'], [], data['origin'], True)
+    changes = [(Change(customer, datetime.strptime(month, '%Y-%m-%d').date(), data['table'], True), version)
+               for customer, (month, version) in data['changes'].items()]
+    return Event(data['table'], changes, data['origin'], False)
+
+
+class _Lent:
+    """The listener's connection as lent to apply(): close() leaves it open."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        pass
+
+
+def install(conn):
+    """Create customer_data_versions and the triggers publishing changes (safe to re-run)."""
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA)
+    conn.commit()
+
+
+class ChangeBus:
+    """Per-worker listener for the csm_changes channel."""
+
+    def __init__(self, apply, resync, enabled=True, channel=CHANNEL):
+        self.apply = apply
+        self.resync = resync
+        self.enabled = enabled
+        self.channel = channel
+        self.skip_own = True  # this worker's changes are already applied by its change hooks
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._listening = False
+        self._thread = None
+        self._failed_at = None
+        self._stop = threading.Event()
+
+    @property
+    def listening(self):
+        return self._listening
+
+    def version(self, customer):
+        """The customer's data version (0 if never written), or None while not listening."""
+        if not self._listening:
+            return None
+        with self._lock:
+            return self._versions.get(customer, 0)
+
+    def _set_version(self, customer, version):
+        with self._lock:
+            if version > self._versions.get(customer, 0):
+                self._versions[customer] = version
+
+    # ----- listener -----
+
+    def start(self, connect):
+        """Start the listener thread with connect() -> a dedicated psycopg2 connection, unless it
+        is running or failed less than RETRY_SECONDS ago."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._failed_at is not None and time.monotonic() - self._failed_at < RETRY_SECONDS:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(connect,), name='change-bus', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, connect):
+        try:
+            conn = connect()
+        except Exception:
+            logger.exception('change bus: listener could not connect')
+            self._failed_at = time.monotonic()
+            return
+        try:
+            conn.autocommit = True
+            cur = conn.cursor()
+            cur.execute(_TRIGGER_COUNT_SQL)
+            if cur.fetchone()[0] < 3 * len(TABLES):
+                raise RuntimeError('change bus triggers are not installed (python change_bus.py --dsn ... --install)')
+            cur.execute(f'LISTEN {self.channel}')
+            self._sync(conn)
+            logger.info('change bus: listening', extra={'fields': {'channel': self.channel, 'worker': worker_name()}})
+            while not self._stop.is_set():
+                if select.select([conn], [], [], POLL_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._receive(conn, conn.notifies.pop(0).payload)
+        except Exception:
+            logger.exception('change bus: listener stopped')
+            self._failed_at = time.monotonic()
+        finally:
+            self._listening = False
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _sync(self, conn):
+        """Load the current versions, then drop every cached value (events may have been missed)."""
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT customer_name, version FROM customer_data_versions")
+            versions = dict(cur.fetchall())
+        finally:
+            cur.close()
+        self.resync()
+        with self._lock:
+            self._versions = versions
+        self._listening = True
+
+    def _receive(self, conn, payload):
+        try:
+            event = parse_event(payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning('change bus: unreadable event', extra={'fields': {'payload': payload[:200]}})
+            return
+        own = self.skip_own and event.origin == worker_name()
+        if event.resync:
+            if not own:
+                self._sync(conn)
+            return
+        lent = _Lent(conn)
+        for change, version in event.changes:
+            if not own:
+                try:
+                    self.apply(change, lambda: lent)
+                except Exception:
+                    logger.exception('change bus: applying a remote change failed',
+                                     extra={'fields': {'customer': change.customer, 'table': event.table}})
+                    self.resync()
+            # Only now: a new version must never be paired with data cached before the change
+            self._set_version(change.customer, version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', required=True, help='libpq connection string')
+    parser.add_argument('--install', action='store_true',
+                        help='create the customer_data_versions table and the triggers publishing changes')
+    parser.add_argument('--listen', action='store_true', help='print events as they arrive (Ctrl-C to stop)')
+    args = parser.parse_args()
+
+    import psycopg2
+    if args.install:
+        conn = psycopg2.connect(args.dsn)
+        try:
+            install(conn)
+            print('customer_data_versions and triggers: ready')
+        finally:
+            conn.close()
+    if args.listen:
+        bus = ChangeBus(apply=lambda change, connect: print(change), resync=lambda: print('resync'))
+        bus.start(lambda: psycopg2.connect(args.dsn))
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            bus.stop()
+
+
+if __name__ == '__main__':
+    main()
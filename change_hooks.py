@@ -0,0 +1,49 @@
+from collections import namedtuple
+from datetime import date, datetime
+
+from request_logging import get_logger
+
+logger = get_logger('change_hooks')
+
+# customer : customer_name
+# month    : date of the changed month
+# source   : endpoint/operation that made the change (e.g. 'save_users'), or the table
+#            changed for changes relayed by change_bus
+# propagates : the write also changed every later month of the customer
+Change = namedtuple('Change', ['customer', 'month', 'source', 'propagates'])
+
+_hooks = []
+
+
+def register(hook):
+    """Register hook(change) to run after a customer's monthly data is committed. Usable as a decorator."""
+    _hooks.append(hook)
+    return hook
+
+
+def unregister(hook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def _as_date(month):
+    if isinstance(month, datetime):
+        return month.date()
+    if isinstance(month, date):
+        return month
+    return datetime.strptime(str(month)[:10], '%Y-%m-%d').date()
+
+
+def record_changed(customer, month, source, propagates=False):
+    """Run every registered hook for a committed write to (customer, month).
+
+    Call only after conn.commit(). Hook errors are logged and never reach the caller,
+    so a failing cache can't fail a save that already succeeded.
+    """
+    change = Change(customer, _as_date(month), source, propagates)
+    for hook in list(_hooks):
+        try:
+            hook(change)
+        except Exception:
+            logger.exception('change hook %s failed', getattr(hook, '__name__', hook),
+                             extra={'fields': {'customer': customer, 'month': str(change.month), 'source': source}})
@@ -0,0 +1,404 @@
+"""
+Optional in-process columnar replica of final_computed_table for portfolio reads.
+
+The month dropdowns, pending lists, CSM views and customer/CSM/month lists each scan
+final_computed_table (and the customer_mapping_table keys). ColumnarReplica keeps one
+snapshot of both in NumPy arrays and answers those reads from memory:
+
+- customer and CSM names become int32 codes, numbered in the database's sort order so
+  sorting by code reproduces ORDER BY under the database collation;
+- month_year becomes int32 date ordinals;
+- numeric columns are float64 plus an int8 scale, so values come back as the same
+  Decimal text a cursor returns; integer columns are float64 (NaN for NULL);
+- rows are sorted by (customer, month): a customer index maps each customer to its
+  contiguous block and a month index maps each month to its rows.
+
+The snapshot is loaded on first use in each worker (the app only has per-user
+credentials, so the first request's connection loads it) and reloaded after `ttl`
+seconds. A load reads everything in one REPEATABLE READ transaction. update_hook keeps
+it current between reloads: a write re-reads the customer and swaps in a rebuilt
+snapshot; bulk writes (rollover, bulk import), and any write committed while a load is
+running, mark it stale. Snapshots are never modified, so readers take no locks.
+
+tests/test_columnar_replica.py checks every query against its SQL.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+DEFAULT_TTL_SECONDS = 300
+
+# Writes that touch many customers at once: reload instead of refreshing each customer
+RELOAD_SOURCES = {'rollover', 'bulk_import'}
+
+_NUMERIC_OID = 1700
+_INTEGER_OIDS = {20, 21, 23}
+_CODED_COLUMNS = ('customer_name', 'csm_primary', 'csm_secondary')
+_MONTH_BITS = 20  # date ordinals stay below 2**20 until the year 2870
+
+_CUSTOMERS_SQL = """
+    SELECT customer_name FROM final_computed_table
+    UNION
+    SELECT customer_name FROM customer_mapping_table
+    ORDER BY customer_name
+"""
+
+_CSMS_SQL = """
+    SELECT csm FROM (
+        SELECT csm_primary AS csm FROM final_computed_table
+        UNION
+        SELECT csm_secondary AS csm FROM final_computed_table
+    ) AS all_csms
+    WHERE csm IS NOT NULL
+    ORDER BY csm
+"""
+
+_FINAL_SQL = "SELECT * FROM final_computed_table WHERE %(customer)s::text IS NULL OR customer_name = %(customer)s"
+
+_MAPPING_SQL = """
+    SELECT customer_name, month_year FROM customer_mapping_table
+    WHERE %(customer)s::text IS NULL OR customer_name = %(customer)s
+"""
+
+
+class NewNameError(LookupError):
+    """A refreshed customer brought a customer or CSM name the snapshot has no code for."""
+
+
+def _keys(customers, months):
+    return (customers.astype(np.int64) << _MONTH_BITS) | months.astype(np.int64)
+
+
+@contextmanager
+def _one_snapshot(conn):
+    """Run the enclosed reads in one REPEATABLE READ, READ ONLY transaction, so they all see
+    the same committed data (the code lists then cover every name in the rows)."""
+    if conn.autocommit:
+        with conn.cursor() as cur:
+            cur.execute('BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY')
+    else:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+    try:
+        yield
+    finally:
+        if conn.autocommit:
+            with conn.cursor() as cur:
+                cur.execute('ROLLBACK')
+        else:
+            conn.rollback()
+
+
+def _fetch(conn, customer=None):
+    """(description, final_computed_table rows, customer_mapping_table keys), for one customer or all."""
+    cur = conn.cursor()
+    try:
+        params = {'customer': customer}
+        cur.execute(_FINAL_SQL, params)
+        description = [(d[0], d[1]) for d in cur.description]
+        rows = cur.fetchall()
+        cur.execute(_MAPPING_SQL, params)
+        mapping = cur.fetchall()
+    finally:
+        cur.close()
+    return description, rows, mapping
+
+
+class Snapshot:
+    """final_computed_table and the customer_mapping_table keys as arrays. Never modified once built."""
+
+    def __init__(self, customers, csms, columns, arrays, scales, mapping_keys):
+        self.customers = customers  # names in database order; index = code
+        self.customer_codes = {name: code for code, name in enumerate(customers)}
+        self.csms = csms
+        self.csm_codes = {name: code for code, name in enumerate(csms)}
+        self.columns = columns      # [(name, kind)], kind: 'customer' | 'csm' | 'month' | 'numeric' | 'integer' | 'object'
+        self.loaded_at = time.monotonic()
+
+        order = np.lexsort((arrays['month_year'], arrays['customer_name']))
+        self.arrays = {name: array[order] for name, array in arrays.items()}
+        self.scales = {name: array[order] for name, array in scales.items()}
+        self.customer = self.arrays['customer_name']
+        self.month = self.arrays['month_year']
+
+        # Customer index: contiguous blocks; month index: rows per month
+        codes, starts, counts = np.unique(self.customer, return_index=True, return_counts=True)
+        self.blocks = {int(c): (int(s), int(s + n)) for c, s, n in zip(codes, starts, counts)}
+        by_month = np.argsort(self.month, kind='stable')
+        months, starts = np.unique(self.month[by_month], return_index=True)
+        self.month_rows = dict(zip(months.tolist(), np.split(by_month, starts[1:])))
+
+        self.mapping_keys = np.unique(mapping_keys)
+        self.pending_keys = np.setdiff1d(self.mapping_keys, _keys(self.customer, self.month))
+
+    # ----- building -----
+
+    @classmethod
+    def load(cls, conn):
+        with _one_snapshot(conn):
+            cur = conn.cursor()
+            try:
+                cur.execute(_CUSTOMERS_SQL)
+                customers = [row[0] for row in cur.fetchall()]
+                cur.execute(_CSMS_SQL)
+                csms = [row[0] for row in cur.fetchall()]
+            finally:
+                cur.close()
+            description, rows, mapping = _fetch(conn)
+        customer_codes = {name: code for code, name in enumerate(customers)}
+        csm_codes = {name: code for code, name in enumerate(csms)}
+        columns = [(name, cls._kind(name, type_code)) for name, type_code in description]
+        arrays, scales = cls._encode(columns, rows, customer_codes, csm_codes)
+        mapping_keys = cls._encode_mapping(mapping, customer_codes)
+        return cls(customers, csms, columns, arrays, scales, mapping_keys)
+
+    @staticmethod
+    def _kind(name, type_code):
+        if name == 'customer_name':
+            return 'customer'
+        if name in _CODED_COLUMNS:
+            return 'csm'
+        if name == 'month_year':
+            return 'month'
+        if type_code == _NUMERIC_OID:
+            return 'numeric'
+        if type_code in _INTEGER_OIDS:
+            return 'integer'
+        return 'object'
+
+    @staticmethod
+    def _code(codes, name):
+        if name is None:
+            return -1
+        try:
+            return codes[name]
+        except KeyError:
+            raise NewNameError(name) from None
+
+    @classmethod
+    def _encode(cls, columns, rows, customer_codes, csm_codes):
+        arrays, scales = {}, {}
+        for i, (name, kind) in enumerate(columns):
+            values = [row[i] for row in rows]
+            if kind == 'customer':
+                arrays[name] = np.array([cls._code(customer_codes, v) for v in values], dtype=np.int32)
+            elif kind == 'csm':
+                arrays[name] = np.array([cls._code(csm_codes, v) for v in values], dtype=np.int32)
+            elif kind == 'month':
+                arrays[name] = np.array([v.toordinal() for v in values], dtype=np.int32)
+            elif kind in ('numeric', 'integer'):
+                arrays[name] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+                if kind == 'numeric':
+                    scales[name] = np.array([0 if v is None else -v.as_tuple().exponent for v in values],
+                                            dtype=np.int8)
+            else:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+                arrays[name] = array
+        return arrays, scales
+
+    @classmethod
+    def _encode_mapping(cls, mapping, customer_codes):
+        customers = np.array([cls._code(customer_codes, name) for name, _ in mapping], dtype=np.int32)
+        months = np.array([month.toordinal() for _, month in mapping], dtype=np.int32)
+        return _keys(customers, months)
+
+    def with_customer(self, conn, customer):
+        """A new snapshot with the customer's rows and mapping keys re-read from the database.
+
+        Raises NewNameError when they name a customer or CSM the snapshot has no code for.
+        """
+        code = self._code(self.customer_codes, customer)
+        with _one_snapshot(conn):
+            description, rows, mapping = _fetch(conn, customer)
+        if [(name, self._kind(name, type_code)) for name, type_code in description] != self.columns:
+            raise NewNameError('final_computed_table columns changed')
+        arrays, scales = self._encode(self.columns, rows, self.customer_codes, self.csm_codes)
+        keep = self.customer != code
+        arrays = {name: np.concatenate([array[keep], arrays[name]]) for name, array in self.arrays.items()}
+        scales = {name: np.concatenate([array[keep], scales[name]]) for name, array in self.scales.items()}
+        mapping_keys = np.concatenate([self.mapping_keys[(self.mapping_keys >> _MONTH_BITS) != code],
+                                       self._encode_mapping(mapping, self.customer_codes)])
+        return Snapshot(self.customers, self.csms, self.columns, arrays, scales, mapping_keys)
+
+    # ----- decoding -----
+
+    def _values(self, name, positions):
+        kind = dict(self.columns)[name]
+        values = self.arrays[name][positions]
+        if kind == 'customer':
+            return [self.customers[c] for c in values.tolist()]
+        if kind == 'csm':
+            return [None if c < 0 else self.csms[c] for c in values.tolist()]
+        if kind == 'month':
+            return [date.fromordinal(m) for m in values.tolist()]
+        if kind == 'integer':
+            return [None if v != v else int(v) for v in values.tolist()]
+        if kind == 'numeric':
+            scales = self.scales[name][positions].tolist()
+            return [None if v != v else Decimal(repr(v)).quantize(Decimal(1).scaleb(-s))
+                    for v, s in zip(values.tolist(), scales)]
+        return values.tolist()
+
+    # ----- queries -----
+
+    def customer_months(self, customer):
+        """Months with a row for the customer, newest first (dates)."""
+        code = self.customer_codes.get(customer)
+        if code not in self.blocks:
+            return []
+        lo, hi = self.blocks[code]
+        return [date.fromordinal(m) for m in np.unique(self.month[lo:hi])[::-1].tolist()]
+
+    def pending_customers(self):
+        """Customers with a customer_mapping_table month that has no final_computed_table row."""
+        return [self.customers[c] for c in np.unique(self.pending_keys >> _MONTH_BITS).tolist()]
+
+    def pending_months(self, customer):
+        """The customer's configured months without a final_computed_table row, oldest first (dates)."""
+        code = self.customer_codes.get(customer)
+        if code is None:
+            return []
+        keys = self.pending_keys[(self.pending_keys >> _MONTH_BITS) == code]
+        return [date.fromordinal(int(k & ((1 << _MONTH_BITS) - 1))) for k in keys.tolist()]
+
+    def _csm_mask(self, csm):
+        code = self.csm_codes.get(csm)
+        if code is None:
+            return np.zeros(len(self.customer), dtype=bool)
+        return (self.arrays['csm_primary'] == code) | (self.arrays['csm_secondary'] == code)
+
+    def csm_months(self, csm):
+        """Months (dates, oldest first) with a row where csm is the primary or secondary CSM."""
+        return [date.fromordinal(m) for m in np.unique(self.month[self._csm_mask(csm)]).tolist()]
+
+    def csm_rows(self, csm, start, end, fields):
+        """Rows of the csm's customers from start to end, by customer then newest month first.
+
+        fields: [(column, key)] giving the dict keys of each row.
+        """
+        mask = self._csm_mask(csm) & (self.month >= start.toordinal()) & (self.month <= end.toordinal())
+        positions = np.flatnonzero(mask)
+        positions = positions[np.lexsort((-self.month[positions], self.customer[positions]))]
+        columns = [self._values(column, positions) for column, _ in fields]
+        keys = [key for _, key in fields]
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+    def customer_names(self):
+        """Customers with a final_computed_table row, in database order."""
+        return [self.customers[c] for c in self.blocks]
+
+    def csm_names(self):
+        codes = np.union1d(self.arrays['csm_primary'], self.arrays['csm_secondary'])
+        return [self.csms[c] for c in codes.tolist() if c >= 0]
+
+    def months(self):
+        """Months with any row, newest first (dates)."""
+        return [date.fromordinal(m) for m in sorted(self.month_rows, reverse=True)]
+
+
+class ColumnarReplica:
+    """The current Snapshot, loaded on first use and swapped whole on every change.
+
+    enabled=False turns every read into None, so callers fall back to SQL. A change that
+    arrives while a load is running may be missing from what the load read, so it marks
+    the loaded snapshot stale (reloaded on the next read) instead of being dropped.
+    """
+
+    def __init__(self, enabled=True, ttl=DEFAULT_TTL_SECONDS):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._write_lock = threading.Lock()  # serialises loads and refreshes
+        self._state_lock = threading.Lock()  # guards the flags below; never held while reading
+        self._snapshot = None
+        self._stale = False
+        self._loading = False
+        self._missed = False  # a change arrived during the running load
+
+    def _fresh(self, snapshot):
+        return snapshot is not None and not self._stale and time.monotonic() - snapshot.loaded_at < self.ttl
+
+    def loaded(self):
+        return self._snapshot is not None
+
+    def current(self, connect):
+        """The current snapshot, (re)loaded with connect() when missing or stale; None if disabled or
+        no connection is available."""
+        if not self.enabled:
+            return None
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            return snapshot
+        conn = connect()
+        if not conn:
+            return None
+        try:
+            return self.load(conn)
+        finally:
+            conn.close()
+
+    def load(self, conn):
+        with self._write_lock:
+            if self._fresh(self._snapshot):
+                return self._snapshot
+            with self._state_lock:
+                self._loading, self._missed = True, False
+            try:
+                snapshot = Snapshot.load(conn)
+            finally:
+                with self._state_lock:
+                    self._loading = False
+                    missed = self._missed
+            self._snapshot, self._stale = snapshot, missed
+            return snapshot
+
+    def refresh(self, conn, customer):
+        """Re-read one customer into a new snapshot; marks the replica stale if that isn't possible."""
+        with self._write_lock:
+            if self._snapshot is None or self._stale:
+                return
+            try:
+                self._snapshot = self._snapshot.with_customer(conn, customer)
+            except NewNameError:
+                self._stale = True
+
+    def load_in_progress(self):
+        """True while a load runs; the change being applied then marks its snapshot stale."""
+        with self._state_lock:
+            if self._loading:
+                self._missed = True
+            return self._loading
+
+    def invalidate(self):
+        with self._state_lock:
+            self._stale = True
+            self._missed = True
+
+
+def update_hook(replica, connect):
+    """change_hooks hook applying a committed write to a loaded replica."""
+
+    def update_replica(change):
+        if replica.load_in_progress() or not replica.loaded():
+            return
+        if change.source in RELOAD_SOURCES:
+            replica.invalidate()
+            return
+        conn = connect()
+        if not conn:
+            replica.invalidate()
+            return
+        try:
+            replica.refresh(conn, change.customer)
+        except Exception:
+            replica.invalidate()
+            raise
+        finally:
+            conn.close()
+
+    return update_replica
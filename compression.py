@@ -0,0 +1,171 @@
+import threading
+import zlib
+
+from flask import abort, jsonify, request
+
+from instrumentation import internal_access_allowed, registry
+
+try:  # optional: brotli is only offered when the module is installed
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/css', 'text/csv', 'text/plain', 'text/javascript',
+                          'application/javascript', 'application/json'}
+MIN_SIZE = 1024                  # smaller bodies are sent as-is
+STREAM_THRESHOLD = 256 * 1024    # larger buffered bodies are compressed chunk by chunk
+CHUNK_SIZE = 64 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5               # dynamic responses: fast setting, still well ahead of gzip on HTML
+
+registry.describe('csm_response_bytes_total', 'counter',
+                  'Response body bytes by endpoint, before (raw) and after (sent) compression.')
+
+
+def _compressor(encoding):
+    """(compress(chunk), finish()) for a negotiated encoding."""
+    if encoding == 'br':
+        c = brotli.Compressor(quality=BROTLI_QUALITY)
+        return c.process, c.finish
+    c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    return c.compress, c.flush
+
+
+class SizeStats:
+    """Per-endpoint response counts and body bytes before/after compression, for /internal/size_report."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, encoding, raw_bytes, sent_bytes):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {'responses': 0, 'raw_bytes': 0, 'sent_bytes': 0,
+                                                          'encodings': {}})
+            stats['responses'] += 1
+            stats['raw_bytes'] += raw_bytes
+            stats['sent_bytes'] += sent_bytes
+            stats['encodings'][encoding] = stats['encodings'].get(encoding, 0) + 1
+        registry.inc('csm_response_bytes_total', raw_bytes, endpoint=endpoint, stage='raw')
+        registry.inc('csm_response_bytes_total', sent_bytes, endpoint=endpoint, stage='sent')
+
+    def report(self):
+        """{endpoint: totals plus mean sizes and the sent/raw ratio}, largest raw total first."""
+        with self._lock:
+            items = [(name, dict(stats, encodings=dict(stats['encodings'])))
+                     for name, stats in self._endpoints.items()]
+        report = {}
+        for name, stats in sorted(items, key=lambda item: -item[1]['raw_bytes']):
+            stats['mean_raw_bytes'] = stats['raw_bytes'] // stats['responses']
+            stats['mean_sent_bytes'] = stats['sent_bytes'] // stats['responses']
+            stats['ratio'] = round(stats['sent_bytes'] / stats['raw_bytes'], 3) if stats['raw_bytes'] else 1.0
+            report[name] = stats
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+size_stats = SizeStats()
+
+
+def negotiate(accept_encodings):
+    """Best encoding the client accepts ('br' or 'gzip'), or None for identity."""
+    offers = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return accept_encodings.best_match(offers)
+
+
+def _compress_stream(chunks, encoding, on_done):
+    """Compress an iterable of byte chunks lazily; on_done(raw, sent) runs once the body is consumed."""
+    compress, finish = _compressor(encoding)
+    raw = sent = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            raw += len(chunk)
+            out = compress(chunk)
+            if out:
+                sent += len(out)
+                yield out
+        out = finish()
+        sent += len(out)
+        yield out
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+        on_done(raw, sent)
+
+
+def _slices(body):
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start:start + CHUNK_SIZE]
+
+
+def _compressible(response):
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers or 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    return True
+
+
+def compress_response(response, endpoint):
+    """Compress a Flask response in place according to the request's Accept-Encoding."""
+    if not _compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+
+    if response.is_streamed or response.direct_passthrough:
+        if encoding is None or request.method == 'HEAD':
+            return response
+        body = response.response
+        response.direct_passthrough = False
+    else:
+        data = response.get_data()
+        if encoding is None or len(data) < MIN_SIZE:
+            size_stats.record(endpoint, 'identity', len(data), len(data))
+            return response
+        if len(data) <= STREAM_THRESHOLD:
+            compress, finish = _compressor(encoding)
+            compressed = compress(data) + finish()
+            response.set_data(compressed)
+            _mark_encoded(response, encoding)
+            size_stats.record(endpoint, encoding, len(data), len(compressed))
+            return response
+        body = _slices(data)
+
+    response.response = _compress_stream(
+        body, encoding, lambda raw, sent: size_stats.record(endpoint, encoding, raw, sent))
+    response.headers.pop('Content-Length', None)
+    _mark_encoded(response, encoding)
+    return response
+
+
+def _mark_encoded(response, encoding):
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # a compressed variant must not share the identity body's validator
+        response.set_etag(f'{etag}-{encoding}', weak=weak)
+
+
+def init_app(app, token=None):
+    """Compress HTML/JSON/CSV responses (gzip, or brotli when installed) and serve /internal/size_report
+    to callers presenting `token`."""
+
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, request.endpoint or 'unknown')
+
+    @app.route('/internal/size_report')
+    def internal_size_report():
+        """Per-endpoint response bytes before and after compression; needs the internal token."""
+        if not internal_access_allowed(token):
+            abort(404)
+        return jsonify(size_stats.report())
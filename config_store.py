@@ -0,0 +1,337 @@
+"""
+Effective-dated customer configuration: one row per change instead of a copy per month.
+
+customer_config_versions holds a customer's configuration (names, CSMs, environment and
+month counts, thresholds, colour rules, notes) with the first month it applies to. The
+configuration in force for a month is the latest version effective on or before it, so an
+unchanged customer needs one row however many months it has.
+
+ConfigStore.resolve() answers that from an in-memory copy of each customer's versions,
+loaded with one query and dropped when the customer's configuration is written (see
+invalidation_hook) or after `ttl` seconds, which bounds staleness after writes from other
+workers.
+
+customer_mapping_table is still the table written, with a row per month: it records which
+months exist and keeps older readers (fetch_data, imports) working, so the versions are an
+index over it rather than a replacement and don't reduce storage. `--migrate` creates the
+versions table, backfills it and installs a trigger on customer_mapping_table that keeps
+it in line with every write, from the app or not, in the writing transaction. Until the
+trigger exists the same versions are derived from customer_mapping_table on each load.
+
+    python config_store.py --dsn "dbname=AutomationDB host=localhost user=me" --migrate
+    python config_store.py --dsn "..." --customer cust0001 --month 2025-08
+"""
+import argparse
+import bisect
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+DEFAULT_TTL_SECONDS = 60
+
+CONFIG_COLUMNS = [
+    'customer_full_name', 'csm_primary', 'csm_secondary', 'customer_uid',
+    'no_of_environments', 'no_of_months',
+    'color_map_thresholds_availability', 'color_map_thresholds_users', 'color_map_thresholds_storage',
+    'indicator_color_code_rules', 'circle_color_code_rules',
+    'notes_availability', 'notes_users', 'notes_storage', 'customer_note',
+]
+_COLUMNS = ', '.join(CONFIG_COLUMNS)
+_ROW = 'ROW(%s)' % _COLUMNS
+
+# Writes that change customer_mapping_table and so may change a customer's configuration
+# (the table name itself is the source of changes relayed by change_bus)
+CONFIG_SOURCES = {'save_config', 'insert_record', 'rollover', 'delete_record', 'customer_mapping_table'}
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS customer_config_versions (
+        customer_name                       TEXT NOT NULL,
+        effective_from                      DATE NOT NULL,
+        customer_full_name                  TEXT,
+        csm_primary                         TEXT,
+        csm_secondary                       TEXT,
+        customer_uid                        TEXT[] DEFAULT ARRAY[]::TEXT[],
+        no_of_environments                  INTEGER DEFAULT 2,
+        no_of_months                        INTEGER DEFAULT 6,
+        color_map_thresholds_availability   JSONB,
+        color_map_thresholds_users          JSONB,
+        color_map_thresholds_storage        JSONB,
+        indicator_color_code_rules          JSONB,
+        circle_color_code_rules             JSONB,
+        notes_availability                  JSONB,
+        notes_users                         JSONB,
+        notes_storage                       JSONB,
+        customer_note                       TEXT,
+        recorded_at                         TIMESTAMP DEFAULT now(),
+        PRIMARY KEY (customer_name, effective_from)
+    )
+"""
+
+_VERSIONS_SQL = f"""
+    SELECT effective_from, {_COLUMNS}
+    FROM customer_config_versions
+    WHERE customer_name = %(customer)s
+    ORDER BY effective_from
+"""
+
+# Months with their own customer_mapping_table row: the rows save_config edits
+_MONTHS_SQL = """
+    SELECT month_year FROM customer_mapping_table WHERE customer_name = %(customer)s
+"""
+
+# The same versions, derived from the per-month rows: keep a month only when its
+# configuration differs from the month before.
+_DERIVED_VERSIONS_SQL = f"""
+    SELECT effective_from, {_COLUMNS}
+    FROM (
+        SELECT month_year AS effective_from, {_COLUMNS},
+               ROW_NUMBER() OVER w = 1 OR {_ROW} IS DISTINCT FROM LAG({_ROW}) OVER w AS changed
+        FROM customer_mapping_table
+        WHERE customer_name = %(customer)s
+        WINDOW w AS (ORDER BY month_year)
+    ) m
+    WHERE changed
+    ORDER BY effective_from
+"""
+
+# Keep the configuration of the next configured month after %(month)s as it is: give it
+# its own version (copied from the one in force) before %(month)s gets a new one.
+_PIN_NEXT_SQL = f"""
+    INSERT INTO customer_config_versions (customer_name, effective_from, {_COLUMNS})
+    SELECT %(customer)s, nxt.month_year, {', '.join('v.' + c for c in CONFIG_COLUMNS)}
+    FROM (SELECT MIN(month_year) AS month_year FROM customer_mapping_table
+          WHERE customer_name = %(customer)s AND month_year > %(month)s) nxt
+    JOIN LATERAL (SELECT * FROM customer_config_versions
+                  WHERE customer_name = %(customer)s AND effective_from <= nxt.month_year
+                  ORDER BY effective_from DESC LIMIT 1) v ON true
+    ON CONFLICT (customer_name, effective_from) DO NOTHING
+"""
+
+_RECORD_SQL = f"""
+    INSERT INTO customer_config_versions (customer_name, effective_from, {_COLUMNS})
+    SELECT customer_name, month_year, {_COLUMNS}
+    FROM customer_mapping_table
+    WHERE customer_name = %(customer)s AND month_year = %(month)s
+    ON CONFLICT (customer_name, effective_from) DO UPDATE SET
+        {', '.join(f'{c} = EXCLUDED.{c}' for c in CONFIG_COLUMNS)},
+        recorded_at = now()
+"""
+
+# The month's row was deleted: its version goes, the months around it resolve as before.
+_DROP_UNCONFIGURED_SQL = """
+    DELETE FROM customer_config_versions v
+    WHERE v.customer_name = %(customer)s AND v.effective_from = %(month)s
+      AND NOT EXISTS (SELECT 1 FROM customer_mapping_table m
+                      WHERE m.customer_name = v.customer_name AND m.month_year = v.effective_from)
+"""
+
+# Drop versions identical to the one before them; the configuration in force is unchanged.
+_COMPACT_SQL = f"""
+    DELETE FROM customer_config_versions v
+    USING (
+        SELECT customer_name, effective_from,
+               {_ROW} IS NOT DISTINCT FROM LAG({_ROW}) OVER w AND ROW_NUMBER() OVER w > 1 AS redundant
+        FROM customer_config_versions
+        WHERE %(customer)s::text IS NULL OR customer_name = %(customer)s
+        WINDOW w AS (PARTITION BY customer_name ORDER BY effective_from)
+    ) d
+    WHERE d.redundant AND v.customer_name = d.customer_name AND v.effective_from = d.effective_from
+"""
+
+# What one written (customer, month) row changes in the versions; the trigger runs it per row
+_RECORD_MONTH_SQL = ';'.join([_PIN_NEXT_SQL, _RECORD_SQL, _DROP_UNCONFIGURED_SQL, _COMPACT_SQL])
+
+TRIGGER = 'csm_config_versions'
+
+_TRIGGER_SQL = f"""
+    CREATE OR REPLACE FUNCTION csm_record_config_month() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        changed_customer TEXT;
+        changed_month DATE;
+    BEGIN
+        FOR changed_customer, changed_month IN
+            SELECT OLD.customer_name, OLD.month_year WHERE TG_OP <> 'INSERT'
+            UNION
+            SELECT NEW.customer_name, NEW.month_year WHERE TG_OP <> 'DELETE'
+        LOOP
+            {_RECORD_MONTH_SQL.replace('%(customer)s', 'changed_customer').replace('%(month)s', 'changed_month')};
+        END LOOP;
+        RETURN NULL;
+    END
+    $$;
+    DROP TRIGGER IF EXISTS {TRIGGER} ON customer_mapping_table;
+    CREATE TRIGGER {TRIGGER} AFTER INSERT OR UPDATE OR DELETE ON customer_mapping_table
+        FOR EACH ROW EXECUTE PROCEDURE csm_record_config_month()
+"""
+
+_BACKFILL_SQL = f"""
+    INSERT INTO customer_config_versions (customer_name, effective_from, {_COLUMNS})
+    SELECT customer_name, month_year, {_COLUMNS}
+    FROM customer_mapping_table
+    WHERE %(customer)s::text IS NULL OR customer_name = %(customer)s
+"""
+
+
+def _as_date(month):
+    if month is None:
+        return None
+    if isinstance(month, datetime):
+        return month.date()
+    if isinstance(month, date):
+        return month
+    return datetime.strptime(str(month)[:10], '%Y-%m-%d').date()
+
+
+def has_versions_table(conn):
+    """True once migrate() has run: the versions table exists and its trigger keeps it current."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = %s"
+                    " AND tgrelid = 'customer_mapping_table'::regclass)", (TRIGGER,))
+        return cur.fetchone()[0]
+
+
+class ConfigStore:
+    """Per-customer cache of configuration versions with an effective-date resolver."""
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._customers = {}  # customer -> (loaded_at, [effective_from, ...], [config, ...], {configured month})
+        self._has_table = None
+
+    def _table_exists(self, conn):
+        # Checked until it is found, so a migration is picked up without a restart
+        if not self._has_table:
+            self._has_table = has_versions_table(conn)
+        return self._has_table
+
+    def _load(self, conn, customer):
+        cur = conn.cursor()
+        try:
+            sql = _VERSIONS_SQL if self._table_exists(conn) else _DERIVED_VERSIONS_SQL
+            cur.execute(sql, {'customer': customer})
+            names = [d[0] for d in cur.description]
+            rows = [dict(zip(names, row)) for row in cur.fetchall()]
+            cur.execute(_MONTHS_SQL, {'customer': customer})
+            months = frozenset(_as_date(row[0]) for row in cur.fetchall())
+        finally:
+            cur.close()
+        return [row.pop('effective_from') for row in rows], rows, months
+
+    def _entry(self, conn, customer):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._customers.get(customer)
+        if cached is not None and now - cached[0] < self.ttl:
+            return cached[1:]
+        entry = self._load(conn, customer)
+        with self._lock:
+            self._customers[customer] = (now,) + entry
+        return entry
+
+    def versions(self, conn, customer):
+        """([effective_from, ...], [config, ...]) for a customer, oldest first."""
+        starts, configs, _ = self._entry(conn, customer)
+        return starts, configs
+
+    def resolve(self, conn, customer, month=None, exact=False):
+        """Configuration in force for `month` (the latest one if None) as a dict, or None.
+
+        With exact=True, None unless `month` has its own customer_mapping_table row: the
+        metrics page edits that row, so it must not show a configuration save_config would
+        refuse to save. The dict has the CONFIG_COLUMNS keys plus effective_from; it is a
+        copy the caller may modify.
+        """
+        starts, configs, months = self._entry(conn, customer)
+        if not starts:
+            return None
+        month = _as_date(month)
+        if exact and month not in months:
+            return None
+        index = len(starts) - 1 if month is None else bisect.bisect_right(starts, month) - 1
+        if index < 0:
+            return None
+        config = copy.deepcopy(configs[index])
+        config['effective_from'] = starts[index]
+        return config
+
+    def invalidate(self, customer=None):
+        with self._lock:
+            if customer is None:
+                self._customers.clear()
+            else:
+                self._customers.pop(customer, None)
+
+
+configs = ConfigStore(int(os.environ.get('CSM_CONFIG_CACHE_TTL', DEFAULT_TTL_SECONDS)))
+
+
+def invalidation_hook(store):
+    """change_hooks hook dropping a customer's cached versions after a configuration write."""
+
+    def invalidate_config(change):
+        if change.source in CONFIG_SOURCES:
+            store.invalidate(change.customer)
+
+    return invalidate_config
+
+
+def migrate(conn, customer=None):
+    """Create customer_config_versions and its trigger and (re)build its rows from customer_mapping_table.
+
+    Every month's row is copied, then runs of identical months are collapsed to their first
+    month. Creating the trigger first locks out writers until the rebuild commits. Safe to
+    re-run; existing versions of the customers rebuilt are replaced. Returns the number of
+    versions kept.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(SCHEMA)
+        cur.execute(_TRIGGER_SQL)
+        params = {'customer': customer}
+        cur.execute("DELETE FROM customer_config_versions WHERE %(customer)s::text IS NULL OR customer_name = %(customer)s",
+                    params)
+        cur.execute(_BACKFILL_SQL, params)
+        cur.execute(_COMPACT_SQL, params)
+        cur.execute("SELECT COUNT(*) FROM customer_config_versions WHERE %(customer)s::text IS NULL OR customer_name = %(customer)s",
+                    params)
+        kept = cur.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', required=True, help='libpq connection string')
+    parser.add_argument('--migrate', action='store_true', help='create the versions table and its trigger and backfill it')
+    parser.add_argument('--customer', help='limit --migrate to one customer, or the customer to resolve')
+    parser.add_argument('--month', help='YYYY-MM: print the configuration in force for --customer')
+    args = parser.parse_args()
+
+    import psycopg2
+    conn = psycopg2.connect(args.dsn)
+    try:
+        if args.migrate:
+            kept = migrate(conn, args.customer)
+            print(f"customer_config_versions: {kept} versions")
+        if args.customer and args.month:
+            month = datetime.strptime(args.month[:7], '%Y-%m').date()
+            config = ConfigStore().resolve(conn, args.customer, month)
+            if config is None:
+                sys.exit(f"no configuration in force for {args.customer} in {month:%Y-%m}")
+            print(json.dumps(config, indent=2, default=str))
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import hashlib
+import hmac
+import os
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+from instrumentation import InstrumentedConnection, registry
+from request_logging import get_logger
+
+logger = get_logger('db_pool')
+
+DEFAULT_MAX_IDLE_PER_USER = 4
+DEFAULT_MAX_IDLE_TOTAL = 64
+DEFAULT_IDLE_TIMEOUT = 300
+DEFAULT_VERIFIED_TTL = 60
+DEFAULT_PING_AFTER = 30
+
+registry.describe('csm_db_pool_acquire_total', 'counter', 'Connection acquisitions by result (hit = reused idle connection, dead = parked one dropped).')
+registry.describe('csm_db_login_verify_total', 'counter', 'Login credential checks by result (cached = no handshake).')
+
+
+class PooledConnection(InstrumentedConnection):
+    """Instrumented connection whose close() hands it back to its pool instead of disconnecting."""
+
+    def close(self):
+        pool = getattr(self, '_pool', None)
+        if pool is None or self.closed:
+            return super().close()
+        pool.release(self)
+
+    def disconnect(self):
+        self._pool = None
+        super().close()
+
+    def execute_untimed(self, sql):
+        """Run pool housekeeping SQL without counting it as one of the request's statements."""
+        cur = psycopg2.extensions.connection.cursor(self)
+        try:
+            cur.execute(sql)
+        finally:
+            cur.close()
+
+
+class UserConnectionPool:
+    """Idle database connections kept per user, reused by that user's next requests.
+
+    Connections are opened with each user's own credentials, so the pool is keyed by
+    username plus an HMAC of the password (keyed with a per-process secret; plaintext
+    passwords are never used as dict keys). Idle connections are dropped after
+    `idle_timeout` seconds. verify() also remembers credentials it has checked for
+    `verified_ttl` seconds, so repeated logins don't each cost a handshake.
+
+    A parked connection is checked before reuse: if the server wrote to it while parked
+    (it was terminated, timed out or the server restarted) it is dropped, and one parked
+    longer than `ping_after` seconds must also answer SELECT 1. Failing ones are
+    disconnected and the next candidate (or a new connection) is used. release() runs
+    DISCARD ALL so no session state carries over to the next request.
+    """
+
+    def __init__(self, connect_kwargs, max_idle_per_user=DEFAULT_MAX_IDLE_PER_USER,
+                 max_idle_total=DEFAULT_MAX_IDLE_TOTAL, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 verified_ttl=DEFAULT_VERIFIED_TTL, ping_after=DEFAULT_PING_AFTER, application_name=None):
+        self.connect_kwargs = connect_kwargs
+        self.application_name = application_name  # callable evaluated per connection (e.g. per forked worker)
+        self.max_idle_per_user = max_idle_per_user
+        self.max_idle_total = max_idle_total
+        self.idle_timeout = idle_timeout
+        self.verified_ttl = verified_ttl
+        self.ping_after = ping_after
+        self._secret = os.urandom(32)
+        self._lock = threading.Lock()
+        self._idle = {}       # key -> [(connection, released_at), ...] (most recent last)
+        self._verified = {}   # key -> expires_at
+
+    def _key(self, username, password):
+        digest = hmac.new(self._secret, (password or '').encode('utf-8'), hashlib.sha256).hexdigest()
+        return username, digest
+
+    def _connect(self, username, password, key):
+        kwargs = dict(self.connect_kwargs)
+        if self.application_name is not None:
+            kwargs['application_name'] = self.application_name()
+        conn = psycopg2.connect(user=username, password=password, connection_factory=PooledConnection, **kwargs)
+        conn._pool = self
+        conn._pool_key = key
+        return conn
+
+    def _expire_idle(self, now):
+        """Drop idle connections past idle_timeout. Caller holds the lock; returns those to disconnect."""
+        stale = []
+        for key in list(self._idle):
+            fresh = []
+            for conn, released_at in self._idle[key]:
+                (fresh if now - released_at <= self.idle_timeout else stale).append((conn, released_at))
+            if fresh:
+                self._idle[key] = fresh
+            else:
+                del self._idle[key]
+        return [conn for conn, _ in stale]
+
+    def acquire(self, username, password):
+        """Return an idle connection for these credentials, or open a new one (raises psycopg2.Error)."""
+        key = self._key(username, password)
+        conn = None
+        while conn is None:
+            now = time.monotonic()
+            with self._lock:
+                stale = self._expire_idle(now)
+                idle = self._idle.get(key)
+                candidate = idle.pop() if idle else None
+                if idle == []:
+                    del self._idle[key]
+            _disconnect_all(stale)
+            if candidate is None:
+                break
+            if self._alive(*candidate, now):
+                conn = candidate[0]
+            else:
+                registry.inc('csm_db_pool_acquire_total', result='dead')
+                _disconnect_all([candidate[0]])
+        registry.inc('csm_db_pool_acquire_total', result='hit' if conn is not None else 'miss')
+        if conn is None:
+            conn = self._connect(username, password, key)
+        return conn
+
+    def _alive(self, conn, released_at, now):
+        """Whether a parked connection can be handed out (see the class docstring)."""
+        if conn.closed:
+            return False
+        try:
+            if select.select([conn], [], [], 0)[0]:
+                return False
+            if now - released_at > self.ping_after:
+                conn.execute_untimed('SELECT 1')
+                conn.rollback()
+        except (psycopg2.Error, OSError):
+            return False
+        return True
+
+    def release(self, conn):
+        """Park a connection for reuse; disconnect it if it can't be reset or the pool is full."""
+        try:
+            if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            conn.autocommit = True
+            conn.execute_untimed('DISCARD ALL')
+            conn.autocommit = False
+        except psycopg2.Error:
+            conn.disconnect()
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            stale = self._expire_idle(now)
+            idle = self._idle.setdefault(conn._pool_key, [])
+            total = sum(len(conns) for conns in self._idle.values())
+            if len(idle) < self.max_idle_per_user and total < self.max_idle_total:
+                idle.append((conn, now))
+                conn = None
+            elif not idle:
+                del self._idle[conn._pool_key]
+        _disconnect_all(stale)
+        if conn is not None:
+            conn.disconnect()
+
+    def verify(self, username, password):
+        """Check credentials through the pool; the connection opened to check them stays parked for reuse.
+
+        Raises psycopg2.Error for invalid credentials.
+        """
+        key = self._key(username, password)
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._verified.get(key)
+            if expires_at is not None and expires_at > now:
+                registry.inc('csm_db_login_verify_total', result='cached')
+                return
+        self.acquire(username, password).close()
+        registry.inc('csm_db_login_verify_total', result='connected')
+        with self._lock:
+            self._verified = {k: exp for k, exp in self._verified.items() if exp > now}
+            self._verified[key] = now + self.verified_ttl
+
+    def discard_user(self, username):
+        """Disconnect every idle connection and forget verified credentials of a user (e.g. on logout)."""
+        with self._lock:
+            conns = []
+            for key in [k for k in self._idle if k[0] == username]:
+                conns.extend(conn for conn, _ in self._idle.pop(key))
+            for key in [k for k in self._verified if k[0] == username]:
+                del self._verified[key]
+        _disconnect_all(conns)
+
+    def idle_count(self):
+        with self._lock:
+            return sum(len(conns) for conns in self._idle.values())
+
+
+def _disconnect_all(conns):
+    for conn in conns:
+        try:
+            conn.disconnect()
+        except Exception:
+            logger.debug('error closing pooled connection', exc_info=True)
@@ -0,0 +1,238 @@
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2.extensions
+from flask import Response, abort, g, has_request_context, request
+
+from request_logging import add_request_timing
+
+# Prometheus default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+class _Histogram:
+    """Cumulative histogram with count/sum, rendered in Prometheus text format."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe in-process store of counters and histograms keyed by labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._buckets = {}
+
+    def describe(self, name, kind, text, buckets=None):
+        self._help[name] = (kind, text)
+        if buckets:
+            self._buckets[name] = buckets
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            hist.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self):
+        """Return every metric in Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.counts), h.count, h.sum, h.buckets)) for key, h in self._histograms.items()
+            )
+
+        lines = []
+        seen = set()
+
+        def header(name):
+            if name not in seen and name in self._help:
+                kind, text = self._help[name]
+                lines.append(f'# HELP {name} {text}')
+                lines.append(f'# TYPE {name} {kind}')
+            seen.add(name)
+
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+        for (name, labels), (counts, count, total, buckets) in histograms:
+            header(name)
+            for bound, bucket_count in zip(buckets, counts):
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", repr(bound)),))} {bucket_count}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total:.6f}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+registry = MetricsRegistry()
+registry.describe('csm_request_duration_seconds', 'histogram', 'Total request latency by endpoint.')
+registry.describe('csm_db_connect_seconds', 'histogram', 'Time to acquire a database connection.')
+registry.describe('csm_sql_query_duration_seconds', 'histogram', 'Duration of each SQL statement by endpoint.')
+registry.describe('csm_sql_queries_total', 'counter', 'Number of SQL statements executed by endpoint.')
+registry.describe('csm_sql_queries_per_request', 'histogram', 'SQL statements issued per request by endpoint.',
+                  buckets=COUNT_BUCKETS)
+registry.describe('csm_ppt_phase_seconds', 'histogram', 'PPT generation time split by phase.')
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'none'
+
+
+def record_connect(seconds):
+    """Record connection-acquire time for the current request/endpoint."""
+    registry.observe('csm_db_connect_seconds', seconds, endpoint=_endpoint())
+    if has_request_context():
+        g.db_connect_seconds = g.get('db_connect_seconds', 0.0) + seconds
+        add_request_timing('db_connect_ms', seconds * 1000)
+
+
+def record_query(seconds):
+    """Record one executed SQL statement for the current request/endpoint."""
+    endpoint = _endpoint()
+    registry.observe('csm_sql_query_duration_seconds', seconds, endpoint=endpoint)
+    registry.inc('csm_sql_queries_total', endpoint=endpoint)
+    if has_request_context():
+        g.sql_count = g.get('sql_count', 0) + 1
+        g.sql_seconds = g.get('sql_seconds', 0.0) + seconds
+
+
+@contextmanager
+def phase(name):
+    """Time a named phase (e.g. PPT fetch/prepare/render/save)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe('csm_ppt_phase_seconds', elapsed, phase=name)
+        if has_request_context():
+            g.setdefault('phases', []).append((name, elapsed))
+
+
+class _TimedCursorMixin:
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(time.perf_counter() - started)
+
+
+_timed_cursor_classes = {}
+
+
+def _timed_cursor_class(base):
+    cls = _timed_cursor_classes.get(base)
+    if cls is None:
+        cls = _timed_cursor_classes[base] = type(f'Timed{base.__name__}', (_TimedCursorMixin, base), {})
+    return cls
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection whose cursors (of any factory) time every statement."""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _timed_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+
+def _server_timing():
+    parts = [f'total;dur={(time.perf_counter() - g.instr_started) * 1000:.1f}']
+    if 'db_connect_seconds' in g:
+        parts.append(f'db-connect;dur={g.db_connect_seconds * 1000:.1f}')
+    if 'sql_count' in g:
+        parts.append(f'sql;dur={g.sql_seconds * 1000:.1f};desc="{g.sql_count} queries"')
+    for name, elapsed in g.get('phases', []):
+        parts.append(f'ppt-{name};dur={elapsed * 1000:.1f}')
+    return ', '.join(parts)
+
+
+def internal_access_allowed(token):
+    """Whether the request carries `Authorization: Bearer <token>`; never when no token is configured.
+
+    The caller's address proves nothing behind a reverse proxy, where every request comes from 127.0.0.1.
+    """
+    if not token:
+        return False
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(supplied.strip().encode(), token.encode())
+
+
+def init_app(app, token=None):
+    """Register request timing hooks, the Server-Timing header and /internal/metrics (answered given `token`)."""
+
+    @app.before_request
+    def _start_instrumentation():
+        g.instr_started = time.perf_counter()
+
+    @app.after_request
+    def _finish_instrumentation(response):
+        started = g.get('instr_started')
+        if started is None:
+            return response
+        endpoint = _endpoint()
+        registry.observe('csm_request_duration_seconds', time.perf_counter() - started,
+                         endpoint=endpoint, method=request.method, status=response.status_code)
+        registry.observe('csm_sql_queries_per_request', g.get('sql_count', 0), endpoint=endpoint)
+        if 'sql_count' in g:
+            add_request_timing('sql_count', g.sql_count)
+            add_request_timing('sql_ms', g.sql_seconds * 1000)
+        response.headers['Server-Timing'] = _server_timing()
+        return response
+
+    @app.route('/internal/metrics')
+    def internal_metrics():
+        """Prometheus scrape endpoint; only answered to callers presenting the internal token."""
+        if not internal_access_allowed(token):
+            abort(404)
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,59 @@
+"""
+Page parts every user's render needs that change far less often than they are read:
+the customer, CSM and month lists built from final_computed_table.
+
+Parts are kept in process and dropped after a write that can add or remove a customer,
+month or CSM (see invalidation_hook), or after `ttl` seconds, which bounds staleness
+after writes from other workers.
+"""
+import os
+import threading
+import time
+
+DEFAULT_TTL_SECONDS = 60
+
+# Writes that can change the customers, months or CSMs present in final_computed_table
+# (table names are the source of changes relayed by change_bus)
+LIST_SOURCES = {'save_config', 'insert_record', 'delete_record', 'rollover', 'bulk_import',
+                'final_computed_table', 'customer_mapping_table'}
+
+
+class PageCache:
+    """Named page parts with a shared expiry."""
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._parts = {}  # name -> (stored_at, value)
+
+    def get(self, name):
+        """The cached value of a part, or None if it is missing or expired."""
+        with self._lock:
+            cached = self._parts.get(name)
+        if cached is None or time.monotonic() - cached[0] >= self.ttl:
+            return None
+        return cached[1]
+
+    def put(self, name, value):
+        with self._lock:
+            self._parts[name] = (time.monotonic(), value)
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._parts.clear()
+            else:
+                self._parts.pop(name, None)
+
+
+pages = PageCache(int(os.environ.get('CSM_PAGE_CACHE_TTL', DEFAULT_TTL_SECONDS)))
+
+
+def invalidation_hook(cache):
+    """change_hooks hook dropping every cached part after a write that can change the lists."""
+
+    def invalidate_lists(change):
+        if change.source in LIST_SOURCES:
+            cache.invalidate()
+
+    return invalidate_lists
@@ -1,17 +1,33 @@
+import cProfile
 import math
+from collections import namedtuple
 import json
+import logging
 import os
+import time
+from contextlib import contextmanager, nullcontext
+from decimal import Decimal
+from io import BytesIO
+import numpy as np
 import pandas as pd
 import psycopg2
 from pptx import Presentation
 from pptx.chart.data import CategoryChartData
+from pptx.chart.xmlwriter import SeriesXmlRewriterFactory
 from pptx.dml.color import RGBColor
 from pptx.enum.chart import XL_TICK_LABEL_POSITION
 from pptx.enum.text import PP_ALIGN
+from pptx.shapes.shapetree import SlideShapeFactory
 from pptx.util import Pt, Cm
-from datetime import datetime
+from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 
+import config_store
+import window_cache
+
+# Child of the app logger so records share its JSON/queue handler when run under Flask
+logger = logging.getLogger('csm_report.ppt')
+
 TEMPLATE_CANDIDATES = [
     "ppt_template.pptx",
     "ppt-template.pptx",
@@ -54,38 +70,32 @@ def get_db_connection_for_ppt(username, password):
         )
         return conn
     except psycopg2.Error as e:
-        print(f"Error connecting to PostgreSQL: {e}")
+        logger.error('Error connecting to PostgreSQL: %s', e)
         return None
 
 def fetch_data(conn, customer_name, month_year):
-    """Fetches data from the database for a specific customer and month."""
+    """Fetches data from the database for a specific customer and month.
+
+    The customer config is the one in force for the month (config_store), returned as a
+    one-row frame for that month; the history window comes from its no_of_months and is
+    sliced from the customer's cached monthly series (window_cache).
+    """
     
     end_date = datetime.strptime(month_year, '%Y-%m-%d').date()
 
-    # Get the number of months for historical data from the customer_mapping_table
-    customer_mapping_sql = "SELECT no_of_months FROM customer_mapping_table WHERE customer_name = %s AND month_year = %s"
-    try:
-        customer_mapping_df = pd.read_sql(customer_mapping_sql, conn, params=(customer_name, end_date))
-        if customer_mapping_df.empty:
-            no_of_months = 6
-        else:
-            no_of_months = customer_mapping_df['no_of_months'].iloc[0]
-    except (IndexError, pd.errors.DatabaseError) as e:
-        print(f"Could not determine number of months, defaulting to 6. Error: {e}")
-        no_of_months = 6
+    config = config_store.configs.resolve(conn, customer_name, end_date)
+    if config is None:
+        raise ValueError(f"No configuration found for customer '{customer_name}' in {end_date:%Y-%m}.")
+    no_of_months = int(config['no_of_months'] or 6)
 
     # Calculate the start date for fetching historical data
     start_date = end_date - relativedelta(months=no_of_months - 1)
     
-    # Fetch data from both tables for the specified period
-    customer_mapping_sql = "SELECT * FROM customer_mapping_table WHERE customer_name = %s AND month_year BETWEEN %s AND %s"
-    final_computed_sql = "SELECT * FROM final_computed_table WHERE customer_name = %s AND month_year BETWEEN %s AND %s"
+    final_computed_df = window_cache.windows.frame(conn, customer_name, end_date, no_of_months)
 
-    customer_mapping_df = pd.read_sql(customer_mapping_sql, conn, params=(customer_name, start_date, end_date))
-    final_computed_df = pd.read_sql(final_computed_sql, conn, params=(customer_name, start_date, end_date))
-
-    if customer_mapping_df.empty or final_computed_df.empty:
+    if final_computed_df.empty:
         raise ValueError(f"No data found for customer '{customer_name}' between {start_date} and {end_date}.")
+    customer_mapping_df = pd.DataFrame([dict(config, customer_name=customer_name, month_year=end_date)])
     return customer_mapping_df, final_computed_df
 
 
@@ -272,6 +282,21 @@ def prepare_data_dictionary(customer_mapping_df, final_computed_df, month_year):
     }
 
 
+def serialize_data_dictionary(value):
+    """Convert a prepare_data_dictionary result to plain JSON types (numpy/Decimal/date values included)."""
+    if isinstance(value, dict):
+        return {str(k): serialize_data_dictionary(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [serialize_data_dictionary(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
 def delete_table_row(table, row_idx: int):
     """Deletes a row from a table."""
     tbl = table._tbl
@@ -279,207 +304,490 @@ def delete_table_row(table, row_idx: int):
     tbl.remove(tr)
 
 
-def generate_presentation(data, output_filename):
-    """Generates the PowerPoint presentation with the provided data."""
-    template_path = locate_ppt_template()
-    prs = Presentation(template_path)
-    
-    # ---Slide 1---
-    slide1_data = data["slide1"]
-    slide = prs.slides[0]
-    for shape in slide.shapes:
-        if shape.name == "Customer_Name" and shape.has_text_frame:
-            p = shape.text_frame.paragraphs[0]
-            p.text = slide1_data["Customer_Name"]
-            run = p.runs[0]
-            font = run.font
-            font.size = Pt(40)
-            font.color.rgb = RGBColor(255, 255, 255)
-        elif shape.name == "Month" and shape.has_text_frame:
-            p = shape.text_frame.paragraphs[0]
-            p.text = slide1_data["Month"]
-            run = p.runs[0]
-            font = run.font
-            font.size = Pt(18)
-            font.color.rgb = RGBColor(255, 255, 255)
-        elif shape.name == "CSM_Name" and shape.has_text_frame:
-            p = shape.text_frame.paragraphs[0]
-            p.text = slide1_data["CSM_Name"]
-            run = p.runs[0]
-            font = run.font
-            font.size = Pt(18)
-            font.color.rgb = RGBColor(255, 255, 255)
-
-    # ---Slide 2---
-    slide2_data = data["slide2"]
-    slide = prs.slides[1]
-    color_rules = slide2_data["Colour_Rules"]
-    circle_colors = slide2_data["Circle_Color"]
-    indicator_colors = slide2_data["Indicator"]
-    actual_val = float(slide2_data["Actual_Value"].replace('%', ''))
-    
-    if actual_val >= color_rules["Color1"]:
-        color_key = "Color1"
-    elif actual_val >= color_rules["Color2"]:
-        color_key = "Color2"
-    elif actual_val >= color_rules["Color3"]:
-        color_key = "Color3"
-    else:
-        color_key = "Invalid"
-    circle_rgb = circle_colors[color_key]
-    indicator_rgb = indicator_colors[color_key]
+class RenderProfile:
+    """Wall-clock timings for one deck: per slide (lap) and per chart/table fill (step)."""
 
-    for shape in slide.shapes:
-        if shape.name == "Target_Value" and shape.has_text_frame:
-            shape.text_frame.text = slide2_data["Target_Value"]
-        elif shape.name == "Actual_Value" and shape.has_text_frame:
-            shape.text_frame.text = slide2_data["Actual_Value"]
-        elif shape.name == "Circle_Color":
-            fill = shape.fill
-            fill.solid()
-            fill.fore_color.rgb = RGBColor(*circle_rgb)
-        elif shape.name == "Indicator":
-            fill = shape.fill
-            if fill.type == 3:
-                stops = fill.gradient_stops
-                if len(stops) >= 2:
-                    stops[0].color.rgb = RGBColor(*indicator_rgb)
-                    stops[1].color.rgb = RGBColor(255, 255, 255)
-        elif shape.name == "Production_Availability_Chart" and shape.has_chart:
+    def __init__(self):
+        self.timings = []
+        self._mark = time.perf_counter()
+
+    def lap(self, label):
+        """Record the time since the previous lap (or creation) under `label`."""
+        now = time.perf_counter()
+        self.timings.append((label, now - self._mark))
+        self._mark = now
+
+    @contextmanager
+    def step(self, label):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((label, time.perf_counter() - started))
+
+    def as_dict(self):
+        """Timings in milliseconds keyed by label (repeated labels are summed)."""
+        result = {}
+        for label, seconds in self.timings:
+            result[label] = round(result.get(label, 0.0) + seconds * 1000, 3)
+        return result
+
+
+class _NullProfile:
+    def lap(self, label):
+        pass
+
+    def step(self, label):
+        return nullcontext()
+
+
+_NULL_PROFILE = _NullProfile()
+
+
+@contextmanager
+def cprofiled(path):
+    """Run the enclosed block under cProfile and dump the stats to `path` (no-op if path is falsy)."""
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+CHART_MODE_FULL = 'full'
+CHART_MODE_FAST = 'fast'
+CHART_MODES = (CHART_MODE_FULL, CHART_MODE_FAST)
+
+# Charts whose data is replaced per deck (the only ones embed_chart_workbooks touches)
+FILLED_CHART_NAMES = (
+    "Production_Availability_Chart", "Production_User_Counts_Chart",
+    "Production_Storage_Usage_Chart", "Case_Trend_Chart",
+)
+
+
+class ChartPayload:
+    """CategoryChartData for one dataset plus its workbook blob, each built at most once per deck."""
+
+    def __init__(self, chart_data):
+        self.chart_data = chart_data
+        self._xlsx_blob = None
+
+    @property
+    def xlsx_blob(self):
+        if self._xlsx_blob is None:
+            self._xlsx_blob = self.chart_data.xlsx_blob
+        return self._xlsx_blob
+
+
+class ChartFiller:
+    """Fills template charts from CHART_SPECS for one deck.
+
+    Each dataset's payload is built once and applied to every chart showing it
+    (slide 7 repeats the slide 2-4 charts). The chart mode decides what is written:
+
+    full : series/category caches in the chart XML plus the embedded workbook
+           (what "Edit Data" opens in PowerPoint).
+    fast : only the series/category caches. The deck displays the same charts, but
+           the embedded workbook keeps the template's data until
+           embed_chart_workbooks() is run on the presentation.
+    """
+
+    def __init__(self, data, mode=CHART_MODE_FULL, env_count=None):
+        if mode not in CHART_MODES:
+            raise ValueError(f"Unknown chart mode: {mode!r}")
+        self.data = data
+        self.mode = mode
+        self.env_count = env_count
+        self._payloads = {}
+
+    def payload(self, dataset):
+        payload = self._payloads.get(dataset)
+        if payload is None:
+            slide_key, chart_key, build = CHART_DATASETS[dataset]
+            payload = self._payloads[dataset] = ChartPayload(build(self.data[slide_key][chart_key]))
+        return payload
+
+    def fill(self, shape):
+        spec = CHART_SPECS[shape.name]
+        chart = shape.chart
+        if spec.prepare:
+            spec.prepare(chart, self.env_count)
+        payload = self.payload(spec.dataset)
+        SeriesXmlRewriterFactory(chart.chart_type, payload.chart_data).replace_series_data(chart._chartSpace)
+        if self.mode == CHART_MODE_FULL:
+            chart._workbook.update_from_xlsx_blob(payload.xlsx_blob)
+        if spec.finish:
+            spec.finish(chart)
+
+
+def embed_chart_workbooks(prs, chart_names=FILLED_CHART_NAMES):
+    """Rebuild the embedded workbook of each filled chart from its XML caches.
+
+    Turns a deck rendered with CHART_MODE_FAST into one equivalent to CHART_MODE_FULL;
+    can be run right before save or later on a saved deck.
+    """
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if not shape.has_chart or shape.name not in chart_names:
+                continue
             chart = shape.chart
-            availability = [val / 100 for val in slide2_data["Production_Availability_Chart"]["Availability"]]
-            sla = [val / 100 for val in slide2_data["Production_Availability_Chart"]["SLA"]]
             chart_data = CategoryChartData()
-            chart_data.categories = slide2_data["Production_Availability_Chart"]["Months"]
-            chart_data.add_series("Availability", availability)
-            chart_data.add_series("SLA", sla)
-            chart.replace_data(chart_data)
-            
-            value_axis = chart.value_axis
-            value_axis.minimum_scale = 0.93
-            value_axis.maximum_scale = 1.0
-            value_axis.tick_labels.number_format = '0.00%'
-
+            chart_data.categories = list(chart.plots[0].categories)
             for series in chart.series:
-                if series.name == "Availability":
-                    series.has_data_labels = True
-                    series.data_labels.number_format = '0.00%'
-                    series.data_labels.show_value = True
-                else:
-                    series.has_data_labels = False
-        elif shape.name == "Notes_User_Input" and shape.has_text_frame:
-            # ---- Replace existing Notes_User_Input parsing with this ----
-            notes_data = slide2_data.get("Notes_User_Input")
-
-            # If DB returned a dict (jsonb -> Python dict), map it to the expected keys
-            if isinstance(notes_data, dict):
-                note_map = {
-                    "Color1": notes_data.get("color1") or notes_data.get("Color1") or "",
-                    "Color2": notes_data.get("color2") or notes_data.get("Color2") or "",
-                    "Color3": notes_data.get("color3") or notes_data.get("Color3") or "",
-                    "Invalid": notes_data.get("invalid") or notes_data.get("Invalid") or ""
-                }
-            # else:
-            #     # existing/robust fallback: try to parse string/list as before
-            #     try:
-            #         if isinstance(notes_data, str):
-            #             parsed = json.loads(notes_data)
-            #             if isinstance(parsed, dict):
-            #                 note_map = {
-            #                     "Color1": parsed.get("color1") or parsed.get("Color1") or "",
-            #                     "Color2": parsed.get("color2") or parsed.get("Color2") or "",
-            #                     "Color3": parsed.get("color3") or parsed.get("Color3") or "",
-            #                     "Invalid": parsed.get("invalid") or parsed.get("Invalid") or ""
-            #                 }
-            #             elif isinstance(parsed, list):
-            #                 note_list = parsed
-            #                 note_map = {
-            #                     "Color1": note_list[0] if len(note_list) > 0 else "",
-            #                     "Color2": note_list[1] if len(note_list) > 1 else "",
-            #                     "Color3": note_list[2] if len(note_list) > 2 else "",
-            #                     "Invalid": note_list[3] if len(note_list) > 3 else ""
-            #                 }
-            #             else:
-            #                 note_map = {"Color1": str(parsed), "Color2":"", "Color3":"", "Invalid":""}
-            #         elif isinstance(notes_data, list):
-            #             note_list = notes_data
-            #             note_map = {
-            #                 "Color1": note_list[0] if len(note_list) > 0 else "",
-            #                 "Color2": note_list[1] if len(note_list) > 1 else "",
-            #                 "Color3": note_list[2] if len(note_list) > 2 else "",
-            #                 "Invalid": note_list[3] if len(note_list) > 3 else ""
-            #             }
-            #         else:
-            #             # fallback: convert to string and put in Color1
-            #             note_map = {"Color1": str(notes_data or ""), "Color2":"", "Color3":"", "Invalid":""}
-            #     except Exception:
-            #         note_map = {"Color1":"","Color2":"","Color3":"","Invalid":""}
-
-            note_value = (note_map.get(color_key) or "").strip()
-
-            if not note_value:
-                continue
+                chart_data.add_series(series.name, series.values)
+            chart._workbook.update_from_xlsx_blob(chart_data.xlsx_blob)
+
+
+def generate_presentation(data, output_filename, profile=None, cprofile_path=None, chart_mode=CHART_MODE_FULL):
+    """Generates the PowerPoint presentation with the provided data.
+
+    profile       : optional RenderProfile collecting per-slide / per-fill timings
+    cprofile_path : if given, render+save run under cProfile and the stats are dumped there
+    chart_mode    : CHART_MODE_FULL or CHART_MODE_FAST (see ChartFiller)
+    """
+    with cprofiled(cprofile_path):
+        prs = render_presentation(data, profile, chart_mode)
+        prs.save(output_filename)
+        if profile is not None:
+            profile.lap('save')
+    logger.info('Presentation saved as %s', output_filename)
+
+
+class SlideShapes:
+    """Name -> shape lookup for one rendered slide, driven by the template's prebuilt index.
+
+    `positions` maps shape name to its child positions in the template slide's
+    spTree. Element references are captured when the slide is bound, so removing
+    one shape never shifts the lookup of another.
+    """
+
+    def __init__(self, slide, positions):
+        self.slide = slide
+        self._positions = positions
+        self._children = list(slide.shapes._spTree)
+
+    def each(self, name):
+        """Yield every shape on the slide named `name` (usually exactly one)."""
+        for pos in self._positions.get(name, ()):
+            yield SlideShapeFactory(self._children[pos], self.slide.shapes)
+
+    def remove(self, name):
+        """Remove every shape named `name` from the slide."""
+        sp_tree = self.slide.shapes._spTree
+        for pos in self._positions.get(name, ()):
+            element = self._children[pos]
+            if element.getparent() is sp_tree:
+                sp_tree.remove(element)
+
+
+# template path -> (mtime, template bytes, per-slide {shape name: [spTree child positions]})
+_template_cache = {}
+
+
+def _build_shape_index(slide):
+    sp_tree = slide.shapes._spTree
+    index = {}
+    for shape in slide.shapes:
+        index.setdefault(shape.name, []).append(sp_tree.index(shape._element))
+    return index
+
+
+def load_template():
+    """Return a fresh Presentation of the template plus its per-slide shape-name index.
+
+    The template bytes and index are read/built once and reused until the file changes.
+    """
+    template_path = locate_ppt_template()
+    mtime = os.path.getmtime(template_path)
+    cached = _template_cache.get(template_path)
+    if cached is None or cached[0] != mtime:
+        with open(template_path, 'rb') as fh:
+            blob = fh.read()
+        index = [_build_shape_index(slide) for slide in Presentation(BytesIO(blob)).slides]
+        cached = _template_cache[template_path] = (mtime, blob, index)
+    _, blob, index = cached
+    return Presentation(BytesIO(blob)), index
+
+
+def availability_color_key(actual_val, color_rules):
+    """Colour key for slide 2: higher availability is better."""
+    if actual_val >= color_rules["Color1"]:
+        return "Color1"
+    if actual_val >= color_rules["Color2"]:
+        return "Color2"
+    if actual_val >= color_rules["Color3"]:
+        return "Color3"
+    return "Invalid"
+
+
+def usage_color_key(used_prod, used_test, rules):
+    """Colour key for slides 3/4: the worse of Prod/Test %used decides."""
+    if used_prod >= rules["Color3"] or used_test >= rules["Color3"]:
+        return "Color3"
+    if used_prod >= rules["Color2"] or used_test >= rules["Color2"]:
+        return "Color2"
+    if used_prod >= rules["Color1"] or used_test >= rules["Color1"]:
+        return "Color1"
+    return "Invalid"
+
+
+def resolve_note(notes_data, color_key):
+    """Pick the note lines for `color_key` from the notes JSON (jsonb -> dict); [] if none."""
+    if not isinstance(notes_data, dict):
+        return []
+    note_map = {
+        "Color1": notes_data.get("color1") or notes_data.get("Color1") or "",
+        "Color2": notes_data.get("color2") or notes_data.get("Color2") or "",
+        "Color3": notes_data.get("color3") or notes_data.get("Color3") or "",
+        "Invalid": notes_data.get("invalid") or notes_data.get("Invalid") or ""
+    }
+    note_value = (note_map.get(color_key) or "").strip()
+    # convert escaped newlines to actual newlines
+    note_value = note_value.replace("\\n", "\n")
+    return [line.strip() for line in note_value.split("\n") if line.strip()]
+
+
+def availability_status(slide2_data):
+    """Colour key of the availability slide (slide 2), as rendered."""
+    actual_val = float(slide2_data["Actual_Value"].replace('%', ''))
+    return availability_color_key(actual_val, slide2_data["Colour_Rules"])
+
+
+def usage_status(slide_data, table_key):
+    """(colour key, Prod red, Test red) of a usage slide (3/4) from its table's %Used column."""
+    rows = slide_data[table_key]["rows"]
+    used_prod = float(rows[0][4])
+    used_test = float(rows[1][4])
+    rules = slide_data["Colour_Rules"]
+    return usage_color_key(used_prod, used_test, rules), used_prod >= rules["Color3"], used_test >= rules["Color3"]
+
+
+# status slide -> its utilization table (None: availability slide)
+STATUS_SLIDES = {
+    "slide2": None,
+    "slide3": "User_License_Utilization_Table",
+    "slide4": "Storage_Utilization_Table",
+}
+
+
+def build_preview(data):
+    """JSON-ready slide data plus, per status slide, the colour key, colours and notes the deck would use.
+
+    slide7 is left out: it repeats the slide 2-4 charts.
+    """
+    preview = serialize_data_dictionary({k: v for k, v in data.items() if k != "slide7"})
+    status = {}
+    for slide_key, table_key in STATUS_SLIDES.items():
+        slide_data = data[slide_key]
+        entry = {}
+        if table_key is None:
+            color_key = availability_status(slide_data)
+        else:
+            color_key, entry["prod_red"], entry["test_red"] = usage_status(slide_data, table_key)
+        entry.update({
+            "color_key": color_key,
+            "circle_color": slide_data["Circle_Color"][color_key],
+            "indicator_color": slide_data["Indicator"][color_key],
+            "notes": resolve_note(slide_data.get("Notes_User_Input"), color_key),
+        })
+        status[slide_key] = entry
+    preview["status"] = serialize_data_dictionary(status)
+    return preview
+
+
+def _set_text_run(shape, text, size, color=RGBColor(255, 255, 255)):
+    p = shape.text_frame.paragraphs[0]
+    p.text = text
+    font = p.runs[0].font
+    font.size = Pt(size)
+    font.color.rgb = color
+
+
+def _fill_notes(shapes, notes_data, color_key):
+    lines = resolve_note(notes_data, color_key)
+    if not lines:
+        return
+    for shape in shapes.each("Notes_User_Input"):
+        if not shape.has_text_frame:
+            continue
+        shape.text_frame.text = ""
+        shape.text_frame.word_wrap = True
+        for i, line in enumerate(lines):
+            p = shape.text_frame.paragraphs[0] if i == 0 else shape.text_frame.add_paragraph()
+            p.text = line
+            run = p.runs[0] if p.runs else p.add_run()
+            font = run.font
+            font.size = Pt(16)
+            font.color.rgb = RGBColor(0, 0, 0)
+
+
+def _fill_status_colors(shapes, circle_rgb, indicator_rgb):
+    for shape in shapes.each("Circle_Color"):
+        fill = shape.fill
+        fill.solid()
+        fill.fore_color.rgb = RGBColor(*circle_rgb)
+    for shape in shapes.each("Indicator"):
+        fill = shape.fill
+        if fill.type == 3:
+            stops = fill.gradient_stops
+            if len(stops) >= 2:
+                stops[0].color.rgb = RGBColor(*indicator_rgb)
+                stops[1].color.rgb = RGBColor(255, 255, 255)
+
+
+def _fill_header_row(table, headers, center=True):
+    for col_idx, header in enumerate(headers):
+        cell = table.cell(0, col_idx)
+        cell.text = str(header)
+        p = cell.text_frame.paragraphs[0]
+        p.font.size = Pt(12)
+        p.font.bold = True
+        if center:
+            p.alignment = PP_ALIGN.CENTER
+
+
+def _trim_table_rows(table, needed_data_rows):
+    rows_to_delete = len(table.rows) - 1 - needed_data_rows
+    for _ in range(max(rows_to_delete, 0)):
+        delete_table_row(table, len(table.rows) - 1)
+
+
+def _apply_env_layout(shapes, env_count, is_prod_red, is_test_red):
+    """Prod/Test/Dev labels and tick/cross icons shared by slides 3 and 4."""
+    for shape in shapes.each("Prod_Test"):
+        if shape.has_text_frame:
+            shape.height = Cm(3.42 if env_count >= 3 else 2.22)
+    if env_count < 3:
+        shapes.remove("Dev_Value")
+    if env_count == 2:
+        shapes.remove("Dev_Text")
+    # Hide the tick if red, otherwise hide the cross
+    shapes.remove("Prod_Value" if is_prod_red else "Prod_Value_Cross")
+    shapes.remove("Test_Value" if is_test_red else "Test_Value_Cross")
+
+
+def _availability_chart_data(chart_data_dict):
+    chart_data = CategoryChartData()
+    chart_data.categories = chart_data_dict["Months"]
+    chart_data.add_series("Availability", [val / 100 for val in chart_data_dict["Availability"]])
+    chart_data.add_series("SLA", [val / 100 for val in chart_data_dict["SLA"]])
+    return chart_data
+
+
+def _series_chart_data(chart_data_dict):
+    """One series per key other than "Months", in dict order."""
+    chart_data = CategoryChartData()
+    chart_data.categories = chart_data_dict["Months"]
+    for series_name, values in chart_data_dict.items():
+        if series_name != "Months":
+            chart_data.add_series(series_name, values)
+    return chart_data
+
+
+def _format_availability_chart(chart):
+    value_axis = chart.value_axis
+    value_axis.minimum_scale = 0.93
+    value_axis.maximum_scale = 1.0
+    value_axis.tick_labels.number_format = '0.00%'
+
+    for series in chart.series:
+        if series.name == "Availability":
+            series.has_data_labels = True
+            series.data_labels.number_format = '0.00%'
+            series.data_labels.show_value = True
+        else:
+            series.has_data_labels = False
+
 
-            # convert escaped newlines to actual newlines and set paragraphs (your existing logic)
-            note_value = note_value.replace("\\n", "\n")
-            lines = [line.strip() for line in note_value.split("\n") if line.strip()]
+def _drop_dev_series(chart, env_count):
+    if env_count != 2:
+        return
+    # Remove the Dev series via XML
+    plot = chart.plots[0]
+    for idx, s in enumerate(list(plot.series)):
+        if s.name == "Dev":
+            ser_element = plot._element.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/chart}ser')[idx]
+            plot._element.remove(ser_element)
+            break
 
-            shape.text_frame.text = ""
-            shape.text_frame.word_wrap = True
 
-            for i, line in enumerate(lines):
-                p = shape.text_frame.paragraphs[0] if i == 0 else shape.text_frame.add_paragraph()
-                p.text = line
-                run = p.runs[0] if p.runs else p.add_run()
-                font = run.font
-                font.size = Pt(16)
-                font.color.rgb = RGBColor(0, 0, 0)
+def _storage_tick_labels_low(chart, env_count):
+    chart.value_axis.tick_label_position = XL_TICK_LABEL_POSITION.LOW
 
 
-    # ---Slide 3---
-    slide3_data = data["slide3"]
-    slide = prs.slides[2]
+def _format_storage_chart(chart):
+    for s in chart.plots[0].series:
+        if s.name == "Prod (GB)":
+            s.data_labels.number_format = '#,##0'
+            break
+
+
+# dataset -> (slide key, chart key, CategoryChartData builder). Slide 7 shows the
+# same datasets as slides 2-4, so they are read from their primary slide only.
+CHART_DATASETS = {
+    'availability': ("slide2", "Production_Availability_Chart", _availability_chart_data),
+    'user_counts': ("slide3", "Production_User_Counts_Chart", _series_chart_data),
+    'storage': ("slide4", "Production_Storage_Usage_Chart", _series_chart_data),
+    'case_trend': ("slide5", "Case_Trend_Chart", _series_chart_data),
+}
+
+# chart shape name -> dataset plus optional prepare(chart, env_count) / finish(chart) formatting
+ChartSpec = namedtuple('ChartSpec', ['dataset', 'prepare', 'finish'])
+CHART_SPECS = {
+    "Production_Availability_Chart": ChartSpec('availability', None, _format_availability_chart),
+    "Production_User_Counts_Chart": ChartSpec('user_counts', _drop_dev_series, None),
+    "Production_Storage_Usage_Chart": ChartSpec('storage', _storage_tick_labels_low, _format_storage_chart),
+    "Case_Trend_Chart": ChartSpec('case_trend', None, None),
+}
+
+
+def _fill_charts(shapes, slide_label, chart_names, charts, profile):
+    for name in chart_names:
+        for shape in shapes.each(name):
+            if shape.has_chart:
+                with profile.step(f'{slide_label}.{name}'):
+                    charts.fill(shape)
+
+
+def _fill_slide1(shapes, slide1_data, profile):
+    for name, size in (("Customer_Name", 40), ("Month", 18), ("CSM_Name", 18)):
+        for shape in shapes.each(name):
+            if shape.has_text_frame:
+                _set_text_run(shape, slide1_data[name], size)
+
+
+def _fill_slide2(shapes, slide2_data, profile, charts):
+    color_key = availability_status(slide2_data)
+
+    for shape in shapes.each("Target_Value"):
+        if shape.has_text_frame:
+            shape.text_frame.text = slide2_data["Target_Value"]
+    for shape in shapes.each("Actual_Value"):
+        if shape.has_text_frame:
+            shape.text_frame.text = slide2_data["Actual_Value"]
+    _fill_status_colors(shapes, slide2_data["Circle_Color"][color_key], slide2_data["Indicator"][color_key])
+    _fill_charts(shapes, 'slide2', ("Production_Availability_Chart",), charts, profile)
+    _fill_notes(shapes, slide2_data.get("Notes_User_Input"), color_key)
+
+
+def _fill_slide3(shapes, slide3_data, profile, charts):
     env_count = slide3_data.get("env_count")
     headers = slide3_data["User_License_Utilization_Table"]["headers"]
     rows = slide3_data["User_License_Utilization_Table"]["rows"]
-    used_val = float(rows[0][4])
-    used_test = float(rows[1][4])
-    rules = slide3_data["Colour_Rules"]
-    
-    if used_val >= rules["Color3"] or used_test >= rules["Color3"]:
-        color_key = "Color3"
-    elif used_val >= rules["Color2"] or used_test >= rules["Color2"]:
-        color_key = "Color2"
-    elif used_val >= rules["Color1"] or used_test >= rules["Color1"]:
-        color_key = "Color1"
-    else:
-        color_key = "Invalid"
-    circle_rgb = slide3_data["Circle_Color"][color_key]
-    indicator_rgb = slide3_data["Indicator"][color_key]
-
-    #circle_rgb = tuple(int(x) for x in circle_rgb)
-    #is_red = (circle_rgb[0] >= 200 and circle_rgb[1] <= 80 and circle_rgb[2] <= 80)
-    #is_red = (color_key == "Color3")
-    
-    # Determine "red" status for Prod and Test individually
-    is_prod_red = used_val >= rules["Color3"]
-    is_test_red = used_test >= rules["Color3"]
+    color_key, is_prod_red, is_test_red = usage_status(slide3_data, "User_License_Utilization_Table")
 
-    shapes_to_remove = []
-
-    for shape in slide.shapes:
-        if shape.name == "User_License_Utilization_Table" and shape.has_table:
+    for shape in shapes.each("User_License_Utilization_Table"):
+        if not shape.has_table:
+            continue
+        with profile.step('slide3.User_License_Utilization_Table'):
             table = shape.table
-
-            for col_idx, header in enumerate(headers):
-                cell = table.cell(0, col_idx)
-                cell.text = str(header)
-                p = cell.text_frame.paragraphs[0]
-                p.font.size = Pt(12)
-                p.font.bold = True
-                p.alignment = PP_ALIGN.CENTER
-            
-            for row_idx, row_data in enumerate(rows, start = 1):
+            _fill_header_row(table, headers)
+            for row_idx, row_data in enumerate(rows, start=1):
                 for col_idx, cell_data in enumerate(row_data):
                     cell = table.cell(row_idx, col_idx)
                     if col_idx == len(row_data) - 1:
@@ -489,196 +797,32 @@ def generate_presentation(data, output_filename):
                     p = cell.text_frame.paragraphs[0]
                     p.font.size = Pt(12)
                     p.alignment = PP_ALIGN.RIGHT
-            
-            total_rows_in_table = len(table.rows)
-            needed_data_rows = len(rows)
-            rows_to_delete = total_rows_in_table - 1 - needed_data_rows
-            if rows_to_delete > 0:
-                for _ in range(rows_to_delete):
-                    delete_table_row(table, len(table.rows) - 1)
-        
-        elif shape.name == "Production_User_Counts_Chart" and shape.has_chart:
-            chart = shape.chart
-            chart_data = CategoryChartData()
-            chart_data.categories = slide3_data["Production_User_Counts_Chart"]["Months"]
-            if env_count == 2:
-                plot = chart.plots[0]
-                series_list = list(plot.series)
-                for idx, s in enumerate(series_list):
-                    if s.name == "Dev":
-                         # Remove via XML
-                            ser_element = plot._element.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/chart}ser')[idx]
-                            plot._element.remove(ser_element)
-                            break
-            
-            chart_data.categories = slide3_data["Production_User_Counts_Chart"]["Months"]
-            
-            for series_name, values in slide3_data["Production_User_Counts_Chart"].items():
-                if series_name != "Months":
-                    chart_data.add_series(series_name, values)
-            chart.replace_data(chart_data)
-        
-        elif shape.name == "Circle_Color":
-            fill = shape.fill
-            fill.solid()
-            fill.fore_color.rgb = RGBColor(*circle_rgb)
-
-        elif shape.name == "Indicator":
-            fill = shape.fill
-            if fill.type == 3:
-                stops = fill.gradient_stops
-                if len(stops) >= 2:
-                    stops[0].color.rgb = RGBColor(*indicator_rgb)
-                    stops[1].color.rgb = RGBColor(255, 255, 255)
-
-        elif shape.name == "Notes_User_Input" and shape.has_text_frame:
-                        # ---- Replace existing Notes_User_Input parsing with this ----
-            notes_data = slide3_data.get("Notes_User_Input")
-
-            # If DB returned a dict (jsonb -> Python dict), map it to the expected keys
-            if isinstance(notes_data, dict):
-                note_map = {
-                    "Color1": notes_data.get("color1") or notes_data.get("Color1") or "",
-                    "Color2": notes_data.get("color2") or notes_data.get("Color2") or "",
-                    "Color3": notes_data.get("color3") or notes_data.get("Color3") or "",
-                    "Invalid": notes_data.get("invalid") or notes_data.get("Invalid") or ""
-                }
-            # else:
-            #     # existing/robust fallback: try to parse string/list as before
-            #     try:
-            #         if isinstance(notes_data, str):
-            #             parsed = json.loads(notes_data)
-            #             if isinstance(parsed, dict):
-            #                 note_map = {
-            #                     "Color1": parsed.get("color1") or parsed.get("Color1") or "",
-            #                     "Color2": parsed.get("color2") or parsed.get("Color2") or "",
-            #                     "Color3": parsed.get("color3") or parsed.get("Color3") or "",
-            #                     "Invalid": parsed.get("invalid") or parsed.get("Invalid") or ""
-            #                 }
-            #             elif isinstance(parsed, list):
-            #                 note_list = parsed
-            #                 note_map = {
-            #                     "Color1": note_list[0] if len(note_list) > 0 else "",
-            #                     "Color2": note_list[1] if len(note_list) > 1 else "",
-            #                     "Color3": note_list[2] if len(note_list) > 2 else "",
-            #                     "Invalid": note_list[3] if len(note_list) > 3 else ""
-            #                 }
-            #             else:
-            #                 note_map = {"Color1": str(parsed), "Color2":"", "Color3":"", "Invalid":""}
-            #         elif isinstance(notes_data, list):
-            #             note_list = notes_data
-            #             note_map = {
-            #                 "Color1": note_list[0] if len(note_list) > 0 else "",
-            #                 "Color2": note_list[1] if len(note_list) > 1 else "",
-            #                 "Color3": note_list[2] if len(note_list) > 2 else "",
-            #                 "Invalid": note_list[3] if len(note_list) > 3 else ""
-            #             }
-            #         else:
-            #             # fallback: convert to string and put in Color1
-            #             note_map = {"Color1": str(notes_data or ""), "Color2":"", "Color3":"", "Invalid":""}
-            #     except Exception:
-            #         note_map = {"Color1":"","Color2":"","Color3":"","Invalid":""}
-
-            note_value = (note_map.get(color_key) or "").strip()
-
-            if not note_value:
-                continue
-
-            # convert escaped newlines to actual newlines and set paragraphs (your existing logic)
-            note_value = note_value.replace("\\n", "\n")
-            lines = [line.strip() for line in note_value.split("\n") if line.strip()]
-
-            shape.text_frame.text = ""
-            shape.text_frame.word_wrap = True
+            _trim_table_rows(table, len(rows))
 
-            for i, line in enumerate(lines):
-                p = shape.text_frame.paragraphs[0] if i == 0 else shape.text_frame.add_paragraph()
-                p.text = line
-                run = p.runs[0] if p.runs else p.add_run()
-                font = run.font
-                font.size = Pt(16)
-                font.color.rgb = RGBColor(0, 0, 0)
+    _fill_charts(shapes, 'slide3', ("Production_User_Counts_Chart",), charts, profile)
 
-        elif shape.name == "Prod_Test" and shape.has_text_frame:
-            shape.height = Cm(3.42 if env_count >= 3 else 2.22)
-
-        elif shape.name == "Dev_Value":
-            if env_count < 3:
-                slide.shapes._spTree.remove(shape._element)
-        
-        elif shape.name == "Dev_Text" and env_count == 2:
-            slide.shapes._spTree.remove(shape._element)
-
-        # --- Logic for Prod Tick/Cross ---
-        if is_prod_red:
-            if shape.name == "Prod_Value": # Hide tick if red
-                shapes_to_remove.append(shape)
-        else:
-            if shape.name == "Prod_Value_Cross": # Hide cross if not red
-                shapes_to_remove.append(shape)
+    _fill_status_colors(shapes, slide3_data["Circle_Color"][color_key], slide3_data["Indicator"][color_key])
+    _fill_notes(shapes, slide3_data.get("Notes_User_Input"), color_key)
+    _apply_env_layout(shapes, env_count, is_prod_red, is_test_red)
 
-        # --- Logic for Test Tick/Cross ---
-        if is_test_red:
-            if shape.name == "Test_Value": # Hide tick if red
-                shapes_to_remove.append(shape)
-        else:
-            if shape.name == "Test_Value_Cross": # Hide cross if not red
-                shapes_to_remove.append(shape)
 
-    # Remove collected shapes AFTER iterating (safe removal)
-    for sh in shapes_to_remove:
-        try:
-            slide.shapes._spTree.remove(sh._element)
-        except Exception:
-            # if removal fails for any reason, ignore (but optionally log)
-            pass
-    # Clear the list for safety if same var reused
-    shapes_to_remove.clear()
-
-    # ---Slide 4---
-    slide4_data = data["slide4"]
-    slide = prs.slides[3]
+def _fill_slide4(shapes, slide4_data, env_count, profile, charts):
     headers = slide4_data["Storage_Utilization_Table"]["headers"]
     rows = slide4_data["Storage_Utilization_Table"]["rows"]
-    used_val = float(rows[0][4])
-    used_test = float(rows[1][4])
-    rules = slide4_data["Colour_Rules"]
-    
-    if used_val >= rules["Color3"] or used_test >= rules["Color3"]:
-        color_key = "Color3"
-    elif used_val >= rules["Color2"] or used_test >= rules["Color2"]:
-        color_key = "Color2"
-    elif used_val >= rules["Color1"] or used_test >= rules["Color1"]:
-        color_key = "Color1"
-    else:
-        color_key = "Invalid"
-    circle_rgb = slide4_data["Circle_Color"][color_key]
-    indicator_rgb = slide4_data["Indicator"][color_key]
-
-    # Determine "red" status for Prod and Test individually
-    is_prod_red = used_val >= rules["Color3"]
-    is_test_red = used_test >= rules["Color3"]
-    shapes_to_remove = []
-
+    color_key, is_prod_red, is_test_red = usage_status(slide4_data, "Storage_Utilization_Table")
 
-    for shape in slide.shapes:
-        if shape.name == "Storage_Utilization_Table" and shape.has_table:
+    for shape in shapes.each("Storage_Utilization_Table"):
+        if not shape.has_table:
+            continue
+        with profile.step('slide4.Storage_Utilization_Table'):
             table = shape.table
-
-            for col_idx, header in enumerate(headers):
-                cell = table.cell(0, col_idx)
-                cell.text = str(header)
-                p = cell.text_frame.paragraphs[0]
-                p.font.size = Pt(12)
-                p.font.bold = True
-                p.alignment = PP_ALIGN.CENTER
-            
+            _fill_header_row(table, headers)
             for row_idx, row_data in enumerate(rows):
                 for col_idx, cell_data in enumerate(row_data):
                     cell = table.cell(row_idx + 1, col_idx)
                     is_percent_col = col_idx in [len(row_data) - 1, len(row_data) - 2]
                     if isinstance(cell_data, (int, float)) and is_percent_col:
-                         cell.text = f"{cell_data:.1f}%"
+                        cell.text = f"{cell_data:.1f}%"
                     elif isinstance(cell_data, (int, float)):
                         cell.text = f"{cell_data:,}"
                     else:
@@ -686,164 +830,25 @@ def generate_presentation(data, output_filename):
                     p = cell.text_frame.paragraphs[0]
                     p.font.size = Pt(12)
                     p.alignment = PP_ALIGN.RIGHT
-            
-            total_rows_in_table = len(table.rows)
-            needed_data_rows = len(rows)
-            rows_to_delete = total_rows_in_table - 1 - needed_data_rows
-            if rows_to_delete > 0:
-                for _ in range(rows_to_delete):
-                    delete_table_row(table, len(table.rows) - 1)
-        
-        elif shape.name == "Production_Storage_Usage_Chart" and shape.has_chart:
-            chart = shape.chart
-            chart.value_axis.tick_label_position = XL_TICK_LABEL_POSITION.LOW
-            chart_data = CategoryChartData()
-            chart_data.categories = slide4_data["Production_Storage_Usage_Chart"]["Months"]
-            for series_name, values in slide4_data["Production_Storage_Usage_Chart"].items():
-                if series_name != "Months":
-                    chart_data.add_series(series_name, values)
-            chart.replace_data(chart_data)
-        
-            for s in chart.plots[0].series:
-                if s.name == "Prod (GB)":
-                    s.data_labels.number_format = '#,##0'
-                    break
-        
-        elif shape.name == "Circle_Color":
-            fill = shape.fill
-            fill.solid()
-            fill.fore_color.rgb = RGBColor(*circle_rgb)
-        
-        elif shape.name == "Indicator":
-            fill = shape.fill
-            if fill.type == 3:
-                stops = fill.gradient_stops
-                if len(stops) >= 2:
-                    stops[0].color.rgb = RGBColor(*indicator_rgb)
-                    stops[1].color.rgb = RGBColor(255, 255, 255)
-        
-        elif shape.name == "Notes_User_Input" and shape.has_text_frame:
-                        # ---- Replace existing Notes_User_Input parsing with this ----
-            notes_data = slide4_data.get("Notes_User_Input")
-
-            # If DB returned a dict (jsonb -> Python dict), map it to the expected keys
-            if isinstance(notes_data, dict):
-                note_map = {
-                    "Color1": notes_data.get("color1") or notes_data.get("Color1") or "",
-                    "Color2": notes_data.get("color2") or notes_data.get("Color2") or "",
-                    "Color3": notes_data.get("color3") or notes_data.get("Color3") or "",
-                    "Invalid": notes_data.get("invalid") or notes_data.get("Invalid") or ""
-                }
-            #else:
-                # existing/robust fallback: try to parse string/list as before
-                # try:
-                #     if isinstance(notes_data, str):
-                #         parsed = json.loads(notes_data)
-                #         if isinstance(parsed, dict):
-                #             note_map = {
-                #                 "Color1": parsed.get("color1") or parsed.get("Color1") or "",
-                #                 "Color2": parsed.get("color2") or parsed.get("Color2") or "",
-                #                 "Color3": parsed.get("color3") or parsed.get("Color3") or "",
-                #                 "Invalid": parsed.get("invalid") or parsed.get("Invalid") or ""
-                #             }
-                #         elif isinstance(parsed, list):
-                #             note_list = parsed
-                #             note_map = {
-                #                 "Color1": note_list[0] if len(note_list) > 0 else "",
-                #                 "Color2": note_list[1] if len(note_list) > 1 else "",
-                #                 "Color3": note_list[2] if len(note_list) > 2 else "",
-                #                 "Invalid": note_list[3] if len(note_list) > 3 else ""
-                #             }
-                #         else:
-                #             note_map = {"Color1": str(parsed), "Color2":"", "Color3":"", "Invalid":""}
-                #     elif isinstance(notes_data, list):
-                #         note_list = notes_data
-                #         note_map = {
-                #             "Color1": note_list[0] if len(note_list) > 0 else "",
-                #             "Color2": note_list[1] if len(note_list) > 1 else "",
-                #             "Color3": note_list[2] if len(note_list) > 2 else "",
-                #             "Invalid": note_list[3] if len(note_list) > 3 else ""
-                #         }
-                #     else:
-                #         # fallback: convert to string and put in Color1
-                #         note_map = {"Color1": str(notes_data or ""), "Color2":"", "Color3":"", "Invalid":""}
-                # except Exception:
-                #     note_map = {"Color1":"","Color2":"","Color3":"","Invalid":""}
-
-            note_value = (note_map.get(color_key) or "").strip()
-
-            if not note_value:
-                continue
-
-            # convert escaped newlines to actual newlines and set paragraphs (your existing logic)
-            note_value = note_value.replace("\\n", "\n")
-            lines = [line.strip() for line in note_value.split("\n") if line.strip()]
+            _trim_table_rows(table, len(rows))
 
-            shape.text_frame.text = ""
-            shape.text_frame.word_wrap = True
+    _fill_charts(shapes, 'slide4', ("Production_Storage_Usage_Chart",), charts, profile)
 
-            for i, line in enumerate(lines):
-                p = shape.text_frame.paragraphs[0] if i == 0 else shape.text_frame.add_paragraph()
-                p.text = line
-                run = p.runs[0] if p.runs else p.add_run()
-                font = run.font
-                font.size = Pt(16)
-                font.color.rgb = RGBColor(0, 0, 0)
-
-       
-        elif shape.name == "Prod_Test" and shape.has_text_frame:
-            shape.height = Cm(3.42 if env_count >= 3 else 2.22)
-       
-        elif shape.name == "Dev_Value":
-            if env_count < 3:
-                slide.shapes._spTree.remove(shape._element)
-       
-        elif shape.name == "Dev_Text" and env_count == 2:
-            slide.shapes._spTree.remove(shape._element)
-
-        # --- Logic for Prod Tick/Cross ---
-        if is_prod_red:
-            if shape.name == "Prod_Value": # Hide tick if red
-                shapes_to_remove.append(shape)
-        else:
-            if shape.name == "Prod_Value_Cross": # Hide cross if not red
-                shapes_to_remove.append(shape)
+    _fill_status_colors(shapes, slide4_data["Circle_Color"][color_key], slide4_data["Indicator"][color_key])
+    _fill_notes(shapes, slide4_data.get("Notes_User_Input"), color_key)
+    _apply_env_layout(shapes, env_count, is_prod_red, is_test_red)
 
-        # --- Logic for Test Tick/Cross ---
-        if is_test_red:
-            if shape.name == "Test_Value": # Hide tick if red
-                shapes_to_remove.append(shape)
-        else:
-            if shape.name == "Test_Value_Cross": # Hide cross if not red
-                shapes_to_remove.append(shape)
 
-    # Remove collected shapes AFTER iterating (safe removal)
-    for sh in shapes_to_remove:
-        try:
-            slide.shapes._spTree.remove(sh._element)
-        except Exception:
-            # if removal fails for any reason, ignore (but optionally log)
-            pass
-    # Clear the list for safety if same var reused
-    shapes_to_remove.clear()
-
-    # ---Slide 5---
-    slide5_data = data["slide5"]
-    slide = prs.slides[4]
+def _fill_slide5(shapes, slide5_data, profile, charts):
     headers = slide5_data["Case_Status_Table"]["headers"]
     rows = slide5_data["Case_Status_Table"]["rows"]
-    
-    for shape in slide.shapes:
-        if shape.name == "Case_Status_Table" and shape.has_table:
-            table = shape.table
-
-            for col_idx, header in enumerate(headers):
-                cell = table.cell(0, col_idx)
-                cell.text = str(header)
-                p = cell.text_frame.paragraphs[0]
-                p.font.size = Pt(12)
-                p.font.bold = True
 
+    for shape in shapes.each("Case_Status_Table"):
+        if not shape.has_table:
+            continue
+        with profile.step('slide5.Case_Status_Table'):
+            table = shape.table
+            _fill_header_row(table, headers, center=False)
             for row_idx, row_data in enumerate(rows):
                 for col_idx, cell_data in enumerate(row_data):
                     cell = table.cell(row_idx + 1, col_idx)
@@ -851,84 +856,38 @@ def generate_presentation(data, output_filename):
                     p = cell.text_frame.paragraphs[0]
                     p.font.size = Pt(12)
 
-        elif shape.name == "Case_Trend_Chart" and shape.has_chart:
-            chart = shape.chart
-            chart_data = CategoryChartData()
-            chart_data.categories = slide5_data["Case_Trend_Chart"]["Months"]
-            for series_name, values in slide5_data["Case_Trend_Chart"].items():
-                if series_name != "Months":
-                    chart_data.add_series(series_name, values)
-            chart.replace_data(chart_data)
-
-        elif shape.name == "Open_Cases_Value" and shape.has_text_frame:
-            p = shape.text_frame.paragraphs[0]
-            p.text = str(slide5_data["Open_Cases_Value"])
-            run = p.runs[0]
-            font = run.font
-            font.size = Pt(40)
-            font.color.rgb = RGBColor(255, 255, 255)
+    _fill_charts(shapes, 'slide5', ("Case_Trend_Chart",), charts, profile)
 
-    # ---Slide 7---
-    slide7_data = data["slide7"]
-    slide = prs.slides[6]
-    for shape in slide.shapes:
-        if shape.name == "Production_Availability_Chart" and shape.has_chart:
-            chart = shape.chart
-            availability = [val / 100 for val in slide7_data["Production_Availability_Chart"]["Availability"]]
-            sla = [val / 100 for val in slide7_data["Production_Availability_Chart"]["SLA"]]
-            chart_data = CategoryChartData()
-            chart_data.categories = slide7_data["Production_Availability_Chart"]["Months"]
-            chart_data.add_series("Availability", availability)
-            chart_data.add_series("SLA", sla)
-            chart.replace_data(chart_data)
+    for shape in shapes.each("Open_Cases_Value"):
+        if shape.has_text_frame:
+            _set_text_run(shape, str(slide5_data["Open_Cases_Value"]), 40)
 
-            value_axis = chart.value_axis
-            value_axis.minimum_scale = 0.93
-            value_axis.maximum_scale = 1.0
-            value_axis.tick_labels.number_format = '0.00%'
 
-            for series in chart.series:
-                if series.name == "Availability":
-                    series.has_data_labels = True
-                    series.data_labels.number_format = '0.00%'
-                    series.data_labels.show_value = True
-                else:
-                    series.has_data_labels = False
-
-        elif shape.name == "Production_User_Counts_Chart" and shape.has_chart:
-            chart = shape.chart
-            chart_data = CategoryChartData()
-            # Remove Dev series if env_count is 2
-            if env_count == 2:
-                plot = chart.plots[0]
-                series_list = list(plot.series)
-                for idx, s in enumerate(series_list):
-                    if s.name == "Dev":
-                         # Remove via XML
-                            ser_element = plot._element.findall('.//{http://schemas.openxmlformats.org/drawingml/2006/chart}ser')[idx]
-                            plot._element.remove(ser_element)
-                            break
-
-            chart_data.categories = slide7_data["Production_User_Counts_Chart"]["Months"]
-            for series_name, values in slide7_data["Production_User_Counts_Chart"].items():
-                if series_name != "Months":
-                    chart_data.add_series(series_name, values)
-            chart.replace_data(chart_data)
-
-        elif shape.name == "Production_Storage_Usage_Chart" and shape.has_chart:
-            chart = shape.chart
-            chart.value_axis.tick_label_position = XL_TICK_LABEL_POSITION.LOW
-            chart_data = CategoryChartData()
-            chart_data.categories = slide7_data["Production_Storage_Usage_Chart"]["Months"]
-            for series_name, values in slide7_data["Production_Storage_Usage_Chart"].items():
-                if series_name != "Months":
-                    chart_data.add_series(series_name, values)
-            chart.replace_data(chart_data)
-            
-            for s in chart.plots[0].series:
-                if s.name == "Prod (GB)":
-                    s.data_labels.number_format = '#,##0'
-                    break
-
-    prs.save(output_filename)
-    print(f"Presentation saved as {output_filename}")
+SLIDE7_CHARTS = ("Production_Availability_Chart", "Production_User_Counts_Chart", "Production_Storage_Usage_Chart")
+
+
+def render_presentation(data, profile=None, chart_mode=CHART_MODE_FULL):
+    """Fills the template with the provided data and returns the unsaved Presentation."""
+    profile = profile or _NULL_PROFILE
+    prs, shape_index = load_template()
+    profile.lap('load_template')
+
+    def bind(slide_idx):
+        return SlideShapes(prs.slides[slide_idx], shape_index[slide_idx])
+
+    env_count = data["slide3"].get("env_count")
+    charts = ChartFiller(data, chart_mode, env_count)
+
+    _fill_slide1(bind(0), data["slide1"], profile)
+    profile.lap('slide1')
+    _fill_slide2(bind(1), data["slide2"], profile, charts)
+    profile.lap('slide2')
+    _fill_slide3(bind(2), data["slide3"], profile, charts)
+    profile.lap('slide3')
+    _fill_slide4(bind(3), data["slide4"], env_count, profile, charts)
+    profile.lap('slide4')
+    _fill_slide5(bind(4), data["slide5"], profile, charts)
+    profile.lap('slide5')
+    _fill_charts(bind(6), 'slide7', SLIDE7_CHARTS, charts, profile)
+    profile.lap('slide7')
+    return prs
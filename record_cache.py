@@ -0,0 +1,117 @@
+"""
+Read-through cache of final_computed_table rows, one per (customer, month).
+
+The metrics page, its in-place loads, existence checks and deletes read the same
+customer month over and over. RecordCache.get() answers them from an in-process LRU of
+at most `maxsize` rows and loads a missing one with one query. A month without a row is
+cached as well, so repeated existence checks stay off the database too.
+
+Entries are dropped by invalidation_hook after every committed write to the month (and
+to every later month when the write propagates), or after `ttl` seconds, which bounds
+staleness after writes from other workers. The month's configuration is cached by
+config_store.
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+from psycopg2.extras import RealDictCursor
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL_SECONDS = 60
+
+_RECORD_SQL = """
+    SELECT *
+    FROM final_computed_table
+    WHERE customer_name = %s AND month_year = %s
+"""
+
+
+def _as_date(month):
+    if isinstance(month, datetime):
+        return month.date()
+    if isinstance(month, date):
+        return month
+    return datetime.strptime(str(month)[:10], '%Y-%m-%d').date()
+
+
+class RecordCache:
+    """LRU of final_computed_table rows keyed by (customer, month), missing rows included."""
+
+    def __init__(self, maxsize=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rows = OrderedDict()  # (customer, month) -> (loaded_at, row or None)
+        self._generation = 0  # bumped by every invalidation; a load that overlaps one isn't stored
+
+    def cached(self, customer, month):
+        """(True, row or None) if (customer, month) is cached, else (False, None). No database access."""
+        key = (customer, _as_date(month))
+        with self._lock:
+            entry = self._rows.get(key)
+            if entry is None:
+                return False, None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._rows[key]
+                return False, None
+            self._rows.move_to_end(key)
+        return True, copy.deepcopy(entry[1])
+
+    def get(self, conn, customer, month):
+        """The final_computed_table row for (customer, month) as a dict the caller may modify, or None."""
+        hit, row = self.cached(customer, month)
+        if hit:
+            return row
+        month = _as_date(month)
+        with self._lock:
+            generation = self._generation
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(_RECORD_SQL, (customer, month))
+            row = cur.fetchone()
+        finally:
+            cur.close()
+        row = dict(row) if row is not None else None
+        with self._lock:
+            if generation == self._generation:
+                self._rows[(customer, month)] = (time.monotonic(), row)
+                self._rows.move_to_end((customer, month))
+                while len(self._rows) > self.maxsize:
+                    self._rows.popitem(last=False)
+        return copy.deepcopy(row)
+
+    def exists(self, conn, customer, month):
+        return self.get(conn, customer, month) is not None
+
+    def invalidate(self, customer=None, month=None, later=False):
+        """Drop cached rows: all, a customer's, one month's, or (later=True) a month and every one after it."""
+        month = _as_date(month) if month is not None else None
+        with self._lock:
+            self._generation += 1
+            if customer is None:
+                self._rows.clear()
+                return
+            for key in [k for k in self._rows if k[0] == customer]:
+                if month is None or key[1] == month or (later and key[1] > month):
+                    del self._rows[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+
+records = RecordCache(int(os.environ.get('CSM_RECORD_CACHE_SIZE', DEFAULT_MAX_SIZE)),
+                      int(os.environ.get('CSM_RECORD_CACHE_TTL', DEFAULT_TTL_SECONDS)))
+
+
+def invalidation_hook(cache):
+    """change_hooks hook dropping the changed month's row (and later months' when the write propagates)."""
+
+    def invalidate_record(change):
+        cache.invalidate(change.customer, change.month, later=change.propagates)
+
+    return invalidate_record
@@ -0,0 +1,117 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request, session
+
+LOGGER_NAME = 'csm_report'
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a log record as a single JSON line.
+
+    Runs on the calling thread (inside the QueueHandler) so request context
+    such as the request id and user is still available.
+    """
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if has_request_context():
+            payload['request_id'] = getattr(g, 'request_id', None)
+            payload['user'] = session.get('username', 'ANONYMOUS')
+            payload['method'] = request.method
+            payload['path'] = request.path
+        fields = getattr(record, 'fields', None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class _PreformattedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that ships the already-rendered JSON line to the listener."""
+
+    def prepare(self, record):
+        msg = self.format(record)
+        record = logging.makeLogRecord({'msg': msg, 'levelno': record.levelno,
+                                        'levelname': record.levelname, 'name': record.name})
+        return record
+
+
+def get_logger(name=None):
+    """Return the app logger, or a child of it (e.g. get_logger('ppt'))."""
+    return logging.getLogger(f'{LOGGER_NAME}.{name}' if name else LOGGER_NAME)
+
+
+def add_request_timing(name, elapsed_ms):
+    """Accumulate a timing field (in ms) onto the current request's log record."""
+    if not has_request_context():
+        return
+    timings = g.setdefault('log_timings', {})
+    timings[name] = round(timings.get(name, 0.0) + elapsed_ms, 3)
+
+
+def configure_logging(level=None, stream=None):
+    """Install the JSON + queue handler on the app logger (idempotent)."""
+    global _listener
+    level = (level or os.environ.get('CSM_LOG_LEVEL', 'INFO')).upper()
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    logger.propagate = False
+
+    if _listener is not None:
+        return logger
+
+    log_queue = queue.SimpleQueue()
+    sink = logging.StreamHandler(stream)
+    sink.setFormatter(logging.Formatter('%(message)s'))
+    _listener = logging.handlers.QueueListener(log_queue, sink)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    handler = _PreformattedQueueHandler(log_queue)
+    handler.setFormatter(JsonFormatter())
+    logger.handlers = [handler]
+    return logger
+
+
+def init_app(app):
+    """Configure logging and register per-request id / access-log hooks."""
+    configure_logging()
+    access_log = get_logger('access')
+
+    @app.before_request
+    def _start_request_log():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _finish_request_log(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        fields = {
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            'remote_addr': request.remote_addr,
+        }
+        fields.update(g.get('log_timings', {}))
+        access_log.info('request', extra={'fields': fields})
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+        return response
@@ -0,0 +1,242 @@
+"""
+Month rollover: create next month's rows for every customer in a few set-based statements.
+
+For each customer, the latest customer_mapping_table row before the new month is copied
+forward (CSMs, environments, thresholds, colour rules, notes). The four source tables get
+rows carrying forward the latest user limits, storage targets and availability target,
+with usage, actuals and tickets at 0. final_computed_table is then built from those rows,
+the way /insert_record config mode does it for one customer. Every insert is
+ON CONFLICT DO NOTHING, so running it again creates nothing and fills only missing rows.
+
+    python rollover.py --dsn "dbname=AutomationDB host=localhost user=me"            # month after the latest
+    python rollover.py --dsn "..." --month 2025-09 --dry-run
+    python rollover.py --dsn "..." --config-only   # mapping rows only; months stay pending for bulk_import
+"""
+import argparse
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+
+# month      : first day of the rolled-over month
+# customers  : customers considered (every customer with a mapping row before `month`)
+# created    : {table name: [customer_name, ...] that got a new row}
+RolloverResult = namedtuple('RolloverResult', ['month', 'customers', 'created'])
+
+# Latest configured month per customer before the new month
+_SOURCES = """
+    CREATE TEMP TABLE rollover_source ON COMMIT DROP AS
+    SELECT DISTINCT ON (customer_name) customer_name, month_year AS source_month
+    FROM customer_mapping_table
+    WHERE month_year < %(month)s
+    ORDER BY customer_name, month_year DESC
+"""
+
+_STATEMENTS = [
+    ('customer_mapping_table', """
+    INSERT INTO customer_mapping_table
+        (customer_name, month_year, customer_full_name, csm_primary, csm_secondary, customer_uid,
+         no_of_environments, no_of_months,
+         color_map_thresholds_availability, color_map_thresholds_users, color_map_thresholds_storage,
+         indicator_color_code_rules, circle_color_code_rules,
+         notes_availability, notes_users, notes_storage, customer_note)
+    SELECT m.customer_name, %(month)s, m.customer_full_name, m.csm_primary, m.csm_secondary, m.customer_uid,
+           m.no_of_environments, m.no_of_months,
+           m.color_map_thresholds_availability, m.color_map_thresholds_users, m.color_map_thresholds_storage,
+           m.indicator_color_code_rules, m.circle_color_code_rules,
+           m.notes_availability, m.notes_users, m.notes_storage, m.customer_note
+    FROM rollover_source r
+    JOIN customer_mapping_table m ON m.customer_name = r.customer_name AND m.month_year = r.source_month
+    ON CONFLICT (customer_name, month_year) DO NOTHING
+    RETURNING customer_name
+    """),
+    ('availability_table', """
+    INSERT INTO availability_table (customer_name, month_year, total_availability, updated_availability,
+                                    target, updated_target)
+    SELECT r.customer_name, %(month)s, 0, 0, COALESCE(a.updated_target, 0), COALESCE(a.updated_target, 0)
+    FROM rollover_source r
+    LEFT JOIN availability_table a ON a.customer_name = r.customer_name AND a.month_year = r.source_month
+    ON CONFLICT DO NOTHING
+    RETURNING customer_name
+    """),
+    ('users_table', """
+    INSERT INTO users_table (customer_name, month_year,
+                             prod_limit, test_limit, dev_limit,
+                             prod_used, test_used, dev_used,
+                             updated_prod_limit, updated_test_limit, updated_dev_limit,
+                             updated_prod_used, updated_test_used, updated_dev_used)
+    SELECT r.customer_name, %(month)s,
+           COALESCE(u.updated_prod_limit, 0), COALESCE(u.updated_test_limit, 0), COALESCE(u.updated_dev_limit, 0),
+           0, 0, 0,
+           COALESCE(u.updated_prod_limit, 0), COALESCE(u.updated_test_limit, 0), COALESCE(u.updated_dev_limit, 0),
+           0, 0, 0
+    FROM rollover_source r
+    LEFT JOIN users_table u ON u.customer_name = r.customer_name AND u.month_year = r.source_month
+    ON CONFLICT DO NOTHING
+    RETURNING customer_name
+    """),
+    ('storage_table', """
+    INSERT INTO storage_table (customer_name, month_year,
+                               prod_target_storage_gb, test_target_storage_gb, dev_target_storage_gb,
+                               prod_storage_gb, test_storage_gb, dev_storage_gb,
+                               updated_prod_target_storage_gb, updated_test_target_storage_gb,
+                               updated_dev_target_storage_gb,
+                               updated_prod_storage_gb, updated_test_storage_gb, updated_dev_storage_gb)
+    SELECT r.customer_name, %(month)s,
+           COALESCE(s.updated_prod_target_storage_gb, 0), COALESCE(s.updated_test_target_storage_gb, 0),
+           COALESCE(s.updated_dev_target_storage_gb, 0),
+           0, 0, 0,
+           COALESCE(s.updated_prod_target_storage_gb, 0), COALESCE(s.updated_test_target_storage_gb, 0),
+           COALESCE(s.updated_dev_target_storage_gb, 0),
+           0, 0, 0
+    FROM rollover_source r
+    LEFT JOIN storage_table s ON s.customer_name = r.customer_name AND s.month_year = r.source_month
+    ON CONFLICT DO NOTHING
+    RETURNING customer_name
+    """),
+    ('tickets_computed_table', """
+    INSERT INTO tickets_computed_table
+        (customer_name, month_year,
+         tickets_opened, tickets_closed, tickets_backlog,
+         updated_tickets_opened, updated_tickets_closed, updated_tickets_backlog,
+         current_opened_tickets, current_closed_tickets, current_backlog_tickets,
+         updated_current_opened_tickets, updated_current_closed_tickets, updated_current_backlog_tickets,
+         p1_opened, p1_closed, p1_backlog, p2_opened, p2_closed, p2_backlog,
+         p3_opened, p3_closed, p3_backlog, p4_opened, p4_closed, p4_backlog,
+         updated_p1_opened, updated_p1_closed, updated_p1_backlog,
+         updated_p2_opened, updated_p2_closed, updated_p2_backlog,
+         updated_p3_opened, updated_p3_closed, updated_p3_backlog,
+         updated_p4_opened, updated_p4_closed, updated_p4_backlog)
+    SELECT r.customer_name, %(month)s,
+           0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+           0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+           0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0
+    FROM rollover_source r
+    ON CONFLICT DO NOTHING
+    RETURNING customer_name
+    """),
+    ('final_computed_table', """
+    INSERT INTO final_computed_table (
+        customer_name, month_year, csm_primary, csm_secondary,
+        updated_availability, updated_target,
+        updated_prod_limit, updated_test_limit, updated_dev_limit,
+        updated_prod_used, updated_test_used, updated_dev_used,
+        updated_prod_target_storage_gb, updated_test_target_storage_gb, updated_dev_target_storage_gb,
+        updated_prod_storage_gb, updated_test_storage_gb, updated_dev_storage_gb,
+        updated_tickets_opened, updated_tickets_closed, updated_tickets_backlog,
+        updated_current_opened_tickets, updated_current_closed_tickets, updated_current_backlog_tickets,
+        updated_p1_opened, updated_p1_closed, updated_p1_backlog,
+        updated_p2_opened, updated_p2_closed, updated_p2_backlog,
+        updated_p3_opened, updated_p3_closed, updated_p3_backlog,
+        updated_p4_opened, updated_p4_closed, updated_p4_backlog,
+        customer_full_name, customer_uid
+    )
+    SELECT m.customer_name, m.month_year, m.csm_primary, m.csm_secondary,
+           COALESCE(a.updated_availability, 0), COALESCE(a.updated_target, 0),
+           COALESCE(u.updated_prod_limit, 0), COALESCE(u.updated_test_limit, 0), COALESCE(u.updated_dev_limit, 0),
+           COALESCE(u.updated_prod_used, 0), COALESCE(u.updated_test_used, 0), COALESCE(u.updated_dev_used, 0),
+           COALESCE(s.updated_prod_target_storage_gb, 0), COALESCE(s.updated_test_target_storage_gb, 0),
+           COALESCE(s.updated_dev_target_storage_gb, 0),
+           COALESCE(s.updated_prod_storage_gb, 0), COALESCE(s.updated_test_storage_gb, 0),
+           COALESCE(s.updated_dev_storage_gb, 0),
+           COALESCE(t.updated_tickets_opened, 0), COALESCE(t.updated_tickets_closed, 0),
+           COALESCE(t.updated_tickets_backlog, 0),
+           COALESCE(t.updated_current_opened_tickets, 0), COALESCE(t.updated_current_closed_tickets, 0),
+           COALESCE(t.updated_current_backlog_tickets, 0),
+           COALESCE(t.updated_p1_opened, 0), COALESCE(t.updated_p1_closed, 0), COALESCE(t.updated_p1_backlog, 0),
+           COALESCE(t.updated_p2_opened, 0), COALESCE(t.updated_p2_closed, 0), COALESCE(t.updated_p2_backlog, 0),
+           COALESCE(t.updated_p3_opened, 0), COALESCE(t.updated_p3_closed, 0), COALESCE(t.updated_p3_backlog, 0),
+           COALESCE(t.updated_p4_opened, 0), COALESCE(t.updated_p4_closed, 0), COALESCE(t.updated_p4_backlog, 0),
+           m.customer_full_name, COALESCE(m.customer_uid, ARRAY[]::text[])
+    FROM rollover_source r
+    JOIN customer_mapping_table m ON m.customer_name = r.customer_name AND m.month_year = %(month)s
+    LEFT JOIN availability_table a ON a.customer_name = r.customer_name AND a.month_year = %(month)s
+    LEFT JOIN users_table u ON u.customer_name = r.customer_name AND u.month_year = %(month)s
+    LEFT JOIN storage_table s ON s.customer_name = r.customer_name AND s.month_year = %(month)s
+    LEFT JOIN tickets_computed_table t ON t.customer_name = r.customer_name AND t.month_year = %(month)s
+    ON CONFLICT (customer_name, month_year) DO NOTHING
+    RETURNING customer_name
+    """),
+]
+TABLES = [table for table, _ in _STATEMENTS]
+
+
+def parse_month(value):
+    """'YYYY-MM' or 'YYYY-MM-DD' -> first day of that month (raises ValueError)."""
+    for fmt in ('%Y-%m', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).date().replace(day=1)
+        except ValueError:
+            continue
+    raise ValueError('Invalid month format. Use YYYY-MM or YYYY-MM-DD.')
+
+
+def next_month(conn):
+    """The month after the latest configured month, or None if nothing is configured."""
+    cur = conn.cursor()
+    try:
+        cur.execute('SELECT MAX(month_year) FROM customer_mapping_table')
+        latest = cur.fetchone()[0]
+    finally:
+        cur.close()
+    return latest.replace(day=1) + relativedelta(months=1) if latest else None
+
+
+def roll_over(conn, month=None, config_only=False, dry_run=False):
+    """Create `month` (default: the month after the latest) for every customer, in one transaction.
+
+    config_only stops after customer_mapping_table, leaving the month pending for table data.
+    dry_run reports what would be created and rolls back. The caller owns the connection.
+    """
+    month = month or next_month(conn)
+    if month is None:
+        raise ValueError('No configured customers to roll over.')
+    statements = _STATEMENTS[:1] if config_only else _STATEMENTS
+    params = {'month': month}
+    cur = conn.cursor()
+    try:
+        cur.execute(_SOURCES, params)
+        cur.execute('SELECT customer_name FROM rollover_source ORDER BY customer_name')
+        customers = [r[0] for r in cur.fetchall()]
+        created = {}
+        for table, statement in statements:
+            cur.execute(statement, params)
+            created[table] = sorted(r[0] for r in cur.fetchall())
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+        return RolloverResult(month, customers, created)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', required=True, help='libpq connection string')
+    parser.add_argument('--month', type=parse_month, help='YYYY-MM (default: the month after the latest)')
+    parser.add_argument('--config-only', action='store_true', help='create customer_mapping_table rows only')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be created, write nothing')
+    args = parser.parse_args()
+
+    import psycopg2
+    conn = psycopg2.connect(args.dsn)
+    try:
+        result = roll_over(conn, args.month, config_only=args.config_only, dry_run=args.dry_run)
+    except ValueError as e:
+        sys.exit(str(e))
+    finally:
+        conn.close()
+
+    verb = 'would create' if args.dry_run else 'created'
+    print(f"{result.month:%Y-%m}: {len(result.customers)} customers")
+    for table, names in result.created.items():
+        print(f"  {table:<26} {verb} {len(names)}")
+
+
+if __name__ == '__main__':
+    main()
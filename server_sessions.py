@@ -0,0 +1,268 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+from werkzeug.http import parse_cookie
+
+DEFAULT_LRU_SIZE = 1024
+PURGE_EVERY = 200  # writes between purges of expired rows
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    sid     TEXT PRIMARY KEY,
+    data    TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    expires REAL NOT NULL
+)
+"""
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session dict whose contents live server-side; the cookie only carries the signed sid."""
+
+    def __init__(self, initial=None, sid=None, version=0, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.version = version
+        self.new = new
+        self.modified = False
+        self.regenerated = False
+
+    def __setitem__(self, key, value):
+        # Re-assigning an unchanged value (e.g. the same filter on every POST) is not a modification
+        if key in self and self[key] == value:
+            return
+        super().__setitem__(key, value)
+
+    def regenerate(self):
+        """Move the session to a fresh sid (call on login to prevent session fixation)."""
+        self.regenerated = True
+        self.modified = True
+
+
+class SqliteSessionStore:
+    """Session rows in a SQLite file shared by all workers on the host.
+
+    Rows hold the users' database credentials, so the file and its -wal/-shm sidecars are
+    kept at 0600 (SQLite creates sidecars with the database file's mode) and a directory
+    the store creates is 0700.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        with self._conn() as conn:
+            conn.execute(_SCHEMA)
+        for name in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(name):
+                os.chmod(name, 0o600)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def version(self, sid):
+        """Current version of a live session, or None if missing/expired."""
+        row = self._conn().execute('SELECT version, expires FROM sessions WHERE sid = ?', (sid,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def load(self, sid):
+        """(data text, version) of a live session, or None."""
+        row = self._conn().execute('SELECT data, version, expires FROM sessions WHERE sid = ?', (sid,)).fetchone()
+        if row is None or row[2] < time.time():
+            return None
+        return row[0], row[1]
+
+    def save(self, sid, data, expires):
+        """Insert or replace a session row; returns its new version."""
+        conn = self._conn()
+        row = conn.execute("""
+            INSERT INTO sessions (sid, data, version, expires) VALUES (?, ?, 1, ?)
+            ON CONFLICT (sid) DO UPDATE SET data = excluded.data, version = sessions.version + 1,
+                                            expires = excluded.expires
+            RETURNING version
+        """, (sid, data, expires)).fetchone()
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute('DELETE FROM sessions WHERE expires < ?', (time.time(),))
+        return row[0]
+
+    def delete(self, sid):
+        self._conn().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session backend: in-process LRU in front of a shared SqliteSessionStore.
+
+    The LRU keeps decoded session dicts with their row version; a request only re-reads
+    and decodes the row when another worker has bumped the version. Nothing is written
+    (and no cookie is sent) unless the session was modified.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, lru_size=DEFAULT_LRU_SIZE):
+        self.store = store
+        self.lru_size = lru_size
+        self._lru = OrderedDict()  # sid -> (version, dict)
+        self._lock = threading.Lock()
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='csm-server-session', key_derivation='hmac')
+
+    def _cache(self, sid, version, data):
+        with self._lock:
+            self._lru[sid] = (version, data)
+            self._lru.move_to_end(sid)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _forget(self, sid):
+        with self._lock:
+            self._lru.pop(sid, None)
+
+    def peek(self, sid):
+        """Cached (version, data) for a sid without touching the store, or None."""
+        with self._lock:
+            return self._lru.get(sid)
+
+    def unsign_sid(self, app, cookie_value):
+        try:
+            return self._signer(app).unsign(cookie_value).decode('ascii')
+        except (BadSignature, UnicodeDecodeError):
+            return None
+
+    def open_session(self, app, request):
+        cookie_value = request.cookies.get(self.get_cookie_name(app))
+        sid = self.unsign_sid(app, cookie_value) if cookie_value else None
+        if sid:
+            version = self.store.version(sid)
+            if version is not None:
+                cached = self.peek(sid)
+                if cached is not None and cached[0] == version:
+                    return ServerSession(dict(cached[1]), sid=sid, version=version)
+                loaded = self.store.load(sid)
+                if loaded is not None:
+                    data = self.serializer.loads(loaded[0])
+                    self._cache(sid, loaded[1], data)
+                    return ServerSession(dict(data), sid=sid, version=loaded[1])
+            self._forget(sid)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                self._forget(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+        if not session.modified:
+            return
+
+        if session.regenerated:
+            if not session.new:
+                self.store.delete(session.sid)
+                self._forget(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+
+        expires = self.get_expiration_time(app, session)
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        data = dict(session)
+        version = self.store.save(session.sid, self.serializer.dumps(data), time.time() + lifetime)
+        self._cache(session.sid, version, data)
+        response.set_cookie(name, self._signer(app).sign(session.sid).decode('ascii'), expires=expires,
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+        response.vary.add('Cookie')
+
+
+def init_app(app, path):
+    """Install the server-side session backend, storing sessions in the SQLite file at `path`."""
+    app.session_interface = ServerSessionInterface(SqliteSessionStore(path))
+    return app.session_interface
+
+
+class CheckSessionFastPath:
+    """WSGI middleware answering GET <path> from the in-process session LRU, before Flask runs.
+
+    No request context, hooks, session decoding or session writes happen on this path; the
+    store is only asked for the row's version. It only answers when the verdict can't be
+    wrong: the cached session is the store's current version (so a logout or a change
+    written by another worker or async_api is never missed) and comfortably inside the
+    inactivity window. Anything else (cache miss, stale entry, bad cookie, close to or
+    past expiry) falls through to the regular Flask view, which reads the store and
+    handles expiry.
+    """
+
+    def __init__(self, wsgi_app, app, interface, timeout, path='/check_session', margin=timedelta(minutes=5)):
+        self.wsgi_app = wsgi_app
+        self.app = app
+        self.interface = interface
+        self.timeout = timeout
+        self.path = path
+        self.margin = margin
+        self.cookie_name = interface.get_cookie_name(app)
+
+    def _remaining_seconds(self, environ):
+        cookies = parse_cookie(environ.get('HTTP_COOKIE', ''))
+        cookie_value = cookies.get(self.cookie_name)
+        if not cookie_value:
+            return None
+        sid = self.interface.unsign_sid(self.app, cookie_value)
+        cached = self.interface.peek(sid) if sid else None
+        if cached is None or self.interface.store.version(sid) != cached[0]:
+            return None
+        data = cached[1]
+        last_activity = data.get('last_activity')
+        if 'username' not in data or not isinstance(last_activity, str):
+            return None
+        try:
+            remaining = self.timeout - (datetime.now() - datetime.fromisoformat(last_activity))
+        except ValueError:
+            return None
+        if remaining <= self.margin:
+            return None
+        return int(remaining.total_seconds())
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') == self.path and environ.get('REQUEST_METHOD') == 'GET':
+            remaining_seconds = self._remaining_seconds(environ)
+            if remaining_seconds is not None:
+                body = json.dumps({'expires_in': f"{remaining_seconds // 60} minutes",
+                                   'remaining_seconds': remaining_seconds, 'valid': True}).encode('utf-8')
+                start_response('200 OK', [('Content-Type', 'application/json'),
+                                          ('Content-Length', str(len(body))),
+                                          ('Cache-Control', 'no-store')])
+                return [body]
+        return self.wsgi_app(environ, start_response)
@@ -0,0 +1,186 @@
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import date, datetime
+from urllib.parse import quote
+
+from dateutil.relativedelta import relativedelta
+
+from ppt_generator import prepare_data_dictionary, serialize_data_dictionary
+from request_logging import get_logger
+
+logger = get_logger('snapshots')
+
+DEFAULT_TTL_SECONDS = 3600
+GENERATION_FILE = 'generation'
+
+
+def _month_str(month):
+    if isinstance(month, (date, datetime)):
+        return month.strftime('%Y-%m-%d')
+    return str(month)[:10]
+
+
+def window_start(customer_mapping_df, month):
+    """First month of the deck window for `month` (mirrors fetch_data's no_of_months lookup)."""
+    end = datetime.strptime(_month_str(month), '%Y-%m-%d').date()
+    current = customer_mapping_df[customer_mapping_df['month_year'] == end]
+    no_of_months = int(current['no_of_months'].iloc[0]) if not current.empty else 6
+    return end - relativedelta(months=no_of_months - 1)
+
+
+class SnapshotStore:
+    """Prepared slide-data documents (prepare_data_dictionary output) on disk, one per customer and month.
+
+    Files live in <root>/<quoted customer>/<month>.<window start>.json and are written
+    atomically (temp file + rename). The root and customer directories are private (0700);
+    a root owned by another user is refused and disables the store. A snapshot older than
+    `ttl` seconds is treated as missing, which bounds staleness after writes made outside
+    the app (imports, rollover). root=None disables the store.
+
+    Writes discard the customer's snapshots (invalidation_hook); the next read rebuilds
+    them. Each invalidation also writes a new generation to <customer dir>/generation,
+    which every worker sharing the directory sees. A reader takes the generation before
+    fetching, store() skips the write if it moved, and get() ignores a snapshot built at
+    another generation, so a fetch that overlapped a write in any worker can't put
+    pre-write data back.
+    """
+
+    def __init__(self, root, ttl=DEFAULT_TTL_SECONDS):
+        self.root = self._private_root(root) if root else None
+        self.ttl = ttl
+
+    @staticmethod
+    def _private_root(root):
+        """Create `root` with mode 0700 (tightening one we own); None if another user owns it."""
+        os.makedirs(root, mode=0o700, exist_ok=True)
+        info = os.stat(root)
+        if info.st_uid != os.getuid():
+            logger.error('snapshot directory is owned by another user; snapshots disabled',
+                         extra={'fields': {'root': root}})
+            return None
+        if info.st_mode & 0o077:
+            os.chmod(root, 0o700)
+        return root
+
+    def _customer_dir(self, customer):
+        return os.path.join(self.root, quote(customer, safe=''))
+
+    def _entries(self, customer):
+        """(month, window start, path) of every snapshot stored for the customer."""
+        directory = self._customer_dir(customer)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            parts = name.split('.')
+            if len(parts) == 3 and parts[2] == 'json':
+                entries.append((parts[0], parts[1], os.path.join(directory, name)))
+        return entries
+
+    def get(self, customer, month):
+        """The stored slide data for (customer, month), or None if missing/expired."""
+        if not self.root:
+            return None
+        month = _month_str(month)
+        for entry_month, _, path in self._entries(customer):
+            if entry_month != month:
+                continue
+            try:
+                if self.ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                    return None
+                generation = self.generation(customer)
+                with open(path) as fh:
+                    document = json.load(fh)
+                return document['data'] if document.get('generation') == generation else None
+            except (OSError, ValueError, KeyError):
+                return None
+        return None
+
+    def put(self, customer, month, data, start, generation):
+        """Store already-serialized slide data for (customer, month) whose window starts at `start`,
+        built at `generation`."""
+        if not self.root:
+            return
+        month = _month_str(month)
+        self.discard(customer, month)
+        document = {'customer': customer, 'month': month, 'window_start': _month_str(start),
+                    'generation': generation, 'built_at': datetime.now().isoformat(timespec='seconds'),
+                    'data': data}
+        self._write(customer, f"{month}.{_month_str(start)}.json", json.dumps(document, separators=(',', ':')))
+
+    def _write(self, customer, name, text):
+        """Atomically replace <customer dir>/<name> with `text`."""
+        directory = self._customer_dir(customer)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                fh.write(text)
+            os.replace(tmp_path, os.path.join(directory, name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def discard(self, customer, month):
+        if not self.root:
+            return
+        month = _month_str(month)
+        for entry_month, _, path in self._entries(customer):
+            if entry_month == month:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def generation(self, customer):
+        """The customer's current generation ('' before its first invalidation): the token to take
+        before fetching the data passed to store()."""
+        if not self.root:
+            return ''
+        try:
+            with open(os.path.join(self._customer_dir(customer), GENERATION_FILE)) as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return ''
+
+    def store(self, customer, month, customer_mapping_df, final_computed_df, token=None):
+        """Prepare slide data from fetched frames, store it and return the serialized document data.
+
+        With a token from generation(), the data is not stored if the customer changed since.
+        """
+        if token is None:
+            token = self.generation(customer)
+        data = serialize_data_dictionary(prepare_data_dictionary(customer_mapping_df, final_computed_df,
+                                                                 _month_str(month)))
+        start = window_start(customer_mapping_df, month)
+        if self.generation(customer) == token:
+            self.put(customer, month, data, start, token)
+        return data
+
+    def invalidate(self, customer):
+        """Move the customer to a new generation and discard its snapshots."""
+        if not self.root:
+            return
+        self._write(customer, GENERATION_FILE, uuid.uuid4().hex)
+        for _, _, path in self._entries(customer):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def invalidation_hook(store):
+    """change_hooks hook discarding the stored snapshots of every changed customer.
+
+    They are rebuilt by the next read (load_slide_data), not inside the write request.
+    """
+
+    def invalidate_snapshots(change):
+        store.invalidate(change.customer)
+
+    return invalidate_snapshots
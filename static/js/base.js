@@ -0,0 +1,164 @@
+// Enhanced Session Management with Visual Timer
+let sessionWarningShown = false;
+let sessionCheckInterval = null;
+let timerElement = document.getElementById('sessionTimer');
+
+function updateSessionTimer(remainingSeconds) {
+    if (!timerElement) return;
+
+    const minutes = Math.floor(remainingSeconds / 60);
+    const seconds = remainingSeconds % 60;
+
+    timerElement.textContent = `Session: ${minutes}m ${seconds}s`;
+
+    // Show warning if less than 5 minutes remaining
+    if (remainingSeconds < 300) {
+        timerElement.classList.add('warning');
+
+        // Show alert at 2 minutes
+        if (remainingSeconds === 120 && !sessionWarningShown) {
+            sessionWarningShown = true;
+            alert('Your session will expire in 2 minutes due to inactivity. Please interact with the page to extend your session.');
+        }
+    } else {
+        timerElement.classList.remove('warning');
+    }
+}
+
+function handleSessionState(data) {
+    if (!data.valid) {
+        clearInterval(sessionCheckInterval);
+        alert('Your session has expired due to inactivity. Please log in again.');
+        window.location.href = '/login';
+    } else if (data.remaining_seconds) {
+        updateSessionTimer(data.remaining_seconds);
+    }
+}
+
+function checkSessionTimeout() {
+    return fetch('/check_session', {
+        method: 'GET',
+        credentials: 'same-origin'
+    })
+    .then(response => response.json())
+    .catch(err => {
+        console.error('Session check failed:', err);
+        return null;
+    });
+}
+
+// Cross-tab coordination: one leader tab polls /check_session and shares the result with the
+// other tabs (BroadcastChannel, falling back to localStorage 'storage' events).
+const SESSION_POLL_MS = 30000;
+const SESSION_LEADER_KEY = 'csm_session_leader';   // {id, heartbeat}
+const SESSION_STATE_KEY = 'csm_session_state';     // {valid, remaining_seconds, checked_at}
+const sessionTabId = Math.random().toString(36).slice(2) + Date.now().toString(36);
+const sessionChannel = ('BroadcastChannel' in window) ? new BroadcastChannel('csm_session') : null;
+
+function readSessionJSON(key) {
+    try {
+        return JSON.parse(localStorage.getItem(key) || 'null');
+    } catch (e) {
+        return null;
+    }
+}
+
+function writeSessionJSON(key, value) {
+    try {
+        localStorage.setItem(key, JSON.stringify(value));
+    } catch (e) {
+        // storage disabled/full: this tab simply keeps polling on its own
+    }
+}
+
+// Remaining seconds from a shared state, aged by the time since the leader checked it
+function applySharedSessionState(state) {
+    if (!state) return;
+    if (!state.valid) {
+        handleSessionState(state);
+        return;
+    }
+    const elapsed = Math.floor((Date.now() - state.checked_at) / 1000);
+    handleSessionState({ valid: true, remaining_seconds: Math.max(state.remaining_seconds - elapsed, 1) });
+}
+
+function claimSessionLeadership() {
+    const leader = readSessionJSON(SESSION_LEADER_KEY);
+    const now = Date.now();
+    if (!leader || leader.id === sessionTabId || now - leader.heartbeat > SESSION_POLL_MS * 1.5) {
+        writeSessionJSON(SESSION_LEADER_KEY, { id: sessionTabId, heartbeat: now });
+    }
+    // Re-read: if two tabs raced, the last writer wins and the other becomes a follower
+    const current = readSessionJSON(SESSION_LEADER_KEY);
+    return !current || current.id === sessionTabId;
+}
+
+function sessionTick() {
+    if (!claimSessionLeadership()) {
+        applySharedSessionState(readSessionJSON(SESSION_STATE_KEY));
+        return;
+    }
+    checkSessionTimeout().then(data => {
+        if (!data) return;
+        const state = { valid: !!data.valid, remaining_seconds: data.remaining_seconds || 0, checked_at: Date.now() };
+        writeSessionJSON(SESSION_STATE_KEY, state);
+        if (sessionChannel) sessionChannel.postMessage(state);
+        handleSessionState(data);
+    });
+}
+
+// Only run session checks if user is logged in
+if (timerElement) {
+    if (sessionChannel) {
+        sessionChannel.onmessage = event => applySharedSessionState(event.data);
+    } else {
+        window.addEventListener('storage', event => {
+            if (event.key === SESSION_STATE_KEY) applySharedSessionState(readSessionJSON(SESSION_STATE_KEY));
+        });
+    }
+
+    // Check immediately (a fresh shared result from another tab is enough)
+    const shared = readSessionJSON(SESSION_STATE_KEY);
+    if (shared && shared.valid && Date.now() - shared.checked_at < SESSION_POLL_MS) {
+        claimSessionLeadership();
+        applySharedSessionState(shared);
+    } else {
+        sessionTick();
+    }
+
+    // Then check every 30 seconds
+    sessionCheckInterval = setInterval(sessionTick, SESSION_POLL_MS);
+
+    // Hand leadership over right away when the leader tab goes away
+    window.addEventListener('beforeunload', () => {
+        const leader = readSessionJSON(SESSION_LEADER_KEY);
+        if (leader && leader.id === sessionTabId) {
+            try { localStorage.removeItem(SESSION_LEADER_KEY); } catch (e) {}
+        }
+    });
+
+    // Reset warning flag on user activity
+    ['click', 'keypress', 'scroll', 'mousemove'].forEach(event => {
+        let activityTimeout;
+        document.addEventListener(event, function() {
+            clearTimeout(activityTimeout);
+            activityTimeout = setTimeout(() => {
+                sessionWarningShown = false;
+            }, 1000);
+        }, { passive: true });
+    });
+}
+
+// Handle page refresh
+if (performance.navigation.type === 1) { 
+    try {
+        sessionStorage.removeItem('metrics_state');
+        sessionStorage.removeItem('reporting_state');
+    } catch (e) {
+        console.warn('Could not clear sessionStorage', e);
+    }
+
+    const url = new URL(window.location.href);
+    url.searchParams.set("reload", "1");
+    window.location.replace(url.toString());
+}
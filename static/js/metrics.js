@@ -0,0 +1,1538 @@
+    const metricsContainer = document.getElementById('metrics-container');
+    const customerSelect = document.getElementById('customer');
+    const monthSelect = document.getElementById('month');
+    const customerSearch = document.getElementById('customer-search');
+
+
+    function applyNoOfEnvs(value) {
+        const envs = parseInt(value) || 2;
+        metricsContainer.dataset.noOfEnvs = envs;
+        document.body.classList.toggle('hide-dev-rows', envs === 2);
+    }
+
+    applyNoOfEnvs(metricsContainer.dataset.noOfEnvs);
+
+    function getLoadedCustomer() {
+        return metricsContainer?.dataset.loadedCustomer || '';
+    }
+
+    function getLoadedMonth() {
+        return metricsContainer?.dataset.loadedMonth || '';
+    }
+
+    function resetMonthOptions() {
+        if (!monthSelect) return;
+        monthSelect.innerHTML = '<option value="" selected>-- Select Month --</option>';
+        monthSelect.disabled = true;
+    }
+
+    function populateMonths(customer, preselectMonth) {
+        if (!monthSelect) return;
+        resetMonthOptions();
+        if (!customer) return;
+
+        monthSelect.disabled = true;
+        fetch(`/get_months/${encodeURIComponent(customer)}`)
+            .then(response => response.ok ? response.json() : Promise.reject('Failed to fetch'))
+            .then(months => {
+                resetMonthOptions();
+                months.forEach(month => {
+                    const option = document.createElement('option');
+                    option.value = month;
+                    option.text = new Date(month).toLocaleDateString('en-US', { year: 'numeric', month: 'long' });
+                    if (preselectMonth && month === preselectMonth) option.selected = true;
+                    monthSelect.appendChild(option);
+                });
+            })
+            .catch(error => {
+                console.error('Unable to load months:', error);
+                resetMonthOptions();
+            })
+            .finally(() => monthSelect.disabled = false);
+    }
+
+    function onCustomerChange(selectedCustomerValue) {
+        customerSelect.value = selectedCustomerValue || '';
+
+        if (!selectedCustomerValue) {
+            resetMonthOptions();
+            return;
+        }
+
+        const preselect = selectedCustomerValue === getLoadedCustomer() ? getLoadedMonth() : '';
+        populateMonths(selectedCustomerValue, preselect);
+    }
+
+    if (customerSearch) {
+        customerSearch.addEventListener('input', () => {
+            const val = customerSearch.value.trim();
+
+            if (!val) {
+                onCustomerChange('');
+                return;
+            }
+
+            // TODO: Replace this with your autocomplete logic to detect a selected customer
+            // Until then, reset months while no valid customer is selected
+            resetMonthOptions();
+        });
+    }
+
+    if (customerSelect) {
+        customerSelect.addEventListener('change', () => {
+            onCustomerChange(customerSelect.value);
+        });
+    }
+
+    // Load and switch month in place through /metrics_data instead of posting the form
+    const loadForm = document.getElementById('loadForm');
+    if (loadForm) {
+        loadForm.addEventListener('submit', (event) => {
+            event.preventDefault();
+            if (customerSelect.value && monthSelect.value) {
+                loadMetrics(customerSelect.value, monthSelect.value);
+            }
+        });
+    }
+
+    if (monthSelect) {
+        monthSelect.addEventListener('change', () => {
+            if (customerSelect.value && monthSelect.value) {
+                loadMetrics(customerSelect.value, monthSelect.value);
+            }
+        });
+    }
+
+    (function init() {
+        const initialCustomer = customerSelect.value || '';
+        if (initialCustomer) {
+            populateMonths(initialCustomer, getLoadedMonth());
+        } else {
+            resetMonthOptions();
+        }
+    })();
+
+
+    (function initMonthSelect() {
+        if (!monthSelect) return;
+        const initialCustomer = customerSelect?.value || '';
+        if (initialCustomer) {
+            populateMonths(initialCustomer, getLoadedMonth());
+        } else {
+            resetMonthOptions();
+            monthSelect.disabled = true;
+        }
+    })();
+
+    const trackedInputs = Array.from(document.querySelectorAll('.track-original'));
+    trackedInputs.forEach(input => {
+        if (input.dataset.originalValue === undefined) {
+            input.dataset.originalValue = input.value;
+        }
+    });
+
+    function parseJSONStandard(str) {
+        try {
+            return JSON.parse(str.replace(/'/g, '"').replace(/\n/g, "\\n"));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function validateCsmNames() {
+        const primary = document.getElementById("config_csm_primary");
+        const secondary = document.getElementById("config_csm_secondary");
+        const pattern = /^[A-Za-z' ]+$/;
+        let errors = [];
+        let invalidFields = [];
+
+        primary.classList.remove("error-field");
+        secondary.classList.remove("error-field");
+
+        function validateField(field, label) {
+            const value = field.value.trim();
+            if (!value) {
+                errors.push(`❌ ${label} cannot be empty.`);
+                invalidFields.push(field);
+                return;
+            }
+            if (!pattern.test(value)) {
+                errors.push(`❌ ${label} contains invalid characters.`);
+                invalidFields.push(field);
+            }
+        }
+
+        validateField(primary, "CSM Primary");
+        validateField(secondary, "CSM Secondary");
+
+        if (errors.length > 0) {
+            invalidFields.forEach(f => f.classList.add("error-field"));
+            showCustomAlert(errors.join("\n\n"), "Invalid CSM Names");
+            return false;
+        }
+        return true;
+    }
+
+    function validateAllThresholds() {
+        const fields = document.querySelectorAll("textarea.json-editor[data-threshold-type]");
+        let errors = [];
+        let invalidFields = [];
+
+        fields.forEach(f => {
+            const type = f.dataset.thresholdType;
+            const section = f.dataset.sectionLabel || f.id;
+            const originalText = f.dataset.originalValue || f.value;
+            let json;
+            try {
+                json = JSON.parse(f.value.replace(/'/g, '"').replace(/\n/g, "\\n"));
+            } catch (e) {
+                errors.push(`❌ Invalid JSON in ${section}.`);
+                invalidFields.push({ field: f, original: originalText });
+                return;
+            }
+
+            const c1 = Number(json.Color1);
+            const c2 = Number(json.Color2);
+            const c3 = Number(json.Color3);
+            const inv = Number(json.Invalid);
+
+            if ([c1, c2, c3, inv].some(v => isNaN(v))) {
+                errors.push(`❌ Non-numeric values in ${section}.`);
+                invalidFields.push({ field: f, original: originalText });
+                return;
+            }
+
+            if (type === "availability") {
+                if (!(c1 > c2 && c2 > c3 && c3 > inv)) {
+                    errors.push(`❌ ${section}: Expected Color1 > Color2 > Color3 > Invalid`);
+                    invalidFields.push({ field: f, original: originalText });
+                }
+            }
+
+            if (type === "increasing") {
+                if (inv === 0 || inv === -1) {
+                    if (!(c1 < c2 && c2 < c3)) {
+                        errors.push(`❌ ${section}: Expected Color1 < Color2 < Color3`);
+                        invalidFields.push({ field: f, original: originalText });
+                    }
+                } else {
+                    if (!(c1 < c2 && c2 < c3 && c3 < inv)) {
+                        errors.push(`❌ ${section}: Expected Color1 < Color2 < Color3 < Invalid`);
+                        invalidFields.push({ field: f, original: originalText });
+                    }
+                }
+            }
+        });
+
+        if (errors.length > 0) {
+            showCustomAlert(errors.join("\n\n"), "Threshold Validation Failed");
+            invalidFields.forEach(item => {
+                item.field.value = item.original;
+                item.field.classList.add("error-field");
+            });
+            return false;
+        }
+        return true;
+    }
+
+function validateJsonFields() {
+    const fields = [
+        document.getElementById("config_notes_availability"),
+        document.getElementById("config_notes_users"),
+        document.getElementById("config_notes_storage")
+    ];
+
+    let errors = [];
+    let invalidFields = [];
+
+    fields.forEach(f => {
+        if (!f) return;  // skip missing fields
+
+        if (!f.dataset.originalValue) {
+            f.dataset.originalValue = f.value;
+        }
+
+        const sectionLabel = f.dataset.sectionLabel || "Notes Section";
+        const allowedKeys = ["Color1", "Color2", "Color3", "Invalid"];
+        const originalText = f.dataset.originalValue;
+
+        let parsed;
+        try {
+            parsed = JSON.parse(
+                f.value.replace(/'/g, '"').replace(/\n/g, "\\n")
+            );
+        } catch (e) {
+            errors.push(`❌ Invalid JSON in ${sectionLabel}.`);
+            invalidFields.push({ field: f, original: originalText });
+            return;
+        }
+
+        const userKeys = Object.keys(parsed);
+        userKeys.forEach(key => {
+            if (!allowedKeys.includes(key)) {
+                errors.push(`❌ Invalid key "${key}" in ${sectionLabel}.`);
+                invalidFields.push({ field: f, original: originalText });
+            }
+        });
+    });
+
+    if (errors.length === 0) return true;
+
+    showCustomAlert(errors.join("\n\n"), "Multiple Issues Found");
+
+    invalidFields.forEach(item => {
+        item.field.value = item.original;
+    });
+
+    return false;
+}
+
+    function parseNotesJsonTolerant(text) {
+        if (!text || typeof text !== 'string') return {};
+        let s = text.trim();
+        if (s.startsWith("'") || (s.indexOf("'") !== -1 && s.indexOf('"') === -1)) {
+            s = s.replace(/'/g, '"');
+        }
+        return JSON.parse(s);
+    }
+
+    function validateSingleNotesText(fieldId, text) {
+        try {
+            const data = parseNotesJsonTolerant(text);
+            for (const key in data) {
+                if (!Object.prototype.hasOwnProperty.call(data, key)) continue;
+                let val = data[key];
+                if (val === null || val === undefined) continue;
+                if (typeof val !== 'string') val = String(val);
+                const lines = val.split(/\r?\n/);
+                if (lines.length > 3) {
+                    return { ok: false, message: `'${key}' has ${lines.length} lines (max 3).`, fieldId };
+                }
+                for (let i = 0; i < lines.length; i++) {
+                    const len = lines[i].length;
+                    if (len > 70) {
+                        return { ok: false, message: `'${key}' line ${i+1} is ${len} chars (max 70).`, fieldId };
+                    }
+                }
+            }
+            return { ok: true };
+        } catch (err) {
+            return { ok: false, message: `Invalid JSON: ${err.message}`, fieldId };
+        }
+    }
+
+    function validateNotesLimits() {
+        const fields = [
+            { id: 'config_notes_availability', label: 'Availability' },
+            { id: 'config_notes_users', label: 'Users' },
+            { id: 'config_notes_storage', label: 'Storage' }
+        ];
+
+        for (const f of fields) {
+            const el = document.getElementById(f.id);
+            if (!el) continue;
+            const raw = el.value || el.textContent || '';
+            const res = validateSingleNotesText(f.id, raw);
+            el.classList.remove('error-field');
+            removeWarningElement(el);
+            if (!res.ok) {
+                el.classList.add('error-field');
+                addInlineWarning(el, `${f.label} notes invalid: ${res.message}`);
+                if (typeof showCustomAlert === 'function') {
+                    showCustomAlert(`${f.label} notes invalid: ${res.message}`, 'Validation Error');
+                } else {
+                    alert(`${f.label} notes invalid: ${res.message}`);
+                }
+                el.focus();
+                return false;
+            }
+        }
+        return true;
+    }
+
+    function notesLiveValidate(ev) {
+        const el = ev.target;
+        if (!el) return;
+        el.classList.remove('error-field');
+        removeWarningElement(el);
+
+        const raw = el.value || '';
+        const res = validateSingleNotesText(el.id, raw);
+        if (!res.ok) {
+            el.classList.add('error-field');
+            addInlineWarning(el, res.message);
+        } else {
+            el.classList.remove('error-field');
+            removeWarningElement(el);
+        }
+    }
+
+    function addInlineWarning(textareaEl, message) {
+        removeWarningElement(textareaEl);
+        const warn = document.createElement('div');
+        warn.className = 'note-warning';
+        warn.id = textareaEl.id + '_warn';
+        warn.textContent = message;
+        textareaEl.insertAdjacentElement('afterend', warn);
+    }
+
+    function removeWarningElement(textareaEl) {
+        const ex = document.getElementById(textareaEl.id + '_warn');
+        if (ex) ex.remove();
+    }
+
+    /*document.addEventListener('DOMContentLoaded', function () {
+        const ids = ['config_notes_availability', 'config_notes_users', 'config_notes_storage'];
+        ids.forEach(id => {
+            const el = document.getElementById(id);
+            if (!el) return;
+            if (!el.getAttribute('data-notes-listener')) {
+                el.addEventListener('input', notesLiveValidate);
+                el.setAttribute('data-notes-listener', '1');
+            }
+        });
+    });*/
+
+document.addEventListener("DOMContentLoaded", function () {
+    const noteBox = document.getElementById("config_customer_note");
+    const counter = document.getElementById("note_char_count");
+
+    if (noteBox && counter) {
+        counter.innerText = noteBox.value.length;
+
+        noteBox.addEventListener("input", () => {
+            counter.innerText = noteBox.value.length;
+        });
+    }
+});
+
+function saveConfiguration() {
+    const comment = document.getElementById("config_edit_comment").value.trim();
+    const customerNote = document.getElementById("config_customer_note").value.trim();
+
+    if (!comment) {
+        showCustomAlert("Please enter a reason for updating configuration.", "Comment Required");
+        return;
+    }
+
+    if (customerNote.length > 125) {
+        showCustomAlert("Customer note may not exceed 125 characters.", "Limit Exceeded");
+        return;
+    }
+
+    /*if (!validateJsonFields()) {
+        return; 
+    }
+
+    /*if (!validateAllThresholds()) return;*/
+
+    //if(!validateNotesLimits()) return;
+
+    if (!validateCsmNames()) return;
+
+    const payload = {
+        customer: METRICS_PAGE.selectedCustomer,
+        month: METRICS_PAGE.selectedMonth,
+
+        customer_full_name: document.getElementById('config_customer_full_name').value,
+        csm_primary: document.getElementById('config_csm_primary').value,
+        csm_secondary: document.getElementById('config_csm_secondary').value,
+        new_customer_uid: document.getElementById('config_customer_uid').value,
+        no_of_envs: document.getElementById('config_no_env').value,
+        no_of_months: document.getElementById('config_no_months').value,
+        customer_note: document.getElementById('config_customer_note').value,
+        thr_availability: document.getElementById('config_thr_availability').value,
+        thr_users: document.getElementById('config_thr_users').value,
+        thr_storage: document.getElementById('config_thr_storage').value,
+
+        indicator_colors: document.getElementById('config_indicator_colors').value,
+        circle_colors: document.getElementById('config_circle_colors').value,
+
+        notes_availability: document.getElementById('config_notes_availability').value,
+        notes_users: document.getElementById('config_notes_users').value,
+        notes_storage: document.getElementById('config_notes_storage').value,
+        edit_comment: comment
+    };
+
+    showCustomConfirm(
+        "Are you sure you want to save the configuration changes?",
+        () => {
+            fetch('/save_config', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload)
+            })
+            .then(r => r.json())
+            .then(res => {
+                if (res.success) {
+                    sendAuditComment(payload.customer, payload.month, "config", comment, "UPDATE");
+                    applyConfig(res.config);
+                    closeConfigEditor();
+                    showCustomAlert("Configuration saved successfully!", "Success");
+                } else {
+                    showCustomAlert(res.message || "An error occurred while saving.", "Error");
+                }
+            })
+            .catch(() => {
+                showCustomAlert("Cannot reach server. Check network or backend.", "Error");
+            });
+        },
+        "Confirm Configuration Changes"
+    );
+}
+
+    function formatDisplayValue(value, type) {
+        const num = Number(value);
+        if (!Number.isNaN(num)) {
+            if (type === 'integer') return `${Math.round(num)}`;
+            if (type === 'number') return num.toFixed(4);
+            if (type === 'percent') return num.toFixed(2) + "%";
+        }
+        return value;
+    }
+
+    function updateDisplayForInput(input, value) {
+        if (!input) return;
+        const displayId = input.dataset.displayTarget;
+        if (!displayId) return;
+        const displayEl = document.getElementById(displayId);
+        if (!displayEl) return;
+        const type = input.dataset.displayType || 'number';
+        displayEl.textContent = formatDisplayValue(value, type);
+    }
+
+    function updateInputState(input, value) {
+        if (!input) return;
+        const stringValue = `${value}`;
+        input.value = stringValue;
+        input.dataset.originalValue = stringValue;
+        updateDisplayForInput(input, stringValue);
+    }
+
+    // Metrics input id -> final_computed_table column (availability/target are stored as fractions)
+    const RECORD_FIELDS = {
+        availability: 'updated_availability', target: 'updated_target',
+        prod_limit: 'updated_prod_limit', prod_used: 'updated_prod_used',
+        test_limit: 'updated_test_limit', test_used: 'updated_test_used',
+        dev_limit: 'updated_dev_limit', dev_used: 'updated_dev_used',
+        prod_target: 'updated_prod_target_storage_gb', prod_actual: 'updated_prod_storage_gb',
+        test_target: 'updated_test_target_storage_gb', test_actual: 'updated_test_storage_gb',
+        dev_target: 'updated_dev_target_storage_gb', dev_actual: 'updated_dev_storage_gb',
+        opened: 'updated_current_opened_tickets', closed: 'updated_current_closed_tickets',
+        curr_backlog: 'updated_current_backlog_tickets', overall_backlog: 'updated_tickets_backlog'
+    };
+    const PERCENT_FIELDS = ['availability', 'target'];
+
+    // Show a record returned by /metrics_data or a save endpoint
+    function applyRecord(record) {
+        Object.entries(RECORD_FIELDS).forEach(([id, column]) => {
+            const value = Number(record[column] ?? 0);
+            updateInputState(document.getElementById(id),
+                             PERCENT_FIELDS.includes(id) ? (value * 100).toFixed(2) : value);
+        });
+    }
+
+    // Config editor id -> customer config key
+    const CONFIG_FIELDS = {
+        config_customer_full_name: 'customer_full_name',
+        config_csm_primary: 'csm_primary',
+        config_csm_secondary: 'csm_secondary',
+        config_no_env: 'no_of_environments',
+        config_no_months: 'no_of_months',
+        config_customer_note: 'customer_note',
+        config_thr_availability: 'color_map_thresholds_availability',
+        config_thr_users: 'color_map_thresholds_users',
+        config_thr_storage: 'color_map_thresholds_storage',
+        config_indicator_colors: 'indicator_color_code_rules',
+        config_circle_colors: 'circle_color_code_rules',
+        config_notes_availability: 'notes_availability',
+        config_notes_users: 'notes_users',
+        config_notes_storage: 'notes_storage'
+    };
+
+    // Show a customer config returned by /metrics_data or /save_config
+    function applyConfig(config) {
+        const asText = value => (value === null || value === undefined) ? ''
+            : (typeof value === 'object' ? JSON.stringify(value) : `${value}`);
+        Object.entries(CONFIG_FIELDS).forEach(([id, key]) => {
+            const input = document.getElementById(id);
+            if (!input) return;
+            input.value = asText(config[key] ?? (key === 'no_of_environments' ? 2 : ''));
+            input.dataset.originalValue = input.value;
+            const display = document.getElementById(input.dataset.displayTarget);
+            if (display) display.textContent = input.value;
+        });
+        document.getElementById('config_customer_uid').value = '';
+        document.getElementById('config_customer_uid_display').textContent = (config.customer_uid || []).join(', ');
+        const counter = document.getElementById('note_char_count');
+        if (counter) counter.innerText = document.getElementById('config_customer_note').value.length;
+        document.getElementById('customerNote').textContent = config.customer_note || '';
+        applyNoOfEnvs(config.no_of_environments);
+    }
+
+    function closeOpenEditors() {
+        document.querySelectorAll('#metrics-data .metrics-section.is-editing').forEach(section => {
+            const button = section.querySelector('.section-header .btn');
+            toggleSectionEdit(button, button.getAttribute('data-section-name') || '', false);
+        });
+        closeConfigEditor();
+    }
+
+    function closeConfigEditor() {
+        const configSection = document.getElementById('customer-config-section');
+        if (configSection.classList.contains('is-editing')) {
+            toggleConfigEdit(configSection.querySelector('.section-subtitle-row .btn'));
+        }
+    }
+
+    function loadMetrics(customer, month) {
+        const params = new URLSearchParams({ customer, month });
+        return fetch(`/metrics_data?${params}`)
+            .then(r => r.json())
+            .then(res => {
+                if (!res.success) {
+                    showCustomAlert(res.message || 'Unable to load metrics.', 'Error');
+                    return;
+                }
+                closeOpenEditors();
+                document.getElementById('ppt-preview').classList.add('hidden');
+                metricsContainer.dataset.loadedCustomer = customer;
+                metricsContainer.dataset.loadedMonth = month;
+                METRICS_PAGE.selectedCustomer = customer;
+                METRICS_PAGE.selectedMonth = month;
+
+                const [year, mm] = month.split('-').map(Number);
+                const monthLabel = new Date(year, mm - 1, 1).toLocaleDateString('en-US', { year: 'numeric', month: 'long' });
+                document.getElementById('selectedCustomer').textContent = customer;
+                document.getElementById('selectedMonthLabel').textContent = `: ${monthLabel}`;
+
+                applyRecord(res.record);
+                applyConfig(res.config);
+                document.getElementById('metrics-data').hidden = false;
+            })
+            .catch(error => showCustomAlert(`Error loading metrics: ${error.message}`, 'Request Failed'));
+    }
+
+    function revertInput(input) {
+        if (!input) return;
+        const original = input.dataset.originalValue ?? '';
+        input.value = original;
+        updateDisplayForInput(input, original);
+    }
+
+    function revertInputs(inputs) {
+        inputs.forEach(revertInput);
+    }
+
+    function ensureCustomerAndMonth() {
+        const customer = getLoadedCustomer();
+        const month = getLoadedMonth();
+        if (!customer || !month) {
+            showCustomAlert('Please load a customer and month.', 'Action Required');
+            return null;
+        }
+        return { customer, month };
+    }
+
+    // Insert this in your <script> (before saveAvailability/saveUsers/saveStorage/saveTickets)
+function getGlobalEditCommentOrAlert(sectionName) {
+    const g = document.getElementById('globalComment');
+    const val = g ? g.value.trim() : '';
+    if (val) return val;
+
+    // map section -> friendly message
+    const messageMap = {
+        availability: "Please enter a reason for changing Availability in the global comment box.",
+        users:        "Please enter a reason for changing Users in the global comment box.",
+        storage:      "Please enter a reason for changing Storage in the global comment box.",
+        tickets:      "Please enter a reason for changing Tickets in the global comment box.",
+        config:       "Please enter a reason for changing Configuration."
+    };
+
+    const msg = messageMap[sectionName] || "Please enter a reason in the global comment box.";
+    showCustomAlert(msg, "Comment Required");
+    return null;
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    let currentEditingSectionName = null;
+    let currentEditButton = null;
+
+    const globalCommentWrapper = document.getElementById('globalCommentWrapper');
+    const globalComment = document.getElementById('globalComment');
+    const globalSave = document.getElementById('globalSave');
+    const globalCancel = document.getElementById('globalCancel');
+
+    // map section name -> existing save function name
+    const SAVE_FN_MAP = {
+        availability: 'saveAvailability',
+        users: 'saveUsers',
+        storage: 'saveStorage',
+        tickets: 'saveTickets',
+        config: 'saveConfiguration'
+    };
+
+    if (globalComment) {
+        globalComment.addEventListener('input', () => {
+            if (globalSave) globalSave.disabled = globalComment.value.trim().length === 0;
+        });
+    }
+
+    if (globalSave) {
+        globalSave.addEventListener('click', () => {
+            if (!currentEditingSectionName) {
+                showCustomAlert('No section is currently selected for saving.', 'Error');
+                return;
+            }
+            const fnName = SAVE_FN_MAP[currentEditingSectionName];
+            if (!fnName || typeof window[fnName] !== 'function') {
+                showCustomAlert('No save function available for this section.', 'Error');
+                return;
+            }
+            // call the save function for the active section — that function will call getGlobalEditCommentOrAlert internally
+            window[fnName]();
+        });
+    }
+
+    if (globalCancel) {
+        globalCancel.addEventListener('click', () => {
+            if (!currentEditButton || !currentEditingSectionName) return;
+            // use toggleSectionEdit to close current section
+            toggleSectionEdit(currentEditButton, currentEditingSectionName, false);
+        });
+    }
+
+    // Expose small helper so toggleSectionEdit can set the current editing references
+    window.__globalCommentUI = {
+        setActive: (sectionName, button) => {
+            currentEditingSectionName = sectionName;
+            currentEditButton = button;
+            if (globalCommentWrapper) globalCommentWrapper.style.display = 'block';
+            if (globalCancel) globalCancel.style.display = 'inline-block';
+            if (globalSave) globalSave.style.display = 'inline-block';
+            if (globalComment) { globalComment.value = ''; globalSave.disabled = true; }
+        },
+        clearActive: () => {
+            currentEditingSectionName = null;
+            currentEditButton = null;
+            if (globalCommentWrapper) globalCommentWrapper.style.display = 'none';
+            if (globalCancel) globalCancel.style.display = 'none';
+            if (globalSave) globalSave.style.display = 'none';
+            if (globalComment) { globalComment.value = ''; globalSave.disabled = true; }
+        }
+    };
+});
+
+
+    function saveAvailability() {
+    const section = document.querySelector(
+        "#availability_display"
+    ).closest(".metrics-section");
+
+    const editComment = getGlobalEditCommentOrAlert('availability');
+    if (!editComment) return;
+
+
+        const state = ensureCustomerAndMonth();
+        if (!state) return;
+
+        const availabilityInput = document.getElementById('availability');
+        const targetInput = document.getElementById('target');
+        const availabilityValue = parseFloat(availabilityInput.value);
+        const targetValue = parseFloat(targetInput.value);
+
+        if (Number.isNaN(availabilityValue) || Number.isNaN(targetValue)) {
+            showCustomAlert('Please enter valid numbers for availability and target.', 'Validation Error');
+            revertInputs([availabilityInput, targetInput]);
+            return;
+        }
+
+        if (availabilityValue > 100 || targetValue > 100) {
+            showCustomAlert('Availability and Target values must be ≤ 100%.', 'Validation Error');
+            revertInputs([availabilityInput, targetInput]);
+            return;
+        }
+
+        const availabilityString = availabilityValue.toFixed(2);
+        const targetString = targetValue.toFixed(2);
+
+        const onConfirm = () => {
+            const formData = new FormData();
+            formData.append('customer', state.customer);
+            formData.append('month', state.month);
+            formData.append('availability', availabilityString);
+            formData.append('target', targetString);
+            formData.append('edit_comment', editComment);
+
+            fetch('/save_availability', { method: 'POST', body: formData })
+                .then(response => response.json())
+                .then(data => {
+                    showCustomAlert(data.message, data.success ? 'Success' : 'Error');
+                    if (data.success) {
+                        applyRecord(data.record);
+                        const section = availabilityInput.closest('.metrics-section');
+                        const editButton = section.querySelector('.section-header .btn');
+                        sendAuditComment(state.customer, state.month, "availability", editComment, "UPDATE");
+                        toggleSectionEdit(editButton, 'availability', false);
+                    } else {
+                        revertInputs([availabilityInput, targetInput]);
+                    }
+                })
+                .catch(error => {
+                    showCustomAlert(`Error saving availability: ${error.message}`, 'Request Failed');
+                    revertInputs([availabilityInput, targetInput]);
+                });
+        };
+
+        showCustomConfirm(`Save Availability: ${availabilityString}% and Target: ${targetString}%?`, onConfirm, 'Confirm Changes');
+    }
+
+    function saveUsers() {
+    const section = document.querySelector(
+        "#prod_limit_display"
+    ).closest(".metrics-section");
+
+    const editComment = getGlobalEditCommentOrAlert('users');
+    if (!editComment) return;
+
+
+        const state = ensureCustomerAndMonth();
+        if (!state) return;
+
+        const prodLimitInput = document.getElementById('prod_limit');
+        const prodUsedInput = document.getElementById('prod_used');
+        const testLimitInput = document.getElementById('test_limit');
+        const testUsedInput = document.getElementById('test_used');
+        const devLimitInput = document.getElementById('dev_limit');
+        const devUsedInput = document.getElementById('dev_used');
+
+        const inputs = [prodLimitInput, prodUsedInput, testLimitInput, testUsedInput, devLimitInput, devUsedInput];
+        const values = inputs.map(input => parseInt(input.value, 10));
+
+        if (values.some(value => Number.isNaN(value) || value < 0)) {
+            showCustomAlert('All user values must be valid non-negative numbers.', 'Validation Error');
+            revertInputs(inputs);
+            return;
+        }
+
+        const [prodLimit, prodUsed, testLimit, testUsed, devLimit, devUsed] = values;
+
+        const warnings = [];
+        if (prodUsed > prodLimit) warnings.push('Prod Used > Limit');
+        if (testUsed > testLimit) warnings.push('Test Used > Limit');
+        if (devLimit > 0 && devUsed > devLimit) warnings.push('Dev Used > Limit');
+
+        let msg = `Save Users?\n\nProd: ${prodUsed.toLocaleString()} / ${prodLimit.toLocaleString()}\n` +
+                `Test: ${testUsed.toLocaleString()} / ${testLimit.toLocaleString()}`;
+
+        // Only show Dev if 3 environments
+        const noOfEnvs = parseInt(document.getElementById('metrics-container').dataset.noOfEnvs) || 2;
+        if (noOfEnvs === 3) {
+            msg += `\nDev: ${devUsed.toLocaleString()} / ${devLimit.toLocaleString()}`;
+        }
+
+        if (warnings.length > 0) msg += `\n\nWarning: ${warnings.join(', ')}`;
+
+        const onConfirm = () => {
+            const formData = new FormData();
+            formData.append('customer', state.customer);
+            formData.append('month', state.month);
+            formData.append('prod_limit', prodLimit);
+            formData.append('prod_used', prodUsed);
+            formData.append('test_limit', testLimit);
+            formData.append('test_used', testUsed);
+            formData.append('dev_limit', devLimit);
+            formData.append('dev_used', devUsed);
+            formData.append('edit_comment', editComment);
+
+            fetch('/save_users', { method: 'POST', body: formData })
+                .then(response => response.json())
+                .then(data => {
+                    showCustomAlert(data.message, data.success ? 'Success' : 'Error');
+                    if (data.success) {
+                        applyRecord(data.record);
+                        const section = prodLimitInput.closest('.metrics-section');
+                        const editButton = section.querySelector('.section-header .btn');
+                        sendAuditComment(state.customer, state.month, "users", editComment, "UPDATE");
+                        toggleSectionEdit(editButton, 'users', false);
+                    } else {
+                        revertInputs(inputs);
+                    }
+                })
+                .catch(error => {
+                    showCustomAlert(`Error saving users data: ${error.message}`, 'Request Failed');
+                    revertInputs(inputs);
+                });
+        };
+
+        showCustomConfirm(msg, onConfirm, 'Confirm User Changes');
+    }
+
+    function saveStorage() {
+    const section = document.querySelector(
+        "#prod_target_display"
+    ).closest(".metrics-section");
+
+    const editComment = getGlobalEditCommentOrAlert('storage');
+    if (!editComment) return;
+
+
+        const state = ensureCustomerAndMonth();
+        if (!state) return;
+
+        const prodTargetInput = document.getElementById('prod_target');
+        const prodActualInput = document.getElementById('prod_actual');
+        const testTargetInput = document.getElementById('test_target');
+        const testActualInput = document.getElementById('test_actual');
+        const devTargetInput = document.getElementById('dev_target');
+        const devActualInput = document.getElementById('dev_actual');
+        const inputs = [prodTargetInput, prodActualInput, testTargetInput, testActualInput, devTargetInput, devActualInput];
+        const values = inputs.map(input => parseFloat(input.value));
+
+        if (values.some(value => Number.isNaN(value) || value < 0)) {
+            showCustomAlert('All storage values must be valid non-negative numbers.', 'Validation Error');
+            revertInputs(inputs);
+            return;
+        }
+
+        const [prodTarget, prodActual, testTarget, testActual, devTarget, devActual] = values;
+
+        const onConfirm = () => {
+            const formData = new FormData();
+            formData.append('customer', state.customer);
+            formData.append('month', state.month);
+            formData.append('prod_target', prodTarget);
+            formData.append('prod_actual', prodActual);
+            formData.append('test_target', testTarget);
+            formData.append('test_actual', testActual);
+            formData.append('dev_target', devTarget);
+            formData.append('dev_actual', devActual);
+            formData.append('edit_comment', editComment);
+
+            fetch('/save_storage', { method: 'POST', body: formData })
+                .then(response => response.json())
+                .then(data => {
+                    showCustomAlert(data.message, data.success ? 'Success' : 'Error');
+                    if (data.success) {
+                        applyRecord(data.record);
+                        const section = prodTargetInput.closest('.metrics-section');
+                        const editButton = section.querySelector('.section-header .btn');
+                        sendAuditComment(state.customer, state.month, "storage", editComment, "UPDATE");
+                        toggleSectionEdit(editButton, 'storage', false);
+                    } else {
+                        revertInputs(inputs);
+                    }
+                })
+                .catch(error => {
+                    showCustomAlert(`Error saving storage data: ${error.message}`, 'Request Failed');
+                    revertInputs(inputs);
+                });
+        };
+
+        const noOfEnvs = parseInt(document.getElementById('metrics-container').dataset.noOfEnvs) || 2;
+
+        let msg = `Save Storage?\n\nProd : ${prodTarget.toFixed(4)} / ${prodActual.toFixed(4)} \n` +
+                `Test : ${testTarget.toFixed(4)} / ${testActual.toFixed(4)} `;
+
+        if (noOfEnvs === 3) {
+            msg += `\nDev : ${devTarget.toFixed(4)} / ${devActual.toFixed(4)} `;
+        }
+
+        const warnings = [];
+        if (prodActual > prodTarget) warnings.push('Prod Actual > Target');
+        if (testActual > testTarget) warnings.push('Test Actual > Target');
+        if (noOfEnvs === 3 && devActual > devTarget) warnings.push('Dev Actual > Target');
+
+        if (warnings.length > 0) msg += `\n\nWarning: ${warnings.join(', ')}`;
+
+        showCustomConfirm(msg, onConfirm, 'Confirm Storage Changes');
+    }
+
+function saveTickets() {
+
+    const state = ensureCustomerAndMonth();
+    if (!state) return;
+
+    // Correctly get THIS section (Tickets)
+    const section = document.querySelector("#opened_display").closest(".metrics-section");
+
+    // Get comment
+    const editComment = getGlobalEditCommentOrAlert('tickets'); 
+    if (!editComment) return;
+
+
+    // Inputs
+    const openedInput = document.getElementById('opened');
+    const closedInput = document.getElementById('closed');
+    const currBacklogInput = document.getElementById('curr_backlog');
+    const overallBacklogInput = document.getElementById('overall_backlog');
+
+    const inputs = [openedInput, closedInput, currBacklogInput, overallBacklogInput];
+    const values = inputs.map(input => parseInt(input.value, 10));
+
+    if (values.some(v => Number.isNaN(v) || v < 0)) {
+        showCustomAlert('Ticket counts must be valid non-negative numbers.', 'Validation Error');
+        revertInputs(inputs);
+        return;
+    }
+
+    const [opened, closed, curr_backlog, overall_backlog] = values;
+
+    const payload = {
+        customer: state.customer,
+        month: state.month,
+        opened,
+        closed,
+        curr_backlog,
+        overall_backlog,
+        edit_comment: editComment
+    };
+
+    const onConfirm = () => {
+        fetch('/save_tickets', {
+            method: 'POST',
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify(payload)
+        })
+        .then(r => r.json())
+        .then(res => {
+            showCustomAlert(res.message, res.success ? 'Success' : 'Error');
+            if (res.success) {
+
+                // Update UI from the saved record
+                applyRecord(res.record);
+
+                // Exit edit mode
+                const editBtn = section.querySelector('.section-header .btn');
+                sendAuditComment(state.customer, state.month, "tickets", editComment, "UPDATE");
+                toggleSectionEdit(editBtn, 'tickets', false);
+
+            } else {
+                revertInputs(inputs);
+            }
+        })
+        .catch(err => {
+            showCustomAlert(`Cannot save tickets. ${err.message}`, 'Request Failed');
+            revertInputs(inputs);
+        });
+    };
+
+    showCustomConfirm(
+        'Are you sure you want to save the ticket changes?',
+        onConfirm,
+        'Confirm Ticket Updates'
+    );
+}
+
+    function toggleConfigVisibilityTitle() {
+        const section = document.getElementById("config-content");
+        const arrow = document.getElementById("config-title-arrow");
+
+        section.classList.toggle("hidden");
+        arrow.textContent = section.classList.contains("hidden") ? "▲" : "▼";
+    }
+
+function toggleSectionEdit(button, sectionName, forceState) {
+    const section = button.closest(".metrics-section");
+    const isEditing = section.classList.contains("is-editing");
+    const targetState = (forceState === undefined) ? !isEditing : forceState;
+
+    const viewElements = section.querySelectorAll("[data-view-mode]");
+    const editElements = section.querySelectorAll(".inline-editor");
+    const actionBar = section.querySelector(".actions-bar");
+
+    if (targetState) {
+        // close any other editing section
+        const currentlyEditing = document.querySelector(".metrics-section.is-editing");
+        if (currentlyEditing && currentlyEditing !== section) {
+            const otherBtn = currentlyEditing.querySelector(".section-header .btn");
+            const otherName = otherBtn ? otherBtn.getAttribute('data-section-name') : null;
+            if (otherBtn) toggleSectionEdit(otherBtn, otherName || '', false);
+        }
+
+        section.classList.add("is-editing");
+        button.textContent = "Cancel";
+        button.classList.remove("btn-secondary");
+        button.classList.add("btn-danger");
+
+        viewElements.forEach(el => el.style.display = "none");
+        editElements.forEach(el => el.style.display = "block");
+
+        if (actionBar) actionBar.style.display = "none"; // hide per-section action/comment area
+
+        // show global comment box and track current section
+        if (window.__globalCommentUI) window.__globalCommentUI.setActive(sectionName, button);
+
+        // ensure the button has data attribute (helpful when closing)
+        button.setAttribute('data-section-name', sectionName);
+        return;
+    }
+
+    // EXIT edit mode
+    section.classList.remove("is-editing");
+    button.textContent = "Edit";
+    button.classList.add("btn-secondary");
+    button.classList.remove("btn-danger");
+
+    viewElements.forEach(el => el.style.display = "");
+    editElements.forEach(el => el.style.display = "none");
+
+    if (actionBar) {
+        const commentBox = actionBar.querySelector(".edit-comment-container");
+        if (commentBox) {
+            commentBox.style.display = "none";
+            const input = commentBox.querySelector(".edit-comment-input");
+            if (input) input.value = "";
+        }
+        actionBar.style.display = "none";
+    }
+
+    // if no other section is editing, hide the global comment
+    const anyEditing = document.querySelector(".metrics-section.is-editing");
+    if (!anyEditing) {
+        if (window.__globalCommentUI) window.__globalCommentUI.clearActive();
+    } else {
+        // otherwise update active to the other editing section
+        const other = document.querySelector(".metrics-section.is-editing");
+        if (other) {
+            const otherBtn = other.querySelector(".section-header .btn");
+            const otherName = otherBtn ? otherBtn.getAttribute('data-section-name') : null;
+            if (window.__globalCommentUI) window.__globalCommentUI.setActive(otherName, otherBtn);
+        }
+    }
+}
+
+
+
+    function toggleConfigEdit(button) {
+
+    const section = document.getElementById("customer-config-section");
+    const viewElements = section.querySelectorAll("[data-view-mode]");
+    const editElements = section.querySelectorAll(".inline-editor");
+    const saveContainer = document.getElementById("config-save-container");
+    const isEditing = section.classList.contains("is-editing");
+
+    // -------------------- ENTER EDIT MODE --------------------
+    if (!isEditing) {
+        section.classList.add("is-editing");
+
+        // Change Edit → Cancel
+        button.textContent = "Cancel";
+        button.classList.remove("btn-secondary");
+        button.classList.add("btn-danger");
+
+        // Show editors
+        viewElements.forEach(el => el.style.display = "none");
+        editElements.forEach(el => el.style.display = "block");
+
+        // Show Save container
+        saveContainer.style.display = "block";
+
+        const commentInput = document.getElementById("config_edit_comment");
+        const saveBtn = saveContainer.querySelector("button");
+
+        // Reset comment + hide save button
+        commentInput.value = "";
+        saveBtn.style.display = "none";
+
+        // Show Save button only when typing
+        commentInput.addEventListener("input", () => {
+            saveBtn.style.display = commentInput.value.trim().length > 0 ? "inline-block" : "none";
+        });
+        return;
+    }
+
+    // -------------------- EXIT EDIT MODE --------------------
+    section.classList.remove("is-editing");
+
+    // Change Cancel → Edit
+    button.textContent = "Edit";
+    button.classList.add("btn-secondary");
+    button.classList.remove("btn-danger");
+
+    // Restore view mode
+    viewElements.forEach(el => el.style.display = "");
+    editElements.forEach(el => el.style.display = "none");
+
+    // Hide save button
+    saveContainer.style.display = "none";
+    document.getElementById("config_edit_comment").value = "";
+
+}
+
+    function showCustomAlert(message, title = 'Alert') {
+        document.getElementById('customAlertTitle').textContent = title;
+        document.getElementById('customAlertMessage').textContent = message;
+        document.getElementById('customAlertModal').classList.add('visible');
+    }
+
+    function closeCustomAlert() {
+        document.getElementById('customAlertModal').classList.remove('visible');
+    }
+
+    let confirmCallback = null;
+    function showCustomConfirm(message, onConfirm, title = 'Confirmation') {
+        document.getElementById('customConfirmTitle').textContent = title;
+        document.getElementById('customConfirmMessage').textContent = message;
+        confirmCallback = onConfirm;
+        document.getElementById('customConfirmModal').classList.add('visible');
+    }
+
+    function closeCustomConfirm() {
+        document.getElementById('customConfirmModal').classList.remove('visible');
+        confirmCallback = null;
+    }
+
+    document.getElementById('customConfirmButton').addEventListener('click', () => {
+        if (confirmCallback) confirmCallback();
+        closeCustomConfirm();
+    });
+
+    function generatePPT() {
+        const state = ensureCustomerAndMonth();
+        if (!state) return;
+        const { customer, month } = state;
+
+        let monthLabel = '';
+        try {
+            monthLabel = new Date(month).toLocaleDateString('en-US', { year: 'numeric', month: 'long' });
+        } catch (error) {
+            monthLabel = month;
+        }
+
+        showCustomConfirm(`Generate PowerPoint for ${customer} - ${monthLabel}?`, () => {
+            const formData = new FormData();
+            formData.append('customer', customer);
+            formData.append('month', month);
+
+            fetch('/generate_ppt', { method: 'POST', body: formData })
+                .then(async response => {
+                    const contentType = response.headers.get('Content-Type') || '';
+
+                    if (!response.ok || contentType.includes('application/json')) {
+                        let data = {};
+                        try {
+                            data = await response.json();
+                        } catch (error) {
+                            data = {};
+                        }
+                        showCustomAlert(data.message || 'Failed to generate PowerPoint.', 'Generation Failed');
+                        return;
+                    }
+
+                    const blob = await response.blob();
+                    const downloadUrl = window.URL.createObjectURL(blob);
+                    const tempLink = document.createElement('a');
+
+                    const disposition = response.headers.get('Content-Disposition') || '';
+                    const filenameMatch = disposition.match(/filename="?([^"]+)"?/);
+                    const filename = filenameMatch ? filenameMatch[1] : `${customer}_${month.replace(/-/g, '_')}.pptx`;
+
+                    tempLink.href = downloadUrl;
+                    tempLink.download = filename;
+                    document.body.appendChild(tempLink);
+                    tempLink.click();
+                    tempLink.remove();
+                    window.URL.revokeObjectURL(downloadUrl);
+                })
+                .catch(error => {
+                    showCustomAlert(`Error generating PPT: ${error.message}`, 'Request Failed');
+                });
+        }, 'Confirm Generation');
+    }
+
+    function previewPPT() {
+        const state = ensureCustomerAndMonth();
+        if (!state) return;
+
+        const formData = new FormData();
+        formData.append('customer', state.customer);
+        formData.append('month', state.month);
+
+        fetch('/preview_ppt', { method: 'POST', body: formData })
+            .then(r => r.json())
+            .then(res => {
+                if (!res.success) {
+                    showCustomAlert(res.message || 'Failed to build preview.', 'Preview Failed');
+                    return;
+                }
+                renderPptPreview(res.preview);
+            })
+            .catch(error => {
+                showCustomAlert(`Error building preview: ${error.message}`, 'Request Failed');
+            });
+    }
+
+    function previewElement(tag, text, className) {
+        const el = document.createElement(tag);
+        if (text !== undefined && text !== null) el.textContent = text;
+        if (className) el.className = className;
+        return el;
+    }
+
+    function previewTable(headers, rows) {
+        const table = document.createElement('table');
+        const headRow = table.createTHead().insertRow();
+        headers.forEach(h => headRow.appendChild(previewElement('th', h)));
+        const body = table.createTBody();
+        rows.forEach(row => {
+            const tr = body.insertRow();
+            row.forEach(cell => tr.appendChild(previewElement('td', cell)));
+        });
+        return table;
+    }
+
+    // Chart datasets ({Months: [...], <series>: [...]}) as a months x series table
+    function previewChartTable(chart) {
+        const series = Object.keys(chart).filter(k => k !== 'Months');
+        const rows = chart.Months.map((m, i) => [m, ...series.map(s => chart[s][i])]);
+        return previewTable(['Month', ...series], rows);
+    }
+
+    function previewStatus(title, status, extraLines) {
+        const card = previewElement('div', null, 'metric-card');
+        const heading = previewElement('div', null, 'ppt-preview-status');
+        const swatch = previewElement('span', null, 'ppt-preview-swatch');
+        swatch.style.background = `rgb(${status.circle_color.join(',')})`;
+        heading.appendChild(swatch);
+        heading.appendChild(previewElement('span', `${title}: ${status.color_key}`));
+        card.appendChild(heading);
+        extraLines.forEach(line => card.appendChild(previewElement('div', line)));
+        if (status.notes.length) {
+            const list = previewElement('ul', null, 'ppt-preview-notes');
+            status.notes.forEach(n => list.appendChild(previewElement('li', n)));
+            card.appendChild(list);
+        }
+        return card;
+    }
+
+    function renderPptPreview(preview) {
+        const container = document.getElementById('ppt-preview');
+        container.innerHTML = '';
+
+        const header = previewElement('div', null, 'ppt-preview-header');
+        const s1 = preview.slide1;
+        header.appendChild(previewElement('strong', `${s1.Customer_Name} - ${s1.Month} (${s1.CSM_Name})`));
+        const closeBtn = previewElement('button', '×', 'modal-close');
+        closeBtn.onclick = () => container.classList.add('hidden');
+        header.appendChild(closeBtn);
+        container.appendChild(header);
+
+        const redLine = st => `Prod ${st.prod_red ? '✗' : '✓'}  Test ${st.test_red ? '✗' : '✓'}`;
+        const statusGrid = previewElement('div', null, 'metrics-grid');
+        statusGrid.appendChild(previewStatus('Availability', preview.status.slide2,
+            [`Actual ${preview.slide2.Actual_Value} / Target ${preview.slide2.Target_Value}`]));
+        statusGrid.appendChild(previewStatus('Users', preview.status.slide3, [redLine(preview.status.slide3)]));
+        statusGrid.appendChild(previewStatus('Storage', preview.status.slide4, [redLine(preview.status.slide4)]));
+        container.appendChild(statusGrid);
+
+        const tables = [
+            ['Availability', previewChartTable(preview.slide2.Production_Availability_Chart)],
+            ['User Licenses', previewTable(preview.slide3.User_License_Utilization_Table.headers,
+                                           preview.slide3.User_License_Utilization_Table.rows)],
+            ['User Counts', previewChartTable(preview.slide3.Production_User_Counts_Chart)],
+            ['Storage', previewTable(preview.slide4.Storage_Utilization_Table.headers,
+                                     preview.slide4.Storage_Utilization_Table.rows)],
+            ['Storage Usage', previewChartTable(preview.slide4.Production_Storage_Usage_Chart)],
+            [`Cases (open: ${preview.slide5.Open_Cases_Value})`, previewTable(preview.slide5.Case_Status_Table.headers,
+                                                                             preview.slide5.Case_Status_Table.rows)],
+            ['Case Trend', previewChartTable(preview.slide5.Case_Trend_Chart)],
+        ];
+        const grid = previewElement('div', null, 'metrics-grid');
+        tables.forEach(([title, table]) => {
+            const card = previewElement('div', null, 'metric-card');
+            card.appendChild(previewElement('div', title, 'metric-label'));
+            card.appendChild(table);
+            grid.appendChild(card);
+        });
+        container.appendChild(grid);
+        container.classList.remove('hidden');
+    }
+
+function sendAuditComment(customer, month, section, comment, operation) {
+    if (!comment || !comment.trim()) return; // nothing to attach
+
+    fetch("/attach_comment", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+            customer,
+            month,
+            section,
+            comment,
+            operation
+        })
+    })
+    .then(r => r.json())
+    .then(res => {
+        if (!res.success) {
+            console.warn("Audit comment failed:", res.message);
+        }
+    })
+    .catch(err => console.error("Audit comment error:", err));
+}
+
+(function() {
+    const customers = METRICS_PAGE.customers;
+    const searchInput = document.getElementById('customer-search');
+    const hiddenInput = document.getElementById('customer');
+    const dropdown = document.getElementById('customer-dropdown');
+    const arrow = document.querySelector('.custom-select-arrow');
+    let highlightedIndex = -1;
+    // Populate dropdown (match either name or full)
+function populateDropdown(filter = '') {
+    const filtered = customers.filter(c => {
+        const filterL = filter.toLowerCase();
+        return (c.name && c.name.toLowerCase().includes(filterL))
+            || (c.full && c.full.toLowerCase().includes(filterL));
+    });
+
+    dropdown.innerHTML = '';
+
+    if (filtered.length === 0) {
+        const noResult = document.createElement('div');
+        noResult.className = 'custom-select-option no-results';
+        noResult.textContent = 'No customers found';
+        dropdown.appendChild(noResult);
+    } else {
+        filtered.forEach((customerObj, index) => {
+            const option = document.createElement('div');
+            option.className = 'custom-select-option';
+            // display "name — full" if full exists, otherwise just name
+            option.textContent = `${customerObj.name} ${customerObj.full}`;
+            option.dataset.value = customerObj.name;
+            option.dataset.index = index;
+
+            option.addEventListener('click', () => selectCustomer(customerObj.name));
+            dropdown.appendChild(option);
+        });
+    }
+
+    highlightedIndex = -1;
+}
+
+// Select customer (sets hidden value to the DB key: name)
+function selectCustomer(customerName) {
+    // find display string for this name:
+    const c = customers.find(x => x.name === customerName);
+    searchInput.value = `${c.name} ${c.full}`;
+    hiddenInput.value = customerName;
+    dropdown.classList.remove('show');
+    arrow.textContent = '˅';
+
+    // Trigger month population
+    populateMonths(customerName);
+}
+
+
+    // Show dropdown
+    function showDropdown() {
+        populateDropdown(searchInput.value);
+        dropdown.classList.add('show');
+        arrow.textContent = '˄';
+    }
+
+    // Hide dropdown
+    function hideDropdown() {
+        dropdown.classList.remove('show');
+        arrow.textContent = '˅';
+    }
+
+    // Highlight option
+    function highlightOption(index) {
+        const options = dropdown.querySelectorAll('.custom-select-option:not(.no-results)');
+        options.forEach(opt => opt.classList.remove('highlighted'));
+
+        if (index >= 0 && index < options.length) {
+            options[index].classList.add('highlighted');
+            options[index].scrollIntoView({ block: 'nearest' });
+            highlightedIndex = index;
+        }
+    }
+
+    // Event: Click input
+    searchInput.addEventListener('click', () => {
+        showDropdown();
+    });
+
+    // Event: Type in input
+    searchInput.addEventListener('input', (e) => {
+        hiddenInput.value = '';
+        populateDropdown(e.target.value);
+        if (!dropdown.classList.contains('show')) {
+            showDropdown();
+        }
+    });
+
+    // Event: Keyboard navigation
+    searchInput.addEventListener('keydown', (e) => {
+        const options = dropdown.querySelectorAll('.custom-select-option:not(.no-results)');
+
+        if (e.key === 'ArrowDown') {
+            e.preventDefault();
+            if (!dropdown.classList.contains('show')) {
+                showDropdown();
+            } else {
+                highlightOption((highlightedIndex + 1) % options.length);
+            }
+        } else if (e.key === 'ArrowUp') {
+            e.preventDefault();
+            if (dropdown.classList.contains('show')) {
+                highlightOption((highlightedIndex - 1 + options.length) % options.length);
+            }
+        } else if (e.key === 'Enter') {
+            e.preventDefault();
+            if (highlightedIndex >= 0 && options[highlightedIndex]) {
+                selectCustomer(options[highlightedIndex].dataset.value);
+            }
+        } else if (e.key === 'Escape') {
+            hideDropdown();
+        }
+    });
+
+    // Event: Click outside
+    document.addEventListener('click', (e) => {
+        if (!searchInput.contains(e.target) && !dropdown.contains(e.target)) {
+            hideDropdown();
+        }
+    });
+
+    // Initialize with preselected value if exists
+    if (hiddenInput.value) {
+        searchInput.value = hiddenInput.value;
+    }
+})();
+
+let currentEditingSectionName = null;
+let currentEditButton = null;
+
+const globalCommentWrapper = document.getElementById('globalCommentWrapper');
+const globalComment = document.getElementById('globalComment');
+const globalSave = document.getElementById('globalSave');
+const globalCancel = document.getElementById('globalCancel');
+
+// enable Save when there is text
+globalComment.addEventListener('input', () => {
+  globalSave.disabled = globalComment.value.trim().length === 0;
+});
+
+// Global Save calls the appropriate save function
+const SAVE_FN_MAP = {
+  availability: 'saveAvailability',
+  users: 'saveUsers',
+  storage: 'saveStorage',
+  tickets: 'saveTickets',
+  config: 'saveConfiguration'
+};
+
+globalSave.addEventListener('click', () => {
+  if (!currentEditingSectionName) return showCustomAlert('No section selected to save.', 'Error');
+  const fnName = SAVE_FN_MAP[currentEditingSectionName];
+  if (!fnName || typeof window[fnName] !== 'function') return showCustomAlert('Save function not available.', 'Error');
+  window[fnName]();
+});
+
+globalCancel.addEventListener('click', () => {
+  if (!currentEditButton || !currentEditingSectionName) return;
+  toggleSectionEdit(currentEditButton, currentEditingSectionName, false);
+});
@@ -0,0 +1,133 @@
+"""
+The columnar replica must answer every endpoint it serves exactly as SQL does.
+
+Each request runs once with the replica disabled (the SQL path) and once from the replica,
+for every customer and CSM in the database (a few test rows are added), and the response
+bodies must be identical: after a full load, and after per-customer refreshes, the path
+the change hooks take.
+
+Needs a database with the app's tables (benchmarks/schema.sql); set CSM_DB_NAME / CSM_DB_HOST /
+CSM_DB_PORT as for the app, plus CSM_TEST_DB_USER and CSM_TEST_DB_PASSWORD. Skipped otherwise.
+"""
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+pytestmark = pytest.mark.skipif(not os.environ.get('CSM_TEST_DB_USER'),
+                                reason='CSM_TEST_DB_USER not set (needs a database)')
+
+CUSTOMERS = ('zz_test_replica_a', 'zz_test_replica_b')
+CSM = 'zz Test Replica CSM'
+MONTHS = (date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1))
+PENDING = date(2025, 4, 1)
+
+
+@pytest.fixture
+def replica_setup():
+    os.environ.setdefault('CSM_SESSION_DB', os.path.join(tempfile.mkdtemp(), 'sessions.sqlite3'))
+    os.environ.setdefault('CSM_SNAPSHOTS', '0')
+    import app as app_module
+    import psycopg2
+
+    user, password = os.environ['CSM_TEST_DB_USER'], os.environ.get('CSM_TEST_DB_PASSWORD', '')
+    conn = psycopg2.connect(user=user, password=password, **app_module.DB_CONFIG)
+    with conn.cursor() as cur:
+        for n, customer in enumerate(CUSTOMERS):
+            for i, month in enumerate(MONTHS):
+                cur.execute("""
+                    INSERT INTO final_computed_table (customer_name, month_year, csm_primary, csm_secondary,
+                        customer_full_name, updated_availability, updated_prod_storage_gb, updated_p1_opened)
+                    VALUES (%s, %s, %s, %s, 'Replica Test', %s, %s, %s)
+                """, (customer, month, CSM, None if n else CSM, Decimal('99.95') - i, Decimal('1.500'), i or None))
+            for month in MONTHS + (PENDING,):
+                cur.execute("INSERT INTO customer_mapping_table (customer_name, month_year) VALUES (%s, %s)",
+                            (customer, month))
+    conn.commit()
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = user
+        sess['password'] = password
+        sess['last_activity'] = datetime.now().isoformat()
+    enabled = app_module.replica.enabled
+    try:
+        yield app_module, client, conn
+    finally:
+        app_module.replica.enabled = enabled
+        with conn.cursor() as cur:
+            for table in ('final_computed_table', 'customer_mapping_table', 'customer_config_versions'):
+                cur.execute(f"DELETE FROM {table} WHERE customer_name = ANY(%s)", (list(CUSTOMERS),))
+        conn.commit()
+        conn.close()
+        app_module.replica.invalidate()
+        app_module.pages.invalidate()
+
+
+def build_requests(customers, csms, end_month):
+    """(method, path, json body) for every replica-served request."""
+    requests = [('GET', '/get_customers_pending_tables', None), ('GET', '/reporting?reload=1', None)]
+    for customer in customers + ['no-such-customer']:
+        requests.append(('GET', f'/get_months/{customer}', None))
+        requests.append(('GET', f'/get_months_pending_tables/{customer}', None))
+    for csm in csms + ['no-such-csm']:
+        requests.append(('POST', '/get_months_for_csm', {'csm': csm}))
+        for back in (0, 6, 13):
+            start = (end_month - relativedelta(months=back)).strftime('%Y-%m-%d')
+            for num_months in (1, 6, 12):
+                requests.append(('POST', '/load_multi_month_csm_data',
+                                 {'csm': csm, 'start_month': start, 'num_months': num_months}))
+    return requests
+
+
+def fetch(client, request):
+    method, path, body = request
+    if method == 'GET':
+        return client.get(path).get_data()
+    return client.post(path, json=body).get_data()
+
+
+def mismatches(app_module, client, snapshot):
+    """The requests whose replica response differs from the SQL one."""
+    different = []
+    for request in build_requests(snapshot.customers, snapshot.csms, max(snapshot.months())):
+        app_module.pages.invalidate()
+        app_module.replica.enabled = False
+        expected = fetch(client, request)
+        app_module.replica.enabled = True
+        if fetch(client, request) != expected:
+            different.append(request)
+    return different
+
+
+def test_full_load_matches_sql(replica_setup):
+    app_module, client, conn = replica_setup
+    app_module.replica.invalidate()
+    snapshot = app_module.replica.load(conn)
+
+    assert set(CUSTOMERS) <= set(snapshot.customer_names())
+    assert snapshot.pending_months(CUSTOMERS[0]) == [PENDING]
+    assert mismatches(app_module, client, snapshot) == []
+
+
+def test_refreshed_customers_match_sql(replica_setup):
+    app_module, client, conn = replica_setup
+    app_module.replica.invalidate()
+    loaded = app_module.replica.load(conn)
+    with conn.cursor() as cur:
+        cur.execute("UPDATE final_computed_table SET updated_availability = 12.5, csm_secondary = NULL"
+                    " WHERE customer_name = %s AND month_year = %s", (CUSTOMERS[0], MONTHS[1]))
+        cur.execute("INSERT INTO final_computed_table (customer_name, month_year, csm_primary) VALUES (%s, %s, %s)",
+                    (CUSTOMERS[1], PENDING, CSM))
+    conn.commit()
+
+    for customer in loaded.customers:
+        app_module.replica.refresh(conn, customer)
+    snapshot = app_module.replica.load(conn)  # the refreshed snapshot: still fresh, so not reloaded
+
+    assert snapshot is not loaded
+    assert snapshot.pending_months(CUSTOMERS[1]) == []
+    assert mismatches(app_module, client, snapshot) == []
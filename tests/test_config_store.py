@@ -0,0 +1,103 @@
+"""
+The metrics page must only show a configuration that save_config can save.
+
+Needs a database with the app's tables (benchmarks/schema.sql); set CSM_DB_NAME / CSM_DB_HOST /
+CSM_DB_PORT as for the app, plus CSM_TEST_DB_USER and CSM_TEST_DB_PASSWORD. Skipped otherwise.
+"""
+import os
+import tempfile
+from datetime import date, datetime
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.environ.get('CSM_TEST_DB_USER'),
+                                reason='CSM_TEST_DB_USER not set (needs a database)')
+
+CUSTOMER = 'zz_test_config_store'
+CONFIGURED = (date(2025, 1, 1), date(2025, 3, 1))
+UNCONFIGURED = date(2025, 2, 1)
+
+
+@pytest.fixture
+def client_and_conn():
+    os.environ.setdefault('CSM_SESSION_DB', os.path.join(tempfile.mkdtemp(), 'sessions.sqlite3'))
+    os.environ.setdefault('CSM_SNAPSHOTS', '0')
+    import app as app_module
+    import config_store
+    import psycopg2
+
+    user, password = os.environ['CSM_TEST_DB_USER'], os.environ.get('CSM_TEST_DB_PASSWORD', '')
+    conn = psycopg2.connect(user=user, password=password, **app_module.DB_CONFIG)
+    with conn.cursor() as cur:
+        for month in CONFIGURED + (UNCONFIGURED,):
+            cur.execute("INSERT INTO final_computed_table (customer_name, month_year) VALUES (%s, %s)",
+                        (CUSTOMER, month))
+        for month in CONFIGURED:
+            cur.execute("""
+                INSERT INTO customer_mapping_table (customer_name, month_year, customer_full_name, no_of_environments)
+                VALUES (%s, %s, 'Config Store Test', 2)
+            """, (CUSTOMER, month))
+    conn.commit()
+    config_store.migrate(conn, CUSTOMER)
+    app_module.configs.invalidate(CUSTOMER)
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = user
+        sess['password'] = password
+        sess['last_activity'] = datetime.now().isoformat()
+    try:
+        yield client, conn
+    finally:
+        with conn.cursor() as cur:
+            for table in ('final_computed_table', 'customer_mapping_table', 'customer_config_versions'):
+                cur.execute(f"DELETE FROM {table} WHERE customer_name = %s", (CUSTOMER,))
+        conn.commit()
+        conn.close()
+        app_module.configs.invalidate(CUSTOMER)
+
+
+def save_config(client, month):
+    return client.post('/save_config', json={
+        'customer': CUSTOMER, 'month': month.strftime('%Y-%m-%d'),
+        'customer_full_name': 'Config Store Test', 'no_of_envs': 2, 'no_of_months': 6,
+        **{key: '{}' for key in ('thr_availability', 'thr_users', 'thr_storage', 'indicator_colors',
+                                 'circle_colors', 'notes_availability', 'notes_users', 'notes_storage')},
+    }).get_json()
+
+
+def test_metrics_config_matches_what_save_config_accepts(client_and_conn):
+    client, _ = client_and_conn
+    for month in CONFIGURED + (UNCONFIGURED,):
+        shown = client.get(f'/metrics_data?customer={CUSTOMER}&month={month:%Y-%m-%d}').get_json()
+        assert shown['success']
+        assert bool(shown['config']) == save_config(client, month)['success'], month
+
+
+def test_month_without_its_own_row_shows_no_configuration(client_and_conn):
+    client, conn = client_and_conn
+    import app as app_module
+
+    assert app_module.configs.resolve(conn, CUSTOMER, UNCONFIGURED)['effective_from'] == CONFIGURED[0]
+    assert app_module.configs.resolve(conn, CUSTOMER, UNCONFIGURED, exact=True) is None
+    shown = client.get(f'/metrics_data?customer={CUSTOMER}&month={UNCONFIGURED:%Y-%m-%d}').get_json()
+    assert shown['config'] == {}
+
+
+def test_writes_outside_the_app_reach_the_versions(client_and_conn):
+    _, conn = client_and_conn
+    import config_store
+
+    with conn.cursor() as cur:
+        cur.execute("UPDATE customer_mapping_table SET customer_full_name = 'Renamed Outside'"
+                    " WHERE customer_name = %s AND month_year = %s", (CUSTOMER, CONFIGURED[1]))
+        cur.execute("INSERT INTO customer_mapping_table (customer_name, month_year, customer_full_name)"
+                    " VALUES (%s, %s, 'Renamed Outside')", (CUSTOMER, UNCONFIGURED))
+        cur.execute(config_store._VERSIONS_SQL, {'customer': CUSTOMER})
+        stored = cur.fetchall()
+        cur.execute(config_store._DERIVED_VERSIONS_SQL, {'customer': CUSTOMER})
+        derived = cur.fetchall()
+    conn.commit()
+
+    assert [row[0] for row in stored] == [CONFIGURED[0], UNCONFIGURED]
+    assert stored == derived
@@ -0,0 +1,287 @@
+"""
+Each customer's full monthly series of final_computed_table, kept in memory as column arrays.
+
+The reporting page and deck generation both read a window of a customer's months (the
+months up to an end month, N of them, with N from the page or from no_of_months).
+WindowCache loads the whole series once and slices any (end month, N) window from it, so
+a reporting view followed by a deck for the same customer reads the database once.
+
+A series is a sorted int64 array of month ordinals plus one array per column: float64
+(NaN for NULL) for numeric and integer columns, object arrays for the rest. Rows are
+rebuilt as cursor rows would be: numeric values as Decimal, integers as int, dates as
+date. update_hook keeps cached series current after writes by re-reading only the
+changed month, or that month onwards when the write propagates, and splicing it in, so a
+new month is appended and a save replaces one row. At most `max_customers` series are
+kept (least recently used dropped), each for `ttl` seconds, which bounds staleness after
+writes from other workers.
+
+Series are loaded as json_agg text so the load can be one column of a larger query
+(load_parts / store), e.g. the reporting page's single query.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+DEFAULT_MAX_CUSTOMERS = 256
+DEFAULT_TTL_SECONDS = 60
+
+_NUMBER_TYPES = {'numeric', 'integer', 'bigint', 'smallint', 'real', 'double precision'}
+_INTEGER_TYPES = {'integer', 'bigint', 'smallint'}
+
+# Column names and types of final_computed_table, in table order
+COLUMNS_SQL = """
+    SELECT json_agg(json_build_array(attname, format_type(atttypid, NULL)) ORDER BY attnum)
+    FROM pg_attribute
+    WHERE attrelid = 'final_computed_table'::regclass AND attnum > 0 AND NOT attisdropped
+"""
+
+SERIES_SQL = """
+    SELECT COALESCE(json_agg(f ORDER BY f.month_year), '[]')::text
+    FROM final_computed_table f
+    WHERE f.customer_name = %(customer)s
+"""
+
+_MONTHS_SQL = """
+    SELECT COALESCE(json_agg(f ORDER BY f.month_year), '[]')::text
+    FROM final_computed_table f
+    WHERE f.customer_name = %(customer)s AND f.month_year BETWEEN %(start)s AND %(end)s
+"""
+
+
+def _as_date(month):
+    if isinstance(month, datetime):
+        return month.date()
+    if isinstance(month, date):
+        return month
+    return datetime.strptime(str(month)[:10], '%Y-%m-%d').date()
+
+
+def _parse_rows(text):
+    return json.loads(text, parse_float=Decimal)
+
+
+class CustomerSeries:
+    """One customer's rows as column arrays, ordered by month. Never modified once built."""
+
+    def __init__(self, columns, ordinals, arrays):
+        self.columns = columns    # [(name, type), ...]
+        self.ordinals = ordinals  # int64 month_year ordinals, ascending
+        self.arrays = arrays      # name -> array of len(ordinals)
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        """Build from final_computed_table rows as parsed from json_agg text."""
+        ordinals = np.array([_as_date(row['month_year']).toordinal() for row in rows], dtype=np.int64)
+        arrays = {}
+        for name, type_ in columns:
+            values = [row.get(name) for row in rows]
+            if type_ in _NUMBER_TYPES:
+                arrays[name] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+            elif type_ == 'date':
+                arrays[name] = np.array([None if v is None else _as_date(v) for v in values], dtype=object)
+            elif type_.startswith('timestamp'):
+                arrays[name] = np.array([None if v is None else datetime.fromisoformat(v) for v in values],
+                                        dtype=object)
+            else:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+                arrays[name] = array
+        return cls(columns, ordinals, arrays)
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def replace(self, start, end, other):
+        """A new series with the months from start to end (inclusive) replaced by other's rows."""
+        lo = int(np.searchsorted(self.ordinals, start.toordinal(), side='left'))
+        hi = int(np.searchsorted(self.ordinals, end.toordinal(), side='right'))
+        ordinals = np.concatenate([self.ordinals[:lo], other.ordinals, self.ordinals[hi:]])
+        arrays = {name: np.concatenate([array[:lo], other.arrays[name], array[hi:]])
+                  for name, array in self.arrays.items()}
+        return CustomerSeries(self.columns, ordinals, arrays)
+
+    def _bounds(self, end, months):
+        end = _as_date(end)
+        start = end - relativedelta(months=months - 1)
+        lo = int(np.searchsorted(self.ordinals, start.toordinal(), side='left'))
+        hi = int(np.searchsorted(self.ordinals, end.toordinal(), side='right'))
+        return lo, hi
+
+    def _column(self, name, type_, lo, hi, decimals):
+        values = self.arrays[name][lo:hi].tolist()
+        if type_ in _INTEGER_TYPES:
+            return [None if v != v else int(v) for v in values]
+        if type_ in _NUMBER_TYPES:
+            if decimals:
+                return [None if v != v else Decimal(repr(v)) for v in values]
+            return [None if v != v else v for v in values]
+        if type_ == 'date' or type_.startswith('timestamp'):
+            return values
+        # arrays and json values are mutable: callers get their own copies
+        return copy.deepcopy(values)
+
+    def _records(self, end, months, decimals):
+        lo, hi = self._bounds(end, months)
+        columns = [self._column(name, type_, lo, hi, decimals) for name, type_ in self.columns]
+        return list(zip(*columns)) if hi > lo else []
+
+    def rows(self, end, months):
+        """The rows of the `months` months ending with `end`, oldest first, as dicts."""
+        names = [name for name, _ in self.columns]
+        return [dict(zip(names, record)) for record in self._records(end, months, decimals=True)]
+
+    def frame(self, end, months):
+        """The same window as a DataFrame built as pd.read_sql would build it (numeric as float)."""
+        names = [name for name, _ in self.columns]
+        return pd.DataFrame.from_records(self._records(end, months, decimals=False), columns=names,
+                                         coerce_float=True)
+
+
+class WindowCache:
+    """LRU of CustomerSeries by customer, with read-through loading and in-place month updates."""
+
+    def __init__(self, max_customers=DEFAULT_MAX_CUSTOMERS, ttl=DEFAULT_TTL_SECONDS):
+        self.max_customers = max_customers
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._series = OrderedDict()  # customer -> (loaded_at, CustomerSeries)
+        self._columns = None
+        self._generation = 0  # bumped by every change; a load that overlaps one isn't stored
+
+    def cached(self, customer):
+        """The customer's series if cached and fresh, else None. No database access."""
+        with self._lock:
+            entry = self._series.get(customer)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._series[customer]
+                return None
+            self._series.move_to_end(customer)
+            return entry[1]
+
+    def load_parts(self, customer):
+        """({column name: SQL}, token) for loading the customer's series as part of a larger query.
+
+        The parts take a %(customer)s parameter; they are empty when the series is cached.
+        Pass the fetched values and the token to store().
+        """
+        with self._lock:
+            token = self._generation
+            columns_known = self._columns is not None
+        if self.cached(customer) is not None:
+            return {}, token
+        parts = {'window_series': SERIES_SQL}
+        if not columns_known:
+            parts['window_columns'] = COLUMNS_SQL
+        return parts, token
+
+    def store(self, customer, fetched, token):
+        """Build and cache the series from the values fetched for load_parts(); returns it."""
+        with self._lock:
+            if fetched.get('window_columns') is not None:
+                self._columns = [tuple(column) for column in fetched['window_columns']]
+            columns = self._columns
+        series = CustomerSeries.from_rows(columns, _parse_rows(fetched['window_series']))
+        self._put(customer, series, token)
+        return series
+
+    def _put(self, customer, series, token):
+        with self._lock:
+            if token != self._generation:
+                return
+            self._series[customer] = (time.monotonic(), series)
+            self._series.move_to_end(customer)
+            while len(self._series) > self.max_customers:
+                self._series.popitem(last=False)
+
+    def series(self, conn, customer):
+        series = self.cached(customer)
+        if series is not None:
+            return series
+        parts, token = self.load_parts(customer)
+        cur = conn.cursor()
+        try:
+            names = list(parts)
+            cur.execute("SELECT " + ", ".join(f"({parts[name]}) AS {name}" for name in names),
+                        {'customer': customer})
+            fetched = dict(zip(names, cur.fetchone()))
+        finally:
+            cur.close()
+        return self.store(customer, fetched, token)
+
+    def rows(self, conn, customer, end, months):
+        """Rows of final_computed_table for the `months` months ending with `end`, oldest first."""
+        return self.series(conn, customer).rows(end, months)
+
+    def frame(self, conn, customer, end, months):
+        """The same window as a DataFrame, equivalent to pd.read_sql of the range."""
+        return self.series(conn, customer).frame(end, months)
+
+    def refresh(self, conn, customer, month, onwards=False):
+        """Re-read a cached customer's `month` (and every later month if onwards) and splice it in.
+
+        If the series changed meanwhile (another refresh), it is dropped instead.
+        """
+        with self._lock:
+            self._generation += 1
+            entry = self._series.get(customer)
+        if entry is None:
+            return
+        month = _as_date(month)
+        end = date.max if onwards else month
+        cur = conn.cursor()
+        try:
+            cur.execute(_MONTHS_SQL, {'customer': customer, 'start': month, 'end': end})
+            rows = _parse_rows(cur.fetchone()[0])
+        finally:
+            cur.close()
+        updated = entry[1].replace(month, end, CustomerSeries.from_rows(entry[1].columns, rows))
+        with self._lock:
+            if self._series.get(customer) is entry:
+                # the splice keeps the series' load time: the other months are as old as before
+                self._series[customer] = (entry[0], updated)
+            else:
+                self._series.pop(customer, None)
+
+    def invalidate(self, customer=None):
+        with self._lock:
+            self._generation += 1
+            if customer is None:
+                self._series.clear()
+            else:
+                self._series.pop(customer, None)
+
+
+windows = WindowCache(int(os.environ.get('CSM_WINDOW_CACHE_CUSTOMERS', DEFAULT_MAX_CUSTOMERS)),
+                      int(os.environ.get('CSM_WINDOW_CACHE_TTL', DEFAULT_TTL_SECONDS)))
+
+
+def update_hook(cache, connect):
+    """change_hooks hook updating a cached customer's series after a write; dropped if that fails."""
+
+    def update_window(change):
+        if cache.cached(change.customer) is None:
+            return
+        conn = connect()
+        if not conn:
+            cache.invalidate(change.customer)
+            return
+        try:
+            cache.refresh(conn, change.customer, change.month, onwards=change.propagates)
+        except Exception:
+            cache.invalidate(change.customer)
+            raise
+        finally:
+            conn.close()
+
+    return update_window